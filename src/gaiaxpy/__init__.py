@@ -1,15 +1,18 @@
 # flake8: noqa
-from .calibrator.calibrator import calibrate
+from .calibrator.calibrator import calibrate, calibrate_iter
 from .cholesky.cholesky import get_chi2, get_inverse_covariance_matrix, get_inverse_square_root_covariance_matrix
-from .converter.converter import convert
+from .converter.converter import convert, convert_iter
+from .core.generic_functions import covariance_from_factor, correlation_from_factor, correlation_from_band
 from .core.dispersion_function import pwl_to_wl, wl_to_pwl, pwl_range, wl_range
 from .core.version import __version__
 from .error_correction.error_correction import apply_error_correction
-from .generator.generator import generate
-from .generator.photometric_system import PhotometricSystem, load_additional_systems, remove_additional_systems
+from .generator.generator import generate, generate_iter
+from .generator.photometric_system import (PhotometricSystem, compile_additional_systems, load_additional_systems,
+                                           remove_additional_systems)
 from .plotter.plot_spectra import plot_spectra
 
-__all__ = ['calibrate', 'get_chi2', 'get_inverse_covariance_matrix', 'get_inverse_square_root_covariance_matrix',
-           'convert', 'pwl_to_wl', 'wl_to_pwl', 'pwl_range', 'wl_range', 'apply_error_correction', 'generate',
-           'PhotometricSystem', 'load_additional_systems', 'remove_additional_systems', 'plot_spectra',
-           '__version__']
+__all__ = ['calibrate', 'calibrate_iter', 'get_chi2', 'get_inverse_covariance_matrix',
+           'get_inverse_square_root_covariance_matrix', 'convert', 'convert_iter', 'covariance_from_factor',
+           'correlation_from_factor', 'correlation_from_band', 'pwl_to_wl', 'wl_to_pwl', 'pwl_range', 'wl_range',
+           'apply_error_correction', 'generate', 'generate_iter', 'PhotometricSystem', 'compile_additional_systems',
+           'load_additional_systems', 'remove_additional_systems', 'plot_spectra', '__version__']
@@ -4,36 +4,44 @@ calibrator.py
 Module for the calibrator functionality.
 """
 
-from configparser import ConfigParser
-from os.path import join
+from concurrent.futures import Executor
 from pathlib import Path
 from sys import stdout
-from typing import Union
+from typing import Iterator, Optional, Union
 
 import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
-from gaiaxpy.config.paths import config_path, config_ini_file
-from gaiaxpy.core.config import load_xpmerge_from_xml, load_xpsampling_from_xml
-from gaiaxpy.core.generic_functions import cast_output, validate_wl_sampling, parse_band, format_sampled_output
+from gaiaxpy.core.design_matrix_cache import design_matrix_cache
+from gaiaxpy.core.custom_errors import NoBandsAvailableError
+from gaiaxpy.core.generic_functions import cast_output, validate_wl_sampling, parse_band, validate_correlation_format, \
+    parse_dtype, collect_sampling_results, get_sampling_output_file, parse_samplings, validate_return_type, \
+    correlation_from_covariance, correlation_band_from_covariance_band, parse_outputs, validate_spectra_outputs
 from gaiaxpy.core.generic_variables import pbar_colour, pbar_units, pbar_message
+from gaiaxpy.core.parallel import concat_chunks, map_chunks, use_workers, validate_parallel_arguments
 from gaiaxpy.core.satellite import BANDS, BP_WL, RP_WL
 from gaiaxpy.input_reader.input_reader import InputReader
+from gaiaxpy.output.output_data import validate_append_format
 from gaiaxpy.output.sampled_spectra_data import SampledSpectraData
 from gaiaxpy.spectrum.sampled_basis_functions import SampledBasisFunctions
-from gaiaxpy.spectrum.utils import get_covariance_matrix
-from gaiaxpy.spectrum.xp_continuous_spectrum import XpContinuousSpectrum
-from .external_instrument_model import ExternalInstrumentModel
-from ..core.input_validator import validate_save_arguments
+from gaiaxpy.spectrum.sampled_spectra_arrays import SampledSpectraArrays
+from gaiaxpy.spectrum.absolute_sampled_spectrum import _sample_covariance
+from gaiaxpy.spectrum.xp_spectra_batch import get_batches
+from .model_registry import calibration_model_registry
+from ..core.input_validator import validate_chunk_size, validate_save_arguments
 from ..spectrum.calibration_absolute_sampled_spectrum import CalibrationAbsoluteSampledSpectrum
 
 __FUNCTION_KEY = 'calibrator'
+_OUTPUTS = ('flux', 'flux_error')
 
 
-def calibrate(input_object: Union[list, Path, pd.DataFrame, str], sampling: np.ndarray = None, truncation: bool = False,
-              output_path: Union[Path, str] = '.', output_file: str = 'output_spectra', output_format: str = None,
-              save_file: bool = True, with_correlation: bool = False, username: str = None, password: str = None) -> \
+def calibrate(input_object: Union[list, Path, pd.DataFrame, str], sampling: Union[np.ndarray, list, dict] = None,
+              truncation: bool = False, output_path: Union[Path, str] = '.', output_file: str = 'output_spectra',
+              output_format: str = None, save_file: bool = True, with_correlation: bool = False, username: str = None,
+              password: str = None, correlation_format: str = 'matrix', correlation_bandwidth: int = None,
+              dtype: str = 'float64', n_workers: int = None, executor: Executor = None,
+              return_type: str = 'dataframe', outputs: Optional[Union[set, list, str]] = None) -> \
         (pd.DataFrame, np.ndarray):
     """
     Calibration utility: calibrates the input internally-calibrated continuously-represented mean spectra to the
@@ -44,7 +52,10 @@ def calibrate(input_object: Union[list, Path, pd.DataFrame, str], sampling: np.n
     Args:
         input_object (list/Path/pd.DataFrame/str): Path to the file containing the mean spectra as downloaded from the
             Archive in their continuous representation, a list of sources ids (string or long), or a pandas DataFrame.
-        sampling (ndarray): 1D array containing the desired sampling in absolute wavelengths [nm].
+        sampling (ndarray/list/dict): 1D array containing the desired sampling in absolute wavelengths [nm]. A list or a
+            dictionary of arrays can also be given to calibrate the spectra onto several sampling grids at once. The
+            input is then read and parsed only once, and one output is returned (and saved, adding the position in the
+            list or the key in the dictionary as a suffix to the output file name) per grid.
         truncation (bool): Toggle truncation of the set of bases. The level of truncation to be applied is defined by
             the recommended value in the input files.
         output_path (Path/str): Path where to save the output data.
@@ -55,22 +66,57 @@ def calibrate(input_object: Union[list, Path, pd.DataFrame, str], sampling: np.n
         with_correlation (bool): Whether correlation information should be generated.
         username (str): Cosmos username, only suggested when input_object is a list or ADQL query.
         password (str): Cosmos password, only suggested when input_object is a list or ADQL query.
+        correlation_format (str): Representation of the correlation information when with_correlation is True. If
+            'matrix', the lower triangle of the correlation matrix is stored in the column 'correlation'. If 'factor',
+            a 2D array F such that the covariance matrix is F.T @ F is stored in the column 'covariance_factor' (see
+            covariance_from_factor and correlation_from_factor). The factor stacks the BP and RP factors weighted by the
+            merge weights, so it has 2 * n_bases rows. For spectra with both bands, the other formats weight only the
+            columns of the covariance of each band. That matrix is not symmetric and has no factor, so the formats only
+            agree on the pairs of samples that get their flux from the same single band.
+        correlation_bandwidth (int): If given, only the correlations between samples closer than this number of samples
+            are computed. They are stored in the column 'banded_correlation' as a 2D array of shape
+            (correlation_bandwidth, n_samples) where element [d - 1, i] is the correlation between samples i + d and i
+            (see correlation_from_band). Only valid when correlation_format is 'matrix'.
+        dtype (str/type): Floating point type used to compute and store the output, either 'float64' or 'float32'.
+            Single precision halves the memory and storage required. The difference with respect to double precision
+            is of the order of 1e-6 for fluxes (relative to the maximum flux of each spectrum), errors (relative to
+            each error) and correlations.
+        n_workers (int): Number of worker processes used to calibrate the spectra. The sources are split in chunks that
+            are processed in parallel, and the output keeps the order of the input. By default, the spectra are
+            calibrated in the current process.
+        executor (Executor): Executor (e.g.: a concurrent.futures.ProcessPoolExecutor) used to process the chunks
+            instead of creating a new pool of n_workers processes. If given, n_workers is only used to decide the number
+            of chunks.
+        return_type (str): Either 'dataframe' or 'arrays'. If 'arrays', the spectra are returned in a
+            SampledSpectraArrays, which stores the values of all spectra in contiguous arrays with one row per spectrum
+            (and the sampling) instead of one array per cell of a DataFrame.
+        outputs (str/list/set): Quantities included in the output spectra, 'flux' and optionally 'flux_error'. By
+            default, both are included. If the errors are not requested, the covariances of the coefficients are not
+            propagated to the sampled spectra and the column 'flux_error' is left out. Correlation information can only
+            be generated together with the errors.
 
     Returns:
         (tuple): tuple containing:
 
             DataFrame: The values for all sampled absolute spectra.
             ndarray: The sampling used to calibrate the input spectra (user-provided or default).
+
+        If return_type is 'arrays', a SampledSpectraArrays is returned instead of the tuple. If a list or a dictionary
+            of samplings is given, a list or a dictionary (with the same keys) of such outputs is returned instead.
     """
     return _calibrate(input_object, sampling, truncation, output_path, output_file, output_format, save_file,
-                      with_correlation=with_correlation, username=username, password=password)
-
-
-def _calibrate(input_object: Union[list, Path, str], sampling: np.ndarray = None, truncation: bool = False,
-               output_path: Union[Path, str] = '.', output_file: str = 'output_spectra', output_format: str = None,
-               save_file: bool = True, with_correlation: bool = False, username: str = None, password: str = None,
-               bp_model: str = 'v375wi', rp_model: str = 'v142r', disable_info: bool = False) -> \
-        (pd.DataFrame, np.ndarray):
+                      with_correlation=with_correlation, username=username, password=password,
+                      correlation_format=correlation_format, correlation_bandwidth=correlation_bandwidth, dtype=dtype,
+                      n_workers=n_workers, executor=executor, return_type=return_type, outputs=outputs)
+
+
+def _calibrate(input_object: Union[list, Path, str], sampling: Union[np.ndarray, list, dict] = None,
+               truncation: bool = False, output_path: Union[Path, str] = '.', output_file: str = 'output_spectra',
+               output_format: str = None, save_file: bool = True, with_correlation: bool = False, username: str = None,
+               password: str = None, bp_model: str = 'v375wi', rp_model: str = 'v142r', disable_info: bool = False,
+               correlation_format: str = 'matrix', correlation_bandwidth: int = None, dtype: str = 'float64',
+               n_workers: int = None, executor: Executor = None, return_type: str = 'dataframe',
+               outputs: Optional[Union[set, list, str]] = None) -> (pd.DataFrame, np.ndarray):
     """
     Internal function of the calibration utility. Refer to "calibrate".
 
@@ -83,20 +129,146 @@ def _calibrate(input_object: Union[list, Path, str], sampling: np.ndarray = None
         ndarray: The sampling used to calibrate the spectra.
 
     Raises:
-        ValueError: If the sampling is out of the expected boundaries.
+        ValueError: If the sampling is out of the expected boundaries, or if the outputs are not valid.
     """
-    validate_wl_sampling(sampling)
+    samplings, sampling_keys = parse_samplings(sampling)
+    for grid in samplings:
+        validate_wl_sampling(grid)
+    validate_correlation_format(correlation_format, correlation_bandwidth)
+    validate_parallel_arguments(n_workers, executor)
+    validate_return_type(return_type)
+    outputs = parse_outputs(outputs, _OUTPUTS)
+    validate_spectra_outputs(outputs, with_correlation)
+    dtype = parse_dtype(dtype)
     validate_save_arguments(_calibrate.__defaults__[3], output_file, _calibrate.__defaults__[4], output_format,
                             save_file)
     parsed_input_data, extension = InputReader(input_object, _calibrate, truncation=truncation,
                                                disable_info=disable_info, user=username, password=password).read()
+    xp_matrices_and_merge_list = _generate_xp_matrices_and_merge_list(samplings, bp_model, rp_model)
+    if use_workers(n_workers, executor):
+        results = map_chunks(_create_spectra_in_worker, parsed_input_data, n_workers=n_workers, executor=executor,
+                             initializer=_generate_xp_matrices_and_merge_list, initargs=(samplings, bp_model, rp_model),
+                             samplings=samplings, bp_model=bp_model, rp_model=rp_model, truncation=truncation,
+                             with_correlation=with_correlation, correlation_format=correlation_format,
+                             correlation_bandwidth=correlation_bandwidth, dtype=dtype, return_type=return_type,
+                             with_error='flux_error' in outputs)
+        concatenate = SampledSpectraArrays.concatenate if return_type == 'arrays' else concat_chunks
+        spectra_list = [(concatenate([chunk[index][0] for chunk in results]), results[0][index][1]) for index in
+                        range(len(samplings))]
+    else:
+        # The coefficients and covariances are stacked once and sampled on each grid
+        batches = get_batches(parsed_input_data, truncation=truncation, dtype=dtype)
+        spectra_list = [__create_spectra(parsed_input_data, truncation, xp_design_matrices, xp_merge,
+                                         with_correlation=with_correlation, disable_info=disable_info,
+                                         correlation_format=correlation_format,
+                                         correlation_bandwidth=correlation_bandwidth, dtype=dtype, batches=batches,
+                                         return_type=return_type, with_error='flux_error' in outputs)
+                        for xp_design_matrices, xp_merge in xp_matrices_and_merge_list]
+    results = []
+    for (spectra, positions), key in zip(spectra_list, sampling_keys or [None]):
+        if return_type == 'arrays':
+            spectra.source_id = spectra.source_id.astype(np.int64)
+            results.append(spectra)
+            # The spectra are only split into one array per cell when they have to be saved
+            spectra = spectra.to_data_frame() if save_file else None
+        if spectra is not None:
+            spectra = cast_output(spectra)
+            output_data = SampledSpectraData(spectra, positions)
+            output_data.save(save_file, output_path, get_sampling_output_file(output_file, key), output_format,
+                             extension)
+            if return_type == 'dataframe':
+                results.append((spectra, positions))
+    return collect_sampling_results(results, sampling, sampling_keys)
+
+
+def calibrate_iter(input_object: Union[list, Path, pd.DataFrame, str], sampling: np.ndarray = None,
+                   truncation: bool = False, output_path: Union[Path, str] = '.', output_file: str = 'output_spectra',
+                   output_format: str = None, save_file: bool = True, with_correlation: bool = False,
+                   username: str = None, password: str = None, correlation_format: str = 'matrix',
+                   correlation_bandwidth: int = None, dtype: str = 'float64', chunk_size: int = 1000,
+                   outputs: Optional[Union[set, list, str]] = None) -> Iterator[tuple]:
+    """
+    Chunked version of the calibration utility (refer to "calibrate"). The input is read and calibrated in chunks of at
+    most chunk_size sources, so that the memory required depends on the chunk size rather than on the size of the
+    input. AVRO and CSV/ECSV files are read incrementally. If save_file is True, the spectra of each chunk are appended
+    to the output file as soon as they are computed, which is only possible for AVRO, CSV and ECSV outputs.
+
+    Args:
+        input_object (list/Path/pd.DataFrame/str): Path to the file containing the mean spectra as downloaded from the
+            Archive in their continuous representation, a list of sources ids (string or long), or a pandas DataFrame.
+        sampling (ndarray): 1D array containing the desired sampling in absolute wavelengths [nm].
+        truncation (bool): Toggle truncation of the set of bases. The level of truncation to be applied is defined by
+            the recommended value in the input files.
+        output_path (Path/str): Path where to save the output data.
+        output_file (str): Name of the output file without extension (e.g. 'my_file').
+        output_format (str): Desired output format. If no format is given, the output file format will be the same as
+            the input file (e.g. 'csv').
+        save_file (bool): Whether to save the output in a file. If false, output_format and output_file will be ignored.
+        with_correlation (bool): Whether correlation information should be generated.
+        username (str): Cosmos username, only suggested when input_object is a list or ADQL query.
+        password (str): Cosmos password, only suggested when input_object is a list or ADQL query.
+        correlation_format (str): Representation of the correlation information (refer to "calibrate").
+        correlation_bandwidth (int): Number of samples for which correlations are computed (refer to "calibrate").
+        dtype (str/type): Floating point type used to compute and store the output, either 'float64' or 'float32'.
+        chunk_size (int): Maximum number of sources calibrated at once.
+        outputs (str/list/set): Quantities included in the output spectra (refer to "calibrate").
+
+    Returns:
+        generator: Generator of tuples, one per chunk, containing:
+
+            DataFrame: The values for the sampled absolute spectra in the chunk.
+            ndarray: The sampling used to calibrate the input spectra (user-provided or default).
+    """
+    return _calibrate_iter(input_object, sampling, truncation, output_path, output_file, output_format, save_file,
+                           with_correlation=with_correlation, username=username, password=password,
+                           correlation_format=correlation_format, correlation_bandwidth=correlation_bandwidth,
+                           dtype=dtype, chunk_size=chunk_size, outputs=outputs)
+
+
+def _calibrate_iter(input_object: Union[list, Path, str], sampling: np.ndarray = None, truncation: bool = False,
+                    output_path: Union[Path, str] = '.', output_file: str = 'output_spectra', output_format: str = None,
+                    save_file: bool = True, with_correlation: bool = False, username: str = None,
+                    password: str = None, bp_model: str = 'v375wi', rp_model: str = 'v142r',
+                    disable_info: bool = False, correlation_format: str = 'matrix', correlation_bandwidth: int = None,
+                    dtype: str = 'float64', chunk_size: int = 1000,
+                    outputs: Optional[Union[set, list, str]] = None) -> Iterator[tuple]:
+    """
+    Internal function of the chunked calibration utility. Refer to "calibrate_iter".
+
+    Args:
+        bp_model (str): The bp model.
+        rp_model (str): The rp model.
+
+    Returns:
+        generator: Generator of tuples containing the spectra in each chunk and the sampling.
+
+    Raises:
+        ValueError: If the sampling is out of the expected boundaries, if the outputs are not valid, or if save_file is
+            True and the output format does not allow appending data to an existing file.
+    """
+    validate_wl_sampling(sampling)
+    validate_correlation_format(correlation_format, correlation_bandwidth)
+    validate_chunk_size(chunk_size)
+    outputs = parse_outputs(outputs, _OUTPUTS)
+    validate_spectra_outputs(outputs, with_correlation)
+    dtype = parse_dtype(dtype)
+    validate_save_arguments(_calibrate.__defaults__[3], output_file, _calibrate.__defaults__[4], output_format,
+                            save_file)
+    chunks = InputReader(input_object, _calibrate, truncation=truncation, disable_info=disable_info, user=username,
+                         password=password).read_chunks(chunk_size)
     xp_design_matrices, xp_merge = __generate_xp_matrices_and_merge(__FUNCTION_KEY, sampling, bp_model, rp_model)
-    spectra_df, positions = __create_spectra(parsed_input_data, truncation, xp_design_matrices, xp_merge,
-                                             with_correlation=with_correlation, disable_info=disable_info)
-    spectra_df = cast_output(spectra_df)
-    output_data = SampledSpectraData(spectra_df, positions)
-    output_data.save(save_file, output_path, output_file, output_format, extension)
-    return spectra_df, positions
+    for index, (parsed_input_data, extension) in enumerate(chunks):
+        if save_file and index == 0:
+            validate_append_format(output_format if output_format else extension)
+        spectra_df, positions = __create_spectra(parsed_input_data, truncation, xp_design_matrices, xp_merge,
+                                                 with_correlation=with_correlation, disable_info=disable_info,
+                                                 correlation_format=correlation_format,
+                                                 correlation_bandwidth=correlation_bandwidth, dtype=dtype,
+                                                 with_error='flux_error' in outputs)
+        spectra_df = cast_output(spectra_df)
+        output_data = SampledSpectraData(spectra_df, positions)
+        output_data.save(save_file, output_path, output_file, output_format, extension, append=index > 0)
+        yield spectra_df, positions
 
 
 def __create_merge(xp: str, sampling: np.ndarray) -> np.ndarray:
@@ -113,11 +285,12 @@ def __create_merge(xp: str, sampling: np.ndarray) -> np.ndarray:
     xp = parse_band(xp)
     wl_high = BP_WL.high
     wl_low = RP_WL.low
-    return np.array([1.0 if wl < wl_low else 0.0 if wl > wl_high else (1.0 - (wl - wl_low) / (wl_high - wl_low)) for
-                     wl in sampling]) \
-        if xp == BANDS.bp else np.array([0.0 if wl < wl_low else 1.0 if wl > wl_high else (wl - wl_low) /
-                                                                                          (wl_high - wl_low)
-                                         for wl in sampling])
+    sampling = np.asarray(sampling, dtype=float)
+    # Fraction of the overlap region covered at each wavelength: 0 below it and 1 above it
+    rp_weight = np.where(sampling < wl_low, 0.0, np.where(sampling > wl_high, 1.0, (sampling - wl_low) /
+                                                          (wl_high - wl_low)))
+    bp_weight = np.where(sampling < wl_low, 1.0, np.where(sampling > wl_high, 0.0, 1.0 - rp_weight))
+    return bp_weight if xp == BANDS.bp else rp_weight
 
 
 def __generate_xp_matrices_and_merge(label: str, sampling: np.ndarray, bp_model: str, rp_model: str) -> (dict, dict):
@@ -134,45 +307,88 @@ def __generate_xp_matrices_and_merge(label: str, sampling: np.ndarray, bp_model:
         tuple: A tuple containing two dictionaries, one for the xp_design_matrices and the other for the xp_merge.
     """
 
-    def __get_file_for_xp(xp: str, key: str, _bp_model: str = bp_model, _rp_model: str = rp_model) -> str:
+    def __compute_matrices_and_merge() -> dict:
         """
-        Retrieves the file for the specified xp band.
-
-        Args:
-            xp (str): The xp band, either 'bp' or 'rp'.
-            key (str): The key for the file in the config file.
-            _bp_model (str): The bp model.
-            _rp_model (str): The rp model.
+        Computes the arrays defining the xp_design_matrices and xp_merge.
 
         Returns:
-            str: The file path for the specified xp band.
-
-        Raises:
-            ValueError: If the xp band is not 'bp' or 'rp'.
+            dict: A dictionary containing the sampling grid and, for each band, the design matrix and the merge weights.
         """
-        xp = parse_band(xp)
-        config_parser = ConfigParser()
-        config_parser.read(config_ini_file)
-        file_name = config_parser.get(label, key)
-        model = _bp_model if xp == BANDS.bp else _rp_model
-        return join(config_path, f"{file_name.replace('xp', xp).replace('model', model)}")
+        instrument_models = calibration_model_registry.get_instrument_models(bp_model, rp_model)
+        _xp_merge = {xp: __create_merge(xp, sampling) for xp in BANDS}
+        _xp_design_matrices = {xp: SampledBasisFunctions.from_external_instrument_model(
+            sampling, _xp_merge[xp], instrument_models[xp]).get_design_matrix() for xp in BANDS}
+        return {'sampling_grid': sampling, **{f'{xp}_design_matrix': _xp_design_matrices[xp] for xp in BANDS},
+                **{f'{xp}_merge': _xp_merge[xp] for xp in BANDS}}
 
     if sampling is None:
-        xp_sampling_grid, xp_merge = load_xpmerge_from_xml(bp_model=bp_model)
-        xp_design_matrices = load_xpsampling_from_xml(bp_model=bp_model)
-        xp_design_matrices = {xp: SampledBasisFunctions.from_design_matrix(xp_sampling_grid, xp_design_matrices[xp])
-                              for xp in BANDS}
+        arrays = calibration_model_registry.get_default_arrays(bp_model, rp_model)
     else:
-        xp_merge = {xp: __create_merge(xp, sampling) for xp in BANDS}
-        xp_design_matrices = {xp: SampledBasisFunctions.from_external_instrument_model(
-            sampling, xp_merge[xp], ExternalInstrumentModel.from_config_csv(
-                __get_file_for_xp(xp, 'dispersion'), __get_file_for_xp(xp, 'response'),
-                __get_file_for_xp(xp, 'bases'))) for xp in BANDS}
+        instrument_files = calibration_model_registry.get_files(bp_model, rp_model)
+        files = [instrument_files[xp][key] for xp in BANDS for key in ('dispersion', 'response', 'bases')]
+        key = design_matrix_cache.get_key(label, sampling, files=files, bp_model=bp_model, rp_model=rp_model)
+        arrays = design_matrix_cache.get(key, __compute_matrices_and_merge)
+    # The sampling grid is returned to the user, so it must not be the read-only cached array
+    sampling_grid = np.array(arrays['sampling_grid'])
+    xp_design_matrices = {xp: SampledBasisFunctions.from_design_matrix(sampling_grid, arrays[f'{xp}_design_matrix'])
+                          for xp in BANDS}
+    xp_merge = {xp: arrays[f'{xp}_merge'] for xp in BANDS}
     return xp_design_matrices, xp_merge
 
 
+def _generate_xp_matrices_and_merge_list(samplings: list, bp_model: str, rp_model: str) -> list:
+    """
+    Generate the xp_design_matrices and xp_merge for each of the sampling grids.
+
+    Args:
+        samplings (list): The sampling grids.
+        bp_model (str): The bp model.
+        rp_model (str): The rp model.
+
+    Returns:
+        list: A tuple containing the xp_design_matrices and the xp_merge per sampling grid.
+    """
+    return [__generate_xp_matrices_and_merge(__FUNCTION_KEY, sampling, bp_model, rp_model) for sampling in samplings]
+
+
+def _create_spectra_in_worker(parsed_input_data: pd.DataFrame, samplings: list, bp_model: str, rp_model: str,
+                              truncation: bool, with_correlation: bool, correlation_format: str,
+                              correlation_bandwidth: int, dtype: np.dtype, return_type: str = 'dataframe',
+                              with_error: bool = True) -> list:
+    """
+    Create the absolute spectra of a chunk of sources in a worker process. The design matrices and merge weights are
+    taken from the design matrix cache of the process, so they are only computed (or loaded from disk) once per worker.
+
+    Args:
+        parsed_input_data (DataFrame): The parsed input data of the chunk.
+        samplings (list): The sampling grids.
+        bp_model (str): The bp model.
+        rp_model (str): The rp model.
+        truncation (bool): If True, the set of bases is truncated.
+        with_correlation (bool): Whether to include the correlation information in the spectra.
+        correlation_format (str): Either 'matrix' or 'factor'.
+        correlation_bandwidth (int): If given, only the correlations between samples closer than this number of
+            samples are computed.
+        dtype (dtype): Floating point type used to compute and store the output.
+        return_type (str): Either 'dataframe' or 'arrays'.
+        with_error (bool): Whether to compute the flux errors.
+
+    Returns:
+        list: A tuple per sampling grid containing the absolute sampled spectra and the sample positions.
+    """
+    batches = get_batches(parsed_input_data, truncation=truncation, dtype=dtype)
+    return [__create_spectra(parsed_input_data, truncation, xp_design_matrices, xp_merge,
+                             with_correlation=with_correlation, disable_info=True,
+                             correlation_format=correlation_format, correlation_bandwidth=correlation_bandwidth,
+                             dtype=dtype, batches=batches, return_type=return_type, with_error=with_error)
+            for xp_design_matrices, xp_merge in _generate_xp_matrices_and_merge_list(samplings, bp_model, rp_model)]
+
+
 def __create_spectra(parsed_input_data: pd.DataFrame, truncation: bool, design_matrices: dict,
-                     merge: dict, with_correlation: bool = False, disable_info: bool = False):
+                     merge: dict, with_correlation: bool = False, disable_info: bool = False,
+                     correlation_format: str = 'matrix', correlation_bandwidth: int = None,
+                     dtype: np.dtype = np.float64, batches: dict = None, return_type: str = 'dataframe',
+                     with_error: bool = True):
     """
      Create a DataFrame of absolute sampled spectra for each source in the parsed mean spectra file.
 
@@ -186,41 +402,183 @@ def __create_spectra(parsed_input_data: pd.DataFrame, truncation: bool, design_m
              band to the joined absolute spectrum.
          with_correlation (bool, optional): If True, the covariance information is included in the resulting
              AbsoluteSampledSpectrum objects. Defaults to False.
+         disable_info (bool): Whether to disable the progress tracker.
+         correlation_format (str): Either 'matrix' (lower triangle of the correlation matrix) or 'factor' (covariance
+             factor).
+         correlation_bandwidth (int): If given, only the correlations between samples closer than this number of
+             samples are computed.
+         dtype (dtype): Floating point type used to compute and store the output.
+         batches (dict): The batch of each band (see get_batches). If given, they are sampled instead of creating new
+             ones from the parsed input data.
+         return_type (str): Either 'dataframe' or 'arrays'.
+         with_error (bool): Whether to propagate the covariances to compute the flux errors. If False, the output has
+             no flux errors.
 
      Returns:
          tuple:
-             spectra_df (DataFrame): DataFrame of absolute sampled spectra, each represented as a dictionary with
-                 attributes 'data_type' indicating the type of spectra and 'positions' indicating the sample positions.
+             spectra_df (DataFrame/SampledSpectraArrays): DataFrame of absolute sampled spectra, each represented as a
+                 dictionary with attributes 'data_type' indicating the type of spectra and 'positions' indicating the
+                 sample positions, or the same spectra stored in contiguous arrays if return_type is 'arrays'.
              positions (ndarray): 1D array of the sample positions.
      """
-    parsed_spectrum_file_dict = parsed_input_data.to_dict('records')
-    spectra_series = pd.Series([_create_spectrum(row, truncation, design_matrices, merge,
-                                                 with_correlation=with_correlation) for row in tqdm(
-        parsed_spectrum_file_dict, desc=pbar_message[__FUNCTION_KEY], unit=pbar_units[__FUNCTION_KEY], leave=False,
-        colour=pbar_colour, disable=disable_info, file=stdout)])
-    return format_sampled_output(spectra_series, with_correlation=with_correlation)
+    n_sources = len(parsed_input_data)
+    positions = design_matrices[BANDS.bp].get_sampling_grid()
+    batches = batches if batches is not None else get_batches(parsed_input_data, truncation=truncation, dtype=dtype)
+    # A band contributes to a spectrum only if both its coefficients and its covariance are available
+    has_band = {band: batches[band].has_covariance for band in BANDS}
+    if not (has_band[BANDS.bp] | has_band[BANDS.rp]).all():
+        raise NoBandsAvailableError()
+    merge = {band: merge[band].astype(dtype) for band in BANDS}
+    unweighted_design_matrices = {band: design_matrices[band].get_design_matrix() for band in BANDS}
+    # The merge weights only depend on the grid, so they are applied to the design matrices instead of to the sampled
+    # spectra of each source. Samples where the weight of a band is zero do not get any contribution from it, so the
+    # spectra with both bands are only sampled on the columns where each band contributes and are only combined in the
+    # region where both do.
+    active_columns = {band: np.flatnonzero(merge[band]) for band in BANDS}
+    weighted_design_matrices = {band: unweighted_design_matrices[band][:, active_columns[band]] *
+                                merge[band][active_columns[band]] for band in BANDS}
+    both_bands = np.flatnonzero(has_band[BANDS.bp] & has_band[BANDS.rp])
+    single_band = {band: np.flatnonzero(has_band[band] & ~has_band[__get_other_band(band)]) for band in BANDS}
+    # Samples outside the range covered by a band are missing in the spectra that only have that band
+    missing_positions = {BANDS.bp: positions >= BP_WL.high, BANDS.rp: positions <= RP_WL.low}
+    flux = np.empty((n_sources, len(positions)), dtype=dtype)
+    flux_error = np.empty_like(flux) if with_error else None
+    both_flux = np.zeros((len(both_bands), len(positions)), dtype=dtype)
+    both_flux_error = np.zeros_like(both_flux)
+    for band in BANDS:
+        columns = active_columns[band]
+        both_flux[:, columns] += batches[band].sample_flux(weighted_design_matrices[band], both_bands)
+        if with_error:
+            # Equivalent to the square root of the sum of squares, but the squares of small errors cannot underflow
+            both_flux_error[:, columns] = np.hypot(both_flux_error[:, columns],
+                                                   batches[band].sample_error(weighted_design_matrices[band],
+                                                                              both_bands))
+    flux[both_bands] = both_flux
+    for band, rows in single_band.items():
+        flux[rows] = batches[band].sample_flux(unweighted_design_matrices[band], rows)
+        flux[np.ix_(rows, missing_positions[band])] = np.nan
+    if with_error:
+        flux_error[both_bands] = both_flux_error
+        for band, rows in single_band.items():
+            flux_error[rows] = batches[band].sample_error(unweighted_design_matrices[band], rows)
+            flux_error[np.ix_(rows, missing_positions[band])] = np.nan
+    correlation, correlation_type = None, None
+    with tqdm(total=n_sources, desc=pbar_message[__FUNCTION_KEY], unit=pbar_units[__FUNCTION_KEY], leave=False,
+              colour=pbar_colour, disable=disable_info, file=stdout) as progress_bar:
+        if not with_correlation:
+            progress_bar.update(n_sources)
+        else:
+            covariance_key = 'factor' if correlation_format == 'factor' else 'band' if correlation_bandwidth else 'cov'
+            correlation_type = {'factor': 'covariance_factor', 'band': 'banded_correlation',
+                                'cov': 'correlation'}[covariance_key]
+            row_size = sum(matrix.shape[1] ** 2 for matrix in unweighted_design_matrices.values())
+            if correlation_bandwidth:
+                row_size = sum(matrix.shape[1] * (matrix.shape[0] + correlation_bandwidth + 1)
+                               for matrix in unweighted_design_matrices.values())
+            correlation_blocks = []
+            for rows in batches[BANDS.bp].get_blocks(row_size):
+                correlation_blocks.append(__sample_merged_correlation(
+                    batches, unweighted_design_matrices, merge, active_columns, has_band, missing_positions, rows,
+                    covariance_key, correlation_bandwidth))
+                progress_bar.update(rows.stop - rows.start)
+            correlation = np.concatenate(correlation_blocks)
+    source_ids = parsed_input_data['source_id'].tolist()
+    if return_type == 'arrays':
+        return SampledSpectraArrays(np.array(source_ids), flux, flux_error, positions,
+                                    CalibrationAbsoluteSampledSpectrum, correlation=correlation,
+                                    correlation_type=correlation_type), positions
+    spectra_dict = {'source_id': source_ids, 'flux': list(flux)}
+    if with_error:
+        spectra_dict['flux_error'] = list(flux_error)
+    if with_correlation:
+        spectra_dict[correlation_type] = list(correlation)
+    spectra_df = pd.DataFrame(spectra_dict)
+    spectra_df.attrs['data_type'] = CalibrationAbsoluteSampledSpectrum
+    return spectra_df, positions
 
 
-def _create_spectrum(row, truncation, design_matrix, merge, with_correlation=False):
+def __get_other_band(band: str) -> str:
+    return BANDS.rp if band == BANDS.bp else BANDS.bp
+
+
+def __sample_merged_correlation(batches: dict, design_matrices: dict, merge: dict, active_columns: dict,
+                                has_band: dict, missing_positions: dict, rows: slice, covariance_key: str,
+                                bandwidth: int = None) -> np.ndarray:
     """
-    Create a single sampled absolute spectrum from the input continuously-represented mean spectrum and design matrix.
+    Compute the correlation information of a block of merged absolute spectra. Spectra with both bands combine them
+        with the merge weights, while spectra with a single band keep it unweighted and are masked outside its range.
 
     Args:
-        row (DataFrame): Single row in a DataFrame containing the entry for one source in the mean spectra file. This
-            will include columns for both bands (although one could be missing).
-        truncation (bool): Toggle truncation of the set of bases.
-        design_matrix (ndarray): 2D array containing the basis functions sampled on the pseudo-wavelength grid (either
-            user-defined or default).
-        merge (dict): Dictionary containing an array of weights per BP and one for RP. These have one value per sample
-            and define the contributions from BP and RP to the joined absolute spectrum.
+        batches (dict): The batch of each band.
+        design_matrices (dict): The (unweighted) design matrix of each band.
+        merge (dict): The merge weights of each band.
+        active_columns (dict): Indices of the samples where the merge weight of each band is not zero.
+        has_band (dict): Boolean array per band defining the spectra in which the band is available.
+        missing_positions (dict): Boolean array per band defining the samples outside the range covered by the band.
+        rows (slice): Rows of the batches to be processed.
+        covariance_key (str): Either 'factor' (covariance factor), 'band' (banded covariance) or 'cov' (covariance
+            matrix).
+        bandwidth (int): Number of diagonals of the banded covariance.
 
     Returns:
-        CalibrationAbsoluteSampledSpectrum: The absolute sampled spectrum with calibration behaviour.
-    """
-    source_id = row['source_id']
-    continuous_dict = {band: XpContinuousSpectrum(source_id, band, row[f'{band}_coefficients'],
-                                                  get_covariance_matrix(row, band), row[f'{band}_standard_deviation'])
-                       for band in BANDS}
-    recommended_truncation = {band: row[f'{band}_n_relevant_bases'] for band in BANDS} if truncation else dict()
-    return CalibrationAbsoluteSampledSpectrum(source_id, continuous_dict, design_matrix, merge,
-                                              truncation=recommended_truncation, with_correlation=with_correlation)
+        ndarray: The covariance factors, banded correlations or lower triangles of the correlation matrices of the
+            spectra in the block.
+    """
+    indices = np.arange(rows.start, rows.stop)
+    both_bands = has_band[BANDS.bp][rows] & has_band[BANDS.rp][rows]
+    merged = []
+    for band in BANDS:
+        batch, design_matrix, columns = batches[band], design_matrices[band], active_columns[band]
+        single_band = has_band[band][rows] & ~has_band[__get_other_band(band)][rows]
+        covariance = _sample_covariance(batch, design_matrix, indices[single_band], covariance_key, bandwidth)
+        contribution = np.zeros((len(indices),) + covariance.shape[1:], dtype=covariance.dtype)
+        contribution[single_band] = covariance
+        # Element [..., i] of every format belongs to column i of the covariance matrix, so the spectra with both
+        # bands only need the columns where the weight of the band is not zero
+        both_contribution = np.zeros((both_bands.sum(),) + covariance.shape[1:], dtype=covariance.dtype)
+        if covariance_key == 'factor':
+            both_contribution[..., columns] = batch.sample_covariance_factor(
+                design_matrix[:, columns] * merge[band][columns], indices[both_bands])
+        elif covariance_key == 'cov':
+            both_contribution[..., columns] = batch.sample_covariance(design_matrix, indices[both_bands],
+                                                                      columns=columns) * merge[band][columns]
+        else:
+            both_contribution = _sample_covariance(batch, design_matrix, indices[both_bands], covariance_key,
+                                                   bandwidth) * merge[band]
+        contribution[both_bands] = both_contribution
+        merged.append(contribution)
+    merged = np.concatenate(merged, axis=1) if covariance_key == 'factor' else merged[0] + merged[1]
+    for band in BANDS:
+        single_band = has_band[band][rows] & ~has_band[__get_other_band(band)][rows]
+        missing = __get_missing_elements(missing_positions[band], covariance_key, merged.shape[1])
+        merged[single_band] = np.where(missing, np.nan, merged[single_band])
+    if covariance_key == 'factor':
+        return merged
+    if covariance_key == 'band':
+        return correlation_band_from_covariance_band(merged)
+    lower_triangle = np.tril_indices(merged.shape[-1], k=-1)
+    return correlation_from_covariance(merged)[:, lower_triangle[0], lower_triangle[1]]
+
+
+def __get_missing_elements(missing_positions: np.ndarray, covariance_key: str, n_rows: int) -> np.ndarray:
+    """
+    Get the elements of the covariance information that involve samples outside the range covered by a band.
+
+    Args:
+        missing_positions (ndarray): Boolean array defining the samples outside the range covered by the band.
+        covariance_key (str): Either 'factor' (covariance factor), 'band' (banded covariance) or 'cov' (covariance
+            matrix).
+        n_rows (int): Number of rows of the covariance information of one spectrum.
+
+    Returns:
+        ndarray: Boolean array with the shape of the covariance information of one spectrum.
+    """
+    if covariance_key == 'cov':
+        return missing_positions[:, np.newaxis] | missing_positions[np.newaxis, :]
+    missing = np.tile(missing_positions, (n_rows, 1))
+    if covariance_key == 'band':
+        # Element [d, i] is also missing if its row (i + d) corresponds to a missing position
+        n_samples = len(missing_positions)
+        for offset in range(1, n_rows):
+            missing[offset, :n_samples - offset] |= missing_positions[offset:]
+    return missing
@@ -5,6 +5,8 @@ Module for handling the various components of the external calibration instrumen
 These are dispersion function, instrument response and set of inverse bases.
 """
 
+from typing import Union
+
 import numpy as np
 import pandas as pd
 from scipy import interpolate
@@ -32,6 +34,10 @@ class ExternalInstrumentModel(object):
         self.dispersion = dispersion
         self.response = response
         self.bases = bases
+        # The splines only depend on the model, so they are fitted once instead of on every evaluation
+        self._dispersion_tck = interpolate.splrep(dispersion.get('wavelength'), dispersion.get('pseudo-wavelength'),
+                                                  s=0)
+        self._response_tck = interpolate.splrep(response.get('wavelength'), response.get('response'), s=0)
 
     @classmethod
     def from_config_csv(cls, dispersion_path: str, response_path: str, bases_path: str):
@@ -62,28 +68,26 @@ class ExternalInstrumentModel(object):
                                                                               bases['nTransformedBases'])
         return cls(dispersion, response, bases)
 
-    def get_response(self, wavelength: float) -> np.ndarray:
+    def get_response(self, wavelength: Union[float, np.ndarray]) -> np.ndarray:
         """
         Get the response of the mean instrument at a certain wavelength.
 
         Args:
-            wavelength (float): The absolute wavelength.
+            wavelength (float or ndarray): The absolute wavelength, or a 1D array of absolute wavelengths.
 
         Returns:
             ndarray: The response of the mean instrument at the input wavelength.
         """
-        tck = interpolate.splrep(self.response.get("wavelength"), self.response.get("response"), s=0)
-        return interpolate.splev(wavelength, tck, der=0)
+        return interpolate.splev(wavelength, self._response_tck, der=0)
 
-    def wl_to_pwl(self, wavelength: float) -> np.ndarray:
+    def wl_to_pwl(self, wavelength: Union[float, np.ndarray]) -> np.ndarray:
         """
         Convert the input absolute wavelength to a pseudo-wavelength.
 
         Args:
-            wavelength (float): Absolute wavelength.
+            wavelength (float or ndarray): Absolute wavelength, or a 1D array of absolute wavelengths.
 
         Returns:
             ndarray: The corresponding pseudo-wavelength value.
         """
-        tck = interpolate.splrep(self.dispersion.get("wavelength"), self.dispersion.get("pseudo-wavelength"), s=0)
-        return interpolate.splev(wavelength, tck, der=0)
+        return interpolate.splev(wavelength, self._dispersion_tck, der=0)
@@ -0,0 +1,124 @@
+"""
+model_registry.py
+====================================
+Module to keep the calibration models loaded once per process.
+"""
+
+from configparser import ConfigParser
+from os.path import join
+from threading import RLock
+
+import numpy as np
+
+from gaiaxpy.config.paths import config_path, config_ini_file
+from gaiaxpy.core.config import load_xpmerge_from_xml, load_xpsampling_from_xml
+from gaiaxpy.core.satellite import BANDS
+from .external_instrument_model import ExternalInstrumentModel
+
+_INSTRUMENT_MODEL_KEYS = ('dispersion', 'response', 'bases')
+
+
+class CalibrationModelRegistry(object):
+    """
+    Process-wide registry of the models used by the calibrator, keyed by the pair of BP and RP models. The configuration
+        file, the external instrument model files and the default XpSampling and XpMerge tables are parsed only the
+        first time they are requested. All the arrays handed out are read-only, so they can be shared between threads.
+    """
+
+    def __init__(self, label='calibrator'):
+        """
+        Initialise an empty registry.
+
+        Args:
+            label (str): Section of the configuration file defining the instrument model files.
+        """
+        self.label = label
+        self._entries = dict()
+        self._lock = RLock()
+
+    def clear(self):
+        """
+        Remove all the models from the registry, so that they are parsed again the next time they are requested.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def get_files(self, bp_model, rp_model):
+        """
+        Get the paths to the files defining the external instrument model of each band.
+
+        Args:
+            bp_model (str): BP model.
+            rp_model (str): RP model.
+
+        Returns:
+            dict: A dictionary per band mapping 'dispersion', 'response' and 'bases' to the corresponding file.
+        """
+        return self._get(bp_model, rp_model, 'files', self._load_files)
+
+    def get_instrument_models(self, bp_model, rp_model):
+        """
+        Get the external instrument model of each band.
+
+        Args:
+            bp_model (str): BP model.
+            rp_model (str): RP model.
+
+        Returns:
+            dict: A dictionary containing one ExternalInstrumentModel per band.
+        """
+        return self._get(bp_model, rp_model, 'instrument_models', self._load_instrument_models)
+
+    def get_default_arrays(self, bp_model, rp_model):
+        """
+        Get the default sampling grid together with the design matrix and merge weights of each band.
+
+        Args:
+            bp_model (str): BP model.
+            rp_model (str): RP model.
+
+        Returns:
+            dict: A dictionary of read-only arrays containing the sampling grid and, for each band, the design matrix
+                and the merge weights.
+        """
+        return self._get(bp_model, rp_model, 'default_arrays', self._load_default_arrays)
+
+    def _get(self, bp_model, rp_model, name, load):
+        with self._lock:
+            entry = self._entries.setdefault((bp_model, rp_model), dict())
+            if name not in entry:
+                entry[name] = load(bp_model, rp_model)
+            return entry[name]
+
+    def _load_files(self, bp_model, rp_model):
+        config_parser = ConfigParser()
+        config_parser.read(config_ini_file)
+        models = {BANDS.bp: bp_model, BANDS.rp: rp_model}
+        return {xp: {key: join(config_path, config_parser.get(self.label, key).replace('xp', xp).replace(
+            'model', models[xp])) for key in _INSTRUMENT_MODEL_KEYS} for xp in BANDS}
+
+    def _load_instrument_models(self, bp_model, rp_model):
+        files = self.get_files(bp_model, rp_model)
+        instrument_models = {xp: ExternalInstrumentModel.from_config_csv(
+            *[files[xp][key] for key in _INSTRUMENT_MODEL_KEYS]) for xp in BANDS}
+        for instrument_model in instrument_models.values():
+            for values in [*instrument_model.dispersion.values(), *instrument_model.response.values(),
+                           *instrument_model.bases.values]:
+                if isinstance(values, np.ndarray):
+                    values.flags.writeable = False
+        return instrument_models
+
+    @staticmethod
+    def _load_default_arrays(bp_model, rp_model):
+        # The default tables are only defined for the default RP model
+        sampling_grid, xp_merge = load_xpmerge_from_xml(bp_model=bp_model)
+        xp_design_matrices = load_xpsampling_from_xml(bp_model=bp_model)
+        arrays = {'sampling_grid': sampling_grid, **{f'{xp}_design_matrix': xp_design_matrices[xp] for xp in BANDS},
+                  **{f'{xp}_merge': xp_merge[xp] for xp in BANDS}}
+        for name, values in arrays.items():
+            arrays[name] = np.asarray(values)
+            arrays[name].flags.writeable = False
+        return arrays
+
+
+calibration_model_registry = CalibrationModelRegistry()
@@ -7,6 +7,7 @@ Module that implements the colour equation functionality.
 import math
 from ast import literal_eval
 from configparser import ConfigParser
+from functools import lru_cache
 from os import listdir
 from pathlib import Path
 from sys import stdout
@@ -51,11 +52,40 @@ def __compute_mag_error(data, band, system_label):
         system_label (str): The system being used.
 
     Returns:
-        float: The magnitude error.
+        ndarray: The magnitude error.
     """
     return 2.5 * data[f'{system_label}_flux_error_{band}'] / (data[f'{system_label}_flux_{band}'] * math.log(10))
 
 
+@lru_cache(maxsize=None)
+def _load_colour_equation(label):
+    """
+    Load the colour equation of a photometric system from its configuration file. The file of each system is only
+        read once.
+
+    Args:
+        label (str): Label of the photometric system.
+
+    Returns:
+        dict: A dictionary containing the filter to correct, the colour index, the colour equation, its derivative and
+            the colour range of the system.
+    """
+    config_parser = ConfigParser()
+    config_parser.read(Path(colour_eq_dir, f'{label}_colour_eq.ini'))
+    colour_equation = dict()
+    colour_equation['filter'] = config_parser.get(label, 'FILTER')  # The filter to be corrected (string)
+    colour_equation['colour_index'] = config_parser.get(label, 'COLOUR_INDEX')  # The colour index (string)
+    # The colour equation (PolynomialFunction)
+    # Reverse, coefficients were originally defined for the Java polyfunction
+    coefficients = list(literal_eval(config_parser.get(label, 'POLY_COEFFICIENTS')))[::-1]
+    polyfunc = poly1d(coefficients)
+    colour_equation['polyfunc'] = polyfunc
+    colour_equation['derivative'] = polyfunc.deriv()  # Colour equation derivative (UnivariateFunction)
+    colour_range = config_parser.get(label, 'COLOUR_RANGE')  # Colour range for the correction (double[])
+    colour_equation['colour_range'] = literal_eval(colour_range)
+    return colour_equation
+
+
 def __fill_systems_details(systems_to_correct):
     """
     Get the details of the systems that will be corrected.
@@ -69,79 +99,111 @@ def __fill_systems_details(systems_to_correct):
     systems_details = dict()
     for system in systems_to_correct:
         label = system.get_system_label()
-        systems_details[label] = dict()
         # Get bands and zero points
-        systems_details[label]['bands_zp'] = dict(zip(system.get_bands(), system.get_zero_points()))
-        # Load ini file
-        config_parser = ConfigParser()
-        config_parser.read(Path(colour_eq_dir, f'{label}_colour_eq.ini'))
-        systems_details[label]['filter'] = config_parser.get(label, 'FILTER')  # The filter to be corrected (string)
-        systems_details[label]['colour_index'] = config_parser.get(label, 'COLOUR_INDEX')  # The colour index (string)
-        # The colour equation (PolynomialFunction)
-        # Reverse, coefficients were originally defined for the Java polyfunction
-        coefficients = list(literal_eval(config_parser.get(label, 'POLY_COEFFICIENTS')))[::-1]
-        polyfunc = poly1d(coefficients)
-        systems_details[label]['polyfunc'] = polyfunc
-        systems_details[label]['derivative'] = polyfunc.deriv()  # Colour equation derivative (UnivariateFunction)
-        colour_range = config_parser.get(label, 'COLOUR_RANGE')  # Colour range for the correction (double[])
-        systems_details[label]['colour_range'] = literal_eval(colour_range)
+        systems_details[label] = {'bands_zp': dict(zip(system.get_bands(), system.get_zero_points())),
+                                  **_load_colour_equation(label)}
     return systems_details
 
 
-def __create_rows(single_system_df, system, colour_band_0, colour_band_1, systems_details):
-    """
-    Create output rows for a systems.
-    """
-    new_system_rows = [__generate_output_row(row, system, colour_band_0, colour_band_1, systems_details) for row in
-                       single_system_df.to_dict('records')]
-    return pd.DataFrame(new_system_rows)
-
-
 def _generate_output_df(input_synthetic_photometry, systems_details, disable_info=False):
     __FUNCTION_KEY = 'colour_eq'
     synth_phot_df = input_synthetic_photometry.copy()
-    column_names = synth_phot_df.columns
     # Extract columns corresponding to one system
     system_keys = systems_details.keys()
     for label in tqdm(system_keys, desc=pbar_message[__FUNCTION_KEY], total=len(system_keys),
                       unit=pbar_units[__FUNCTION_KEY], colour=pbar_colour, leave=False, disable=disable_info,
                       file=stdout):
-        filter_to_correct = systems_details[label]['filter']
         colour_band_0, colour_band_1 = _get_colour_bands(systems_details[label]['colour_index'])
-        system_columns_with_colour = [column for column in column_names if column.startswith(f'{label}_') and
-                                      column.endswith((f'_{filter_to_correct}', f'_{colour_band_0}',
-                                                       f'_{colour_band_1}'))]
-        single_system_df = synth_phot_df[system_columns_with_colour]
-        corrected_system_df = __create_rows(single_system_df, label, colour_band_0, colour_band_1, systems_details)
-        columns_to_correct = corrected_system_df.columns
-        synth_phot_df[columns_to_correct] = corrected_system_df[columns_to_correct]
+        bands = [systems_details[label]['filter'], colour_band_0, colour_band_1]
+        system_columns = [f'{label}_{variable}_{band}' for band in bands for variable in ['mag', 'flux', 'flux_error']]
+        missing_columns = [column for column in system_columns if column not in synth_phot_df.columns]
+        if missing_columns:
+            __raise_key_error(missing_columns[0])
+        data = {column: synth_phot_df[column].to_numpy(dtype=np.float64) for column in system_columns}
+        corrected_columns = _correct_system(data, label, colour_band_0, colour_band_1, systems_details)
+        for column, values in corrected_columns.items():
+            synth_phot_df[column] = values
     return synth_phot_df
 
 
-def __generate_output_row(row, system_label, colour_band_0, colour_band_1, systems_details):
+def _apply_colour_equation_to_arrays(photometry):
+    """
+    Apply the available colour equations to a synthetic photometry stored in arrays. The photometry is modified in
+        place. This is the version of _apply_colour_equation used by the generator.
+
+    Args:
+        photometry (SyntheticPhotometryArrays): Synthetic photometry in one or more photometric systems. The systems
+            whose photometry does not include the filter corrected by their colour equation are not modified.
+    """
+    systems_details = __fill_systems_details(__get_systems_to_correct(photometry.photometric_system))
+    for label, details in systems_details.items():
+        if details['filter'] not in photometry.bands[photometry.get_system_index(label)]:
+            continue
+        colour_band_0, colour_band_1 = _get_colour_bands(details['colour_index'])
+        data = {f'{label}_{variable}_{band}': photometry.get_column(label, variable, band).astype(np.float64)
+                for band in [details['filter'], colour_band_0, colour_band_1] for variable in
+                ['mag', 'flux', 'flux_error']}
+        corrected_columns = _correct_system(data, label, colour_band_0, colour_band_1, systems_details)
+        for variable in ['mag', 'flux', 'flux_error']:
+            photometry.set_column(label, variable, details['filter'],
+                                  corrected_columns[f'{label}_{variable}_{details["filter"]}'])
+
+
+def _get_colour_equation_bands(photometric_system, bands):
+    """
+    Get the bands of a photometric system required to apply its colour equation to the photometry in some of its bands.
+
+    Args:
+        photometric_system (PhotometricSystem): The photometric system.
+        bands (list): The bands of the photometry.
+
+    Returns:
+        list: The given bands, followed by the bands of the colour index if the filter corrected by the colour equation
+            is one of them.
+    """
+    if not __get_systems_to_correct([photometric_system]):
+        return list(bands)
+    colour_equation = _load_colour_equation(photometric_system.get_system_label())
+    if colour_equation['filter'] not in bands:
+        return list(bands)
+    return list(bands) + [band for band in _get_colour_bands(colour_equation['colour_index']) if band not in bands]
+
+
+def _correct_system(data, system_label, colour_band_0, colour_band_1, systems_details):
+    """
+    Apply the colour equation of a photometric system to all the sources at once.
+
+    Args:
+        data (dict): A dictionary containing one array per column of the system.
+        system_label (str): Label of the photometric system.
+        colour_band_0 (str): First band of the colour index.
+        colour_band_1 (str): Second band of the colour index.
+        systems_details (dict): A dictionary containing the details of the systems to correct.
+
+    Returns:
+        dict: A dictionary containing the corrected magnitude, flux and flux error columns of the corrected filter.
+    """
     filter_to_correct = systems_details[system_label]['filter']
-    mag = row[f'{system_label}_mag_{filter_to_correct}']
-    mag_err = __compute_mag_error(row, filter_to_correct, system_label)
-    mag_colour_0 = row[f'{system_label}_mag_{colour_band_0}']
-    mag_colour_1 = row[f'{system_label}_mag_{colour_band_1}']
+    mag = data[f'{system_label}_mag_{filter_to_correct}']
+    mag_err = __compute_mag_error(data, filter_to_correct, system_label)
+    mag_colour_0 = data[f'{system_label}_mag_{colour_band_0}']
+    mag_colour_1 = data[f'{system_label}_mag_{colour_band_1}']
     colour = mag_colour_0 - mag_colour_1
     # Output corrected magnitude
     corrected_magnitude = mag + _get_correction(systems_details, colour, system_label)
     # Propagated colour error
-    mag_err_1 = __compute_mag_error(row, colour_band_0, system_label)
-    mag_err_2 = __compute_mag_error(row, colour_band_1, system_label)
-    colour_err = math.sqrt(mag_err_1 ** 2 + mag_err_2 ** 2)
-    correction_err = colour_err * abs(systems_details[system_label]['derivative'](colour))
+    mag_err_1 = __compute_mag_error(data, colour_band_0, system_label)
+    mag_err_2 = __compute_mag_error(data, colour_band_1, system_label)
+    colour_err = np.sqrt(mag_err_1 ** 2 + mag_err_2 ** 2)
+    correction_err = colour_err * np.abs(systems_details[system_label]['derivative'](colour))
     # Total error on corrected magnitude
-    out_err = math.sqrt(mag_err ** 2 + correction_err ** 2)
-    new_row = dict()
-    new_row[f'{system_label}_mag_{filter_to_correct}'] = corrected_magnitude
+    out_err = np.sqrt(mag_err ** 2 + correction_err ** 2)
     zp = systems_details[system_label]['bands_zp'][filter_to_correct]
     out_flux = 10 ** (-0.4 * (corrected_magnitude - zp))
     out_flux_err = out_err * out_flux * math.log(10) / 2.5
-    new_row[f'{system_label}_flux_{filter_to_correct}'] = out_flux
-    new_row[f'{system_label}_flux_error_{filter_to_correct}'] = out_flux_err
-    return new_row
+    return {f'{system_label}_mag_{filter_to_correct}': corrected_magnitude,
+            f'{system_label}_flux_{filter_to_correct}': out_flux,
+            f'{system_label}_flux_error_{filter_to_correct}': out_flux_err}
 
 
 def _get_colour_bands(colour_index):
@@ -158,56 +220,37 @@ def _get_colour_bands(colour_index):
     return colour_band_0, colour_band_1
 
 
-def _set_colour_limit(colour, colour_range):
+def _get_colour_limit(colour, colour_range):
     """
-    Set the colour limit to either the minimum or maximum value in the given colour range.
+    Get the closest value to the colour in the given colour range.
 
     Args:
-        colour (float): The colour value.
+        colour (ndarray): The colour values.
         colour_range (list): A list of two values representing the minimum and maximum allowed values for the colour.
 
     Returns:
-        float: The minimum or maximum value in the colour range, whichever is closest to the input `colour` value.
+        ndarray: The colours clipped to the colour range. NaN colours are kept.
+    """
+    return np.clip(colour, min(colour_range), max(colour_range))
 
-    Raises:
-        ValueError: If the input `colour` value is not within the specified `colour_range`.
+
+def _get_correction(systems_details: dict, colour: np.ndarray, system_label: str):
+    """
+    Evaluate the colour equation of a photometric system. Outside the colour range, the equation is extrapolated
+        linearly from the closest limit of the range.
+
+    Args:
+        systems_details (dict): A dictionary containing the details of the systems to correct.
+        colour (ndarray): The colour values.
+        system_label (str): Label of the photometric system.
+
+    Returns:
+        ndarray: The correction of each colour, NaN where the colour is NaN.
     """
-    if colour < min(colour_range):
-        colour_limit = min(colour_range)
-    elif colour > max(colour_range):
-        colour_limit = max(colour_range)
-    else:
-        raise ValueError(
-            'The condition for one of the previous statements must be True. Error in colour or colour_range.')
-    return colour_limit
-
-
-def _generate_polynomial(colour, colour_limit, system_polyfunc):
-    v = system_polyfunc(colour_limit)
-    m = system_polyfunc.deriv()(colour_limit)
-    return v + m * (colour - colour_limit)
-
-
-# Replaces Java 'contains'
-def _is_in_range(colour: float, colour_range: list):
-    return min(colour_range) <= colour <= max(colour_range)
-
-
-def _get_correction(systems_details: dict, colour: float, system_label: str):
-    colour_range = systems_details[system_label]['colour_range']
-    polyfunc = systems_details[system_label]['polyfunc']
-    # Check whether colour is nan
-    if math.isnan(colour):
-        return np.nan
-    # Check if in range after being sure that colour is not nan
-    in_range = _is_in_range(colour, colour_range)
-    if in_range:
-        return polyfunc(colour)
-    elif not in_range:
-        colour_limit = _set_colour_limit(colour, colour_range)
-        return _generate_polynomial(colour, colour_limit, polyfunc)
-    else:
-        raise ValueError('At least one variable does not comply with any of the previous statements.')
+    colour_limit = _get_colour_limit(colour, systems_details[system_label]['colour_range'])
+    # Inside the range the colour is its own limit and the linear term vanishes
+    return systems_details[system_label]['polyfunc'](colour_limit) + systems_details[system_label]['derivative'](
+        colour_limit) * (colour - colour_limit)
 
 
 def __get_systems_to_correct(systems: Union[list, PhotometricSystem]) -> list:
@@ -4,35 +4,48 @@ converter.py
 Module for the converter functionality.
 """
 
+from concurrent.futures import Executor
+from itertools import chain
 from numbers import Number
 from pathlib import Path
 from sys import stdout
-from typing import Union, Optional
+from typing import Iterator, Optional, Union
 
 import numpy as np
 import pandas as pd
+from scipy.sparse import csr_array, issparse
 from tqdm import tqdm
 
-from gaiaxpy.core.generic_functions import cast_output, validate_pwl_sampling, format_sampled_output
+from gaiaxpy.core.design_matrix_cache import design_matrix_cache
+from gaiaxpy.core.generic_functions import cast_output, collect_sampling_results, get_sampling_output_file, \
+    parse_dtype, parse_outputs, parse_samplings, validate_correlation_format, validate_pwl_sampling, \
+    validate_return_type, validate_spectra_outputs
 from gaiaxpy.core.generic_variables import pbar_colour, pbar_units, pbar_message
+from gaiaxpy.core.parallel import concat_chunks, map_chunks, use_workers, validate_parallel_arguments
 from gaiaxpy.core.satellite import BANDS
 from gaiaxpy.input_reader.input_reader import InputReader
+from gaiaxpy.output.output_data import validate_append_format
 from gaiaxpy.output.sampled_spectra_data import SampledSpectraData
 from gaiaxpy.spectrum.sampled_basis_functions import SampledBasisFunctions
-from gaiaxpy.spectrum.xp_continuous_spectrum import XpContinuousSpectrum
+from gaiaxpy.spectrum.sampled_spectra_arrays import SampledSpectraArrays
 from gaiaxpy.spectrum.xp_sampled_spectrum import XpSampledSpectrum
+from gaiaxpy.spectrum.xp_spectra_batch import get_batches
 from .config import parse_config, get_bands_config
 from ..config.paths import hermite_bases_file
-from ..core.input_validator import validate_save_arguments
+from ..core.input_validator import validate_chunk_size, validate_save_arguments
 
 __FUNCTION_KEY = 'converter'
+_OUTPUTS = ('flux', 'flux_error')
 
 
 def convert(input_object: Union[list, Path, pd.DataFrame, str],
-            sampling: Optional[np.ndarray] = np.linspace(0, 60, 600),
+            sampling: Optional[Union[np.ndarray, list, dict]] = np.linspace(0, 60, 600),
             truncation: bool = False, with_correlation: bool = False, output_path: Union[Path, str] = '.',
             output_file: str = 'output_spectra', output_format: str = None, save_file: bool = True,
-            username: str = None, password: str = None) -> (pd.DataFrame, np.ndarray):
+            username: str = None, password: str = None, correlation_format: str = 'matrix',
+            correlation_bandwidth: int = None, dtype: str = 'float64', n_workers: int = None,
+            executor: Executor = None, return_type: str = 'dataframe',
+            outputs: Optional[Union[set, list, str]] = None) -> (pd.DataFrame, np.ndarray):
     """
     Conversion utility: converts the input internally calibrated mean spectra from the continuous representation to a
         sampled form. The sampling grid can be defined by the user, alternatively a default will be adopted. Optionally,
@@ -42,7 +55,10 @@ def convert(input_object: Union[list, Path, pd.DataFrame, str],
     Args:
         input_object (list/Path/pd.DataFrame/str): Path to the file containing the mean spectra as downloaded from the
             Archive in their continuous representation, a list of sources ids (string or long), or a pandas DataFrame.
-        sampling (ndarray): 1D array containing the desired sampling in pseudo-wavelengths.
+        sampling (ndarray/list/dict): 1D array containing the desired sampling in pseudo-wavelengths. A list or a
+            dictionary of arrays can also be given to convert the spectra onto several sampling grids at once. The input
+            is then read and parsed only once, and one output is returned (and saved, adding the position in the list
+            or the key in the dictionary as a suffix to the output file name) per grid.
         truncation (bool): Toggle truncation of the set of bases. The level of truncation to be applied is defined by
             the recommended value in the input files.
         with_correlation (bool): Whether correlation information should be generated.
@@ -53,25 +69,57 @@ def convert(input_object: Union[list, Path, pd.DataFrame, str],
         save_file (bool): Whether to save the output in a file. If false, output_format and output_file will be ignored.
         username (str): Cosmos username, only suggested when input_object is a list or ADQL query.
         password (str): Cosmos password, only suggested when input_object is a list or ADQL query.
+        correlation_format (str): Representation of the correlation information when with_correlation is True. If
+            'matrix', the lower triangle of the correlation matrix is stored in the column 'correlation'. If 'factor',
+            a 2D array F of shape (n_bases, n_samples) such that the covariance matrix is F.T @ F is stored in the
+            column 'covariance_factor' (see covariance_from_factor and correlation_from_factor).
+        correlation_bandwidth (int): If given, only the correlations between samples closer than this number of samples
+            are computed. They are stored in the column 'banded_correlation' as a 2D array of shape
+            (correlation_bandwidth, n_samples) where element [d - 1, i] is the correlation between samples i + d and i
+            (see correlation_from_band). Only valid when correlation_format is 'matrix'.
+        dtype (str/type): Floating point type used to compute and store the output, either 'float64' or 'float32'.
+            Single precision halves the memory and storage required. The difference with respect to double precision
+            is of the order of 1e-6 for fluxes (relative to the maximum flux of each spectrum), errors (relative to
+            each error) and correlations.
+        n_workers (int): Number of worker processes used to sample the spectra. The sources are split in chunks that
+            are processed in parallel, and the output keeps the order of the input. By default, the spectra are sampled
+            in the current process.
+        executor (Executor): Executor (e.g.: a concurrent.futures.ProcessPoolExecutor) used to process the chunks
+            instead of creating a new pool of n_workers processes. If given, n_workers is only used to decide the number
+            of chunks.
+        return_type (str): Either 'dataframe' or 'arrays'. If 'arrays', the spectra are returned in a
+            SampledSpectraArrays, which stores the values of all spectra in contiguous arrays with one row per spectrum
+            (and the sampling) instead of one array per cell of a DataFrame.
+        outputs (str/list/set): Quantities included in the output spectra, 'flux' and optionally 'flux_error'. By
+            default, both are included. If the errors are not requested, the covariance of the coefficients is not
+            propagated to the sampled spectra, which is most of the computation, and the column 'flux_error' is left
+            out. Correlation information can only be generated together with the errors.
 
     Returns:
         (tuple): tuple containing:
             DataFrame: The values for all sampled spectra.
             ndarray: The sampling used to convert the input spectra (user-provided or default).
+        If return_type is 'arrays', a SampledSpectraArrays is returned instead of the tuple. If a list or a dictionary
+            of samplings is given, a list or a dictionary (with the same keys) of such outputs is returned instead.
 
     Raises:
-        ValueError: If the sampling is out of the expected boundaries.
+        ValueError: If the sampling is out of the expected boundaries, or if the outputs are not valid.
     """
     return _convert(input_object=input_object, sampling=sampling, truncation=truncation,
                     with_correlation=with_correlation, output_path=output_path, output_file=output_file,
-                    output_format=output_format, save_file=save_file, username=username, password=password)
+                    output_format=output_format, save_file=save_file, username=username, password=password,
+                    correlation_format=correlation_format, correlation_bandwidth=correlation_bandwidth, dtype=dtype,
+                    n_workers=n_workers, executor=executor, return_type=return_type, outputs=outputs)
 
 
-def _convert(input_object: Union[list, Path, str], sampling: np.ndarray = np.linspace(0, 60, 600),
+def _convert(input_object: Union[list, Path, str],
+             sampling: Union[np.ndarray, list, dict] = np.linspace(0, 60, 600),
              truncation: bool = False, with_correlation: bool = False, output_path: Union[Path, str] = '.',
              output_file: str = 'output_spectra', output_format: str = None, save_file: bool = True,
-             username: str = None, password: str = None, disable_info: bool = False, config_file=hermite_bases_file) \
-        -> (pd.DataFrame, np.ndarray):
+             username: str = None, password: str = None, disable_info: bool = False, config_file=hermite_bases_file,
+             correlation_format: str = 'matrix', correlation_bandwidth: int = None, dtype: str = 'float64',
+             n_workers: int = None, executor: Executor = None, return_type: str = 'dataframe',
+             outputs: Optional[Union[set, list, str]] = None) -> (pd.DataFrame, np.ndarray):
     """
     Internal method of the calibration utility. Refer to "convert".
 
@@ -86,88 +134,298 @@ def _convert(input_object: Union[list, Path, str], sampling: np.ndarray = np.lin
         ValueError: If the sampling is out of the expected boundaries.
     """
     function = convert
-    validate_pwl_sampling(sampling)
+    samplings, sampling_keys = parse_samplings(sampling)
+    for grid in samplings:
+        validate_pwl_sampling(grid)
+    validate_correlation_format(correlation_format, correlation_bandwidth)
+    validate_parallel_arguments(n_workers, executor)
+    validate_return_type(return_type)
+    outputs = parse_outputs(outputs, _OUTPUTS)
+    validate_spectra_outputs(outputs, with_correlation)
+    dtype = parse_dtype(dtype)
     validate_save_arguments(function.__defaults__[4], output_file, function.__defaults__[5], output_format, save_file)
     parsed_input_data, extension = InputReader(input_object, convert, truncation=truncation, disable_info=disable_info,
                                                user=username, password=password).read()
-    bases_config = parse_config(config_file)
-    design_matrices = get_design_matrices(sampling, bases_config)
-    spectra_df, positions = _create_spectra(parsed_input_data, truncation, design_matrices,
-                                            with_correlation=with_correlation, disable_info=disable_info)
+    design_matrices_list = _get_cached_design_matrices_list(samplings, config_file)
+    if use_workers(n_workers, executor):
+        results = map_chunks(_create_spectra_in_worker, parsed_input_data, n_workers=n_workers, executor=executor,
+                             initializer=_get_cached_design_matrices_list, initargs=(samplings, config_file),
+                             samplings=samplings, config_file=config_file, truncation=truncation,
+                             with_correlation=with_correlation, correlation_format=correlation_format,
+                             correlation_bandwidth=correlation_bandwidth, dtype=dtype, return_type=return_type,
+                             with_error='flux_error' in outputs)
+        concatenate = SampledSpectraArrays.concatenate if return_type == 'arrays' else concat_chunks
+        spectra_list = [(concatenate([chunk[index][0] for chunk in results]), results[0][index][1]) for index in
+                        range(len(samplings))]
+    else:
+        # The coefficients and covariances are stacked once and sampled on each grid
+        batches = get_batches(parsed_input_data, truncation=truncation, dtype=dtype)
+        spectra_list = [_create_spectra(parsed_input_data, truncation, design_matrices,
+                                        with_correlation=with_correlation, disable_info=disable_info,
+                                        correlation_format=correlation_format,
+                                        correlation_bandwidth=correlation_bandwidth, dtype=dtype, batches=batches,
+                                        return_type=return_type, with_error='flux_error' in outputs)
+                        for design_matrices in design_matrices_list]
     # Save output section
-    output_data = SampledSpectraData(spectra_df, positions)
-    output_data.data = cast_output(output_data)
-    output_data.save(save_file, output_path, output_file, output_format, extension)
-    return output_data.data, positions
-
-
-def _create_spectrum(row: pd.Series, truncation: bool, design_matrices: dict, band: str,
-                     with_correlation: bool = False) -> XpSampledSpectrum:
+    results = []
+    for (spectra, positions), key in zip(spectra_list, sampling_keys or [None]):
+        if return_type == 'arrays':
+            spectra.source_id = spectra.source_id.astype(np.int64)
+            results.append(spectra)
+            # The spectra are only split into one array per cell when they have to be saved
+            spectra = spectra.to_data_frame() if save_file else None
+        if spectra is not None:
+            output_data = SampledSpectraData(spectra, positions)
+            output_data.data = cast_output(output_data)
+            output_data.save(save_file, output_path, get_sampling_output_file(output_file, key), output_format,
+                             extension)
+            if return_type == 'dataframe':
+                results.append((output_data.data, positions))
+    return collect_sampling_results(results, sampling, sampling_keys)
+
+
+def convert_iter(input_object: Union[list, Path, pd.DataFrame, str],
+                 sampling: Optional[np.ndarray] = np.linspace(0, 60, 600), truncation: bool = False,
+                 with_correlation: bool = False, output_path: Union[Path, str] = '.',
+                 output_file: str = 'output_spectra', output_format: str = None, save_file: bool = True,
+                 username: str = None, password: str = None, correlation_format: str = 'matrix',
+                 correlation_bandwidth: int = None, dtype: str = 'float64', chunk_size: int = 1000,
+                 outputs: Optional[Union[set, list, str]] = None) -> Iterator[tuple]:
     """
-    Create a single sampled spectrum from the input continuously-represented mean spectrum and design matrix.
+    Chunked version of the conversion utility (refer to "convert"). The input is read and converted in chunks of at most
+        chunk_size sources, so that the memory required depends on the chunk size rather than on the size of the input.
+        AVRO and CSV/ECSV files are read incrementally. If save_file is True, the spectra of each chunk are appended to
+        the output file as soon as they are computed, which is only possible for AVRO, CSV and ECSV outputs.
 
     Args:
-        row (pd.Series): Single row in a DataFrame containing the entry for one source in the mean spectra file.
-            This will include columns for both bands (although one could be missing).
+        input_object (list/Path/pd.DataFrame/str): Path to the file containing the mean spectra as downloaded from the
+            Archive in their continuous representation, a list of sources ids (string or long), or a pandas DataFrame.
+        sampling (ndarray): 1D array containing the desired sampling in pseudo-wavelengths.
         truncation (bool): Toggle truncation of the set of bases. The level of truncation to be applied is defined by
             the recommended value in the input files.
-        design_matrices (dict): 2D array containing the basis functions sampled on the pseudo-wavelength grid (either
-            user-defined or default).
-        band (str): bp/rp band.
         with_correlation (bool): Whether correlation information should be generated.
+        output_path (Path/str): Path where to save the output data.
+        output_file (str): Name of the output file without extension (e.g. 'my_file').
+        output_format (str): Desired output format. If no format is given, the output file format will be the same as
+            the input file (e.g. 'csv').
+        save_file (bool): Whether to save the output in a file. If false, output_format and output_file will be ignored.
+        username (str): Cosmos username, only suggested when input_object is a list or ADQL query.
+        password (str): Cosmos password, only suggested when input_object is a list or ADQL query.
+        correlation_format (str): Representation of the correlation information (refer to "convert").
+        correlation_bandwidth (int): Number of samples for which correlations are computed (refer to "convert").
+        dtype (str/type): Floating point type used to compute and store the output, either 'float64' or 'float32'.
+        chunk_size (int): Maximum number of sources converted at once.
+        outputs (str/list/set): Quantities included in the output spectra (refer to "convert").
 
     Returns:
-        XpSampledSpectrum: The sampled spectrum.
+        generator: Generator of tuples, one per chunk, containing:
+            DataFrame: The values for the sampled spectra in the chunk.
+            ndarray: The sampling used to convert the input spectra (user-provided or default).
+
+    Raises:
+        ValueError: If the sampling is out of the expected boundaries, if the outputs are not valid, or if save_file is
+            True and the output format does not allow appending data to an existing file.
+    """
+    return _convert_iter(input_object=input_object, sampling=sampling, truncation=truncation,
+                         with_correlation=with_correlation, output_path=output_path, output_file=output_file,
+                         output_format=output_format, save_file=save_file, username=username, password=password,
+                         correlation_format=correlation_format, correlation_bandwidth=correlation_bandwidth,
+                         dtype=dtype, chunk_size=chunk_size, outputs=outputs)
+
+
+def _convert_iter(input_object: Union[list, Path, str], sampling: np.ndarray = np.linspace(0, 60, 600),
+                  truncation: bool = False, with_correlation: bool = False, output_path: Union[Path, str] = '.',
+                  output_file: str = 'output_spectra', output_format: str = None, save_file: bool = True,
+                  username: str = None, password: str = None, disable_info: bool = False,
+                  config_file=hermite_bases_file, correlation_format: str = 'matrix', correlation_bandwidth: int = None,
+                  dtype: str = 'float64', chunk_size: int = 1000,
+                  outputs: Optional[Union[set, list, str]] = None) -> Iterator[tuple]:
     """
-    recommended_truncation = row[f'{band}_n_relevant_bases'] if truncation else -1
-    continuous_spectrum = XpContinuousSpectrum(row['source_id'], band, row[f'{band}_coefficients'],
-                                               row[f'{band}_covariance_matrix'], row[f'{band}_standard_deviation'])
-    return XpSampledSpectrum.from_continuous(continuous_spectrum, design_matrices.get(band),
-                                             truncation=recommended_truncation, with_correlation=with_correlation)
+    Internal method of the chunked conversion utility. Refer to "convert_iter".
+
+    Args:
+        disable_info (bool): Whether to disable the progress tracker.
+
+    Returns:
+        generator: Generator of tuples containing the spectra in each chunk and the sampling.
+    """
+    function = convert
+    validate_pwl_sampling(sampling)
+    validate_correlation_format(correlation_format, correlation_bandwidth)
+    validate_chunk_size(chunk_size)
+    outputs = parse_outputs(outputs, _OUTPUTS)
+    validate_spectra_outputs(outputs, with_correlation)
+    dtype = parse_dtype(dtype)
+    validate_save_arguments(function.__defaults__[4], output_file, function.__defaults__[5], output_format, save_file)
+    chunks = InputReader(input_object, convert, truncation=truncation, disable_info=disable_info, user=username,
+                         password=password).read_chunks(chunk_size)
+    design_matrices = _get_cached_design_matrices(sampling, config_file)
+    for index, (parsed_input_data, extension) in enumerate(chunks):
+        if save_file and index == 0:
+            validate_append_format(output_format if output_format else extension)
+        spectra_df, positions = _create_spectra(parsed_input_data, truncation, design_matrices,
+                                                with_correlation=with_correlation, disable_info=disable_info,
+                                                correlation_format=correlation_format,
+                                                correlation_bandwidth=correlation_bandwidth, dtype=dtype,
+                                                with_error='flux_error' in outputs)
+        output_data = SampledSpectraData(spectra_df, positions)
+        output_data.data = cast_output(output_data)
+        output_data.save(save_file, output_path, output_file, output_format, extension, append=index > 0)
+        yield output_data.data, positions
 
 
 def _create_spectra(parsed_input_data: pd.DataFrame, truncation: bool, design_matrices: dict,
-                    with_correlation: bool = False, disable_info=False) -> tuple:
+                    with_correlation: bool = False, disable_info: bool = False,
+                    correlation_format: str = 'matrix', correlation_bandwidth: int = None,
+                    dtype: np.dtype = np.float64, batches: dict = None, return_type: str = 'dataframe',
+                    with_error: bool = True) -> tuple:
     """
-    Creates a spectra dataframe from parsed input data and given parameters.
+    Creates a spectra dataframe from parsed input data sampling all the spectra in each band at once. The coefficients
+        of all sources are stacked into a single array so that fluxes are computed with one matrix product per band and
+        errors with one batched product over the stacked covariances. When truncation is applied, sources are grouped by
+        their recommended number of bases and each group is sampled with the corresponding truncated design matrix. The
+        output is the same as the one obtained creating an XpSampledSpectrum per source and band.
 
     Args:
         parsed_input_data (pd.DataFrame): The parsed input data to create the spectra from.
         truncation (bool): Toggle truncation of the set of bases. The level of truncation to be applied is defined by
             the recommended value in the input files.
         design_matrices (dict): The design matrices for the input list of bases.
-        with_correlation (bool): Whether to include the covariance matrix in the spectra. Default is False.
+        with_correlation (bool): Whether to include the correlation matrix in the spectra. Default is False.
+        disable_info (bool): Whether to disable the progress tracker.
+        correlation_format (str): Either 'matrix' (lower triangle of the correlation matrix) or 'factor' (covariance
+            factor).
+        correlation_bandwidth (int): If given, only the correlations between samples closer than this number of samples
+            are computed.
+        dtype (dtype): Floating point type used to compute and store the output.
+        batches (dict): The batch of each band (see get_batches). If given, truncation and dtype are ignored, which
+            allows sampling the same batches on several grids.
+        return_type (str): Either 'dataframe' or 'arrays'.
+        with_error (bool): Whether to propagate the covariances to compute the flux errors. If False, the output has no
+            flux errors.
 
     Returns:
         (tuple): tuple containing:
-            DataFrame: The output spectra.
+            DataFrame/SampledSpectraArrays: The output spectra.
             ndarray: The sampling used to convert the input spectra (user-provided or default).
     """
 
-    def create_xp_spectra(row, _truncation, _design_matrices, _with_correlation=False):
-        """
-        Creates bp and rp spectra for a single row of parsed input data.
+    def rows_to_list(blocks, valid):
+        return [value if is_valid else None for value, is_valid in zip(chain.from_iterable(blocks), valid)]
+
+    def interleave(band_values):
+        output = [None] * (len(parsed_input_data) * len(BANDS))
+        for i, band in enumerate(BANDS):
+            output[i::len(BANDS)] = band_values[band]
+        return output
+
+    def interleave_arrays(band_blocks, band_valid=None):
+        # Rows of the same source are consecutive, first BP then RP
+        values = np.stack([np.concatenate(band_blocks[band]) for band in BANDS], axis=1)
+        values = values.reshape((-1,) + values.shape[2:])
+        if band_valid is not None:
+            values[~np.stack([band_valid[band] for band in BANDS], axis=1).ravel()] = np.nan
+        return values
+
+    n_sources = len(parsed_input_data)
+    positions = design_matrices[BANDS.bp].get_sampling_grid()
+    batches = batches if batches is not None else get_batches(parsed_input_data, truncation=truncation, dtype=dtype)
+    fluxes, errors, correlations, standard_deviations = dict(), dict(), dict(), dict()
+    available = {band: batches[band].available for band in BANDS}
+    has_covariance = {band: batches[band].has_covariance for band in BANDS}
+    with tqdm(total=n_sources * len(BANDS), desc=pbar_message[__FUNCTION_KEY], unit=pbar_units[__FUNCTION_KEY],
+              leave=False, colour=pbar_colour, disable=disable_info, file=stdout) as progress_bar:
+        for band in BANDS:
+            batch = batches[band]
+            design_matrix = design_matrices[band].get_design_matrix()
+            n_bases, n_samples = design_matrix.shape
+            fluxes[band] = [batch.sample_flux(design_matrix)]
+            errors[band], correlations[band] = [], []
+            row_size = n_samples * (n_samples + n_bases) if with_correlation else n_samples * n_bases
+            if with_correlation and correlation_bandwidth:
+                row_size = n_samples * (2 * n_bases + correlation_bandwidth)
+            for rows in batch.get_blocks(row_size):
+                if with_error:
+                    errors[band].append(batch.sample_error(design_matrix, rows))
+                if with_correlation and correlation_format == 'factor':
+                    correlations[band].append(batch.sample_covariance_factor(design_matrix, rows))
+                elif with_correlation and correlation_bandwidth:
+                    correlations[band].append(batch.sample_correlation_band(design_matrix, correlation_bandwidth,
+                                                                            rows))
+                elif with_correlation:
+                    correlations[band].append(batch.sample_correlation(design_matrix, rows))
+                progress_bar.update(rows.stop - rows.start)
+            standard_deviations[band] = [batch.standard_deviations]
+    source_ids = np.repeat(parsed_input_data['source_id'].to_numpy(), len(BANDS))
+    correlation_column = 'covariance_factor' if correlation_format == 'factor' else \
+        'banded_correlation' if correlation_bandwidth else 'correlation'
+    if return_type == 'arrays':
+        spectra = SampledSpectraArrays(source_ids, interleave_arrays(fluxes, available),
+                                       interleave_arrays(errors, has_covariance) if with_error else None, positions,
+                                       XpSampledSpectrum, xp=np.array([band.upper() for band in BANDS] * n_sources))
+        if with_correlation:
+            spectra.correlation = interleave_arrays(correlations, has_covariance)
+            spectra.correlation_type = correlation_column
+            spectra.standard_deviation = interleave_arrays(standard_deviations)
+        return spectra, positions
+    spectra_dict = {'source_id': source_ids, 'xp': [band.upper() for band in BANDS] * n_sources,
+                    'flux': interleave({band: rows_to_list(fluxes[band], available[band]) for band in BANDS})}
+    if with_error:
+        spectra_dict['flux_error'] = interleave({band: rows_to_list(errors[band], has_covariance[band])
+                                                 for band in BANDS})
+    if with_correlation:
+        spectra_dict[correlation_column] = interleave({band: rows_to_list(correlations[band], has_covariance[band])
+                                                       for band in BANDS})
+        spectra_dict['standard_deviation'] = interleave({band: standard_deviations[band][0] for band in BANDS})
+    spectra_df = pd.DataFrame(spectra_dict)
+    spectra_df.attrs['data_type'] = XpSampledSpectrum
+    return spectra_df, positions
+
+
+def _create_spectra_in_worker(parsed_input_data: pd.DataFrame, samplings: list, config_file: str,
+                              truncation: bool, with_correlation: bool, correlation_format: str,
+                              correlation_bandwidth: int, dtype: np.dtype, return_type: str = 'dataframe',
+                              with_error: bool = True) -> list:
+    """
+    Create the spectra of a chunk of sources in a worker process. The design matrices are taken from the design matrix
+        cache of the process, so they are only computed (or loaded from disk) once per worker.
 
-        Args:
-            row (pandas Series): A single row of parsed input data.
-            _truncation (bool): Toggle truncation of the set of bases. The level of truncation to be applied is defined
-                by the recommended value in the input files.
-            _design_matrices (dict): The design matrices for the input list of bases.
-            _with_correlation (bool): Whether to include the covariance matrix in the spectra. Default is False.
+    Args:
+        parsed_input_data (pd.DataFrame): The parsed input data of the chunk.
+        samplings (list): The sampling grids.
+        config_file (str): Path to the file containing the configuration of the bases.
+        truncation (bool): Toggle truncation of the set of bases.
+        with_correlation (bool): Whether to include the correlation information in the spectra.
+        correlation_format (str): Either 'matrix' or 'factor'.
+        correlation_bandwidth (int): If given, only the correlations between samples closer than this number of samples
+            are computed.
+        dtype (dtype): Floating point type used to compute and store the output.
+        return_type (str): Either 'dataframe' or 'arrays'.
+        with_error (bool): Whether to compute the flux errors.
 
-        Returns:
-            list: A list of spectra for the given row of parsed input data containing one element per band available.
-        """
-        return [_create_spectrum(row, _truncation, _design_matrices, band, with_correlation=_with_correlation)
-                for band in BANDS]
+    Returns:
+        list: A tuple per sampling grid containing the output spectra and the sampling used to convert them.
+    """
+    batches = get_batches(parsed_input_data, truncation=truncation, dtype=dtype)
+    return [_create_spectra(parsed_input_data, truncation, design_matrices, with_correlation=with_correlation,
+                            disable_info=True, correlation_format=correlation_format,
+                            correlation_bandwidth=correlation_bandwidth, dtype=dtype, batches=batches,
+                            return_type=return_type, with_error=with_error)
+            for design_matrices in _get_cached_design_matrices_list(samplings, config_file)]
 
-    parsed_input_data_dict = parsed_input_data.to_dict('records')
-    spectra_series = pd.Series([create_xp_spectra(row, truncation, design_matrices, with_correlation)
-                                for row in tqdm(parsed_input_data_dict, desc=pbar_message[__FUNCTION_KEY],
-                                                unit=pbar_units[__FUNCTION_KEY], leave=False, colour=pbar_colour,
-                                                disable=disable_info, file=stdout)])
-    spectra_series = spectra_series.explode()
-    return format_sampled_output(spectra_series, with_correlation=with_correlation)
+
+def _get_cached_design_matrices_list(samplings: list, config_file: str) -> list:
+    """
+    Get the design matrices for each of the sampling grids (refer to "_get_cached_design_matrices").
+
+    Args:
+        samplings (list): The sampling grids.
+        config_file (str): Path to the file containing the configuration of the bases.
+
+    Returns:
+        list: The design matrices for each sampling grid.
+    """
+    return [_get_cached_design_matrices(sampling, config_file) for sampling in samplings]
 
 
 def get_unique_basis_ids(parsed_input_data: pd.DataFrame) -> set:
@@ -191,6 +449,45 @@ def get_unique_basis_ids(parsed_input_data: pd.DataFrame) -> set:
     return remove_nans(set_bp).union(remove_nans(set_rp))
 
 
+def _get_cached_design_matrices(sampling: np.ndarray, config_file: str) -> dict:
+    """
+    Get the design matrices corresponding to the bases defined in the configuration file, reusing the ones stored in the
+        design matrix cache when the same sampling and configuration have been used before.
+
+    Args:
+        sampling (ndarray): 1D array containing the sampling grid.
+        config_file (str): Path to the file containing the configuration of the bases.
+
+    Returns:
+        dict: The design matrices for the input list of bases.
+    """
+
+    def compute_design_matrices():
+        design_matrices = get_design_matrices(sampling, parse_config(config_file))
+        arrays = dict()
+        for band in BANDS:
+            design_matrix = design_matrices[band].get_design_matrix()
+            # Sparse design matrices (spline bases) are stored through their CSR components
+            if issparse(design_matrix):
+                design_matrix = design_matrix.tocsr()
+                arrays.update({f'{band}_data': design_matrix.data, f'{band}_indices': design_matrix.indices,
+                               f'{band}_indptr': design_matrix.indptr, f'{band}_shape': np.array(design_matrix.shape)})
+            else:
+                arrays[f'{band}_design_matrix'] = design_matrix
+        return arrays
+
+    def get_design_matrix(arrays, band):
+        if f'{band}_design_matrix' in arrays:
+            return arrays[f'{band}_design_matrix']
+        return csr_array((arrays[f'{band}_data'], arrays[f'{band}_indices'], arrays[f'{band}_indptr']),
+                         shape=tuple(arrays[f'{band}_shape']))
+
+    key = design_matrix_cache.get_key(__FUNCTION_KEY, sampling, files=[config_file])
+    cached_arrays = design_matrix_cache.get(key, compute_design_matrices)
+    return {band: SampledBasisFunctions.from_design_matrix(sampling, get_design_matrix(cached_arrays, band)) for band
+            in BANDS}
+
+
 def get_design_matrices(sampling: np.ndarray, bases_config: pd.DataFrame) -> dict:
     """
     Get the design matrices corresponding to the input bases.
@@ -0,0 +1,226 @@
+"""
+design_matrix_cache.py
+====================================
+Module to cache the design matrices used to sample the continuous spectra.
+"""
+
+import hashlib
+from collections import OrderedDict
+from os import listdir, makedirs, remove, replace, stat, utime
+from os.path import join
+from threading import RLock
+
+import numpy as np
+
+_CACHE_VERSION = 1
+_EXTENSION = '.npz'
+
+
+class DesignMatrixCache(object):
+    """
+    Content-addressed cache of design matrices and related arrays. Entries are kept in memory and, if a cache directory
+        is defined, also stored on disk as .npz files so that they can be reused across sessions. Both stores are
+        bounded in size and the least recently used entries are evicted first.
+    """
+
+    def __init__(self, max_memory_size=2 ** 29, cache_dir=None, max_disk_size=2 ** 30):
+        """
+        Initialise a design matrix cache.
+
+        Args:
+            max_memory_size (int): Maximum number of bytes of the arrays kept in memory.
+            cache_dir (str): Directory where the entries are stored on disk. If None, only the memory cache is used.
+            max_disk_size (int): Maximum number of bytes of the files kept in the cache directory.
+        """
+        self.max_memory_size = max_memory_size
+        self.cache_dir = cache_dir
+        self.max_disk_size = max_disk_size
+        self._entries = OrderedDict()
+        self._memory_size = 0
+        self._file_hashes = dict()
+        self._lock = RLock()
+
+    def configure(self, max_memory_size=None, cache_dir=None, max_disk_size=None):
+        """
+        Update the configuration of the cache. Parameters set to None keep their current value.
+
+        Args:
+            max_memory_size (int): Maximum number of bytes of the arrays kept in memory.
+            cache_dir (str): Directory where the entries are stored on disk. An empty string disables the disk cache.
+            max_disk_size (int): Maximum number of bytes of the files kept in the cache directory.
+        """
+        with self._lock:
+            if max_memory_size is not None:
+                self.max_memory_size = max_memory_size
+                self._evict_memory()
+            if cache_dir is not None:
+                self.cache_dir = cache_dir if cache_dir else None
+            if max_disk_size is not None:
+                self.max_disk_size = max_disk_size
+                self._evict_disk()
+
+    def clear(self, disk=False):
+        """
+        Remove all entries from the cache.
+
+        Args:
+            disk (bool): Whether the files in the cache directory should also be removed.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._memory_size = 0
+            self._file_hashes.clear()
+            if disk:
+                for file_name in self._get_disk_files():
+                    _remove(join(self.cache_dir, file_name))
+
+    def get_key(self, label, sampling, files=(), **parameters):
+        """
+        Compute the key identifying an entry from everything that determines its content.
+
+        Args:
+            label (str): Label of the functionality requesting the entry (e.g.: 'converter').
+            sampling (ndarray): 1D array containing the sampling grid. Can be None.
+            files (iterable): Paths to the configuration files used to compute the entry. Their content (not their
+                name) is included in the key.
+            **parameters: Any other parameters used to compute the entry (e.g.: bp_model).
+
+        Returns:
+            str: Hexadecimal digest identifying the entry.
+        """
+        key = hashlib.sha256(f'{_CACHE_VERSION}:{label}'.encode())
+        if sampling is not None:
+            sampling = np.ascontiguousarray(sampling, dtype=float)
+            key.update(str(sampling.shape).encode())
+            key.update(sampling.tobytes())
+        for file in files:
+            key.update(self._get_file_hash(file).encode())
+        for name in sorted(parameters):
+            key.update(f'{name}={parameters[name]}'.encode())
+        return key.hexdigest()
+
+    def _get_file_hash(self, file):
+        # The hash of each file is reused while the file is not modified, so that files are not read on every call
+        file_stat = stat(file)
+        signature = (file_stat.st_mtime_ns, file_stat.st_size)
+        with self._lock:
+            cached_signature, file_hash = self._file_hashes.get(file, (None, None))
+            if cached_signature != signature:
+                with open(file, 'rb') as f:
+                    file_hash = hashlib.sha256(f.read()).hexdigest()
+                self._file_hashes[file] = (signature, file_hash)
+        return file_hash
+
+    def get(self, key, compute):
+        """
+        Retrieve an entry from the cache, computing and storing it if it is not available.
+
+        Args:
+            key (str): Key identifying the entry, as returned by get_key.
+            compute (function): Function with no arguments returning the entry as a dictionary of arrays.
+
+        Returns:
+            dict: Dictionary of read-only arrays.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            entry = self._load(key)
+            if entry is None:
+                entry = compute()
+                self._save(key, entry)
+            entry = {name: _to_read_only(array) for name, array in entry.items()}
+            self._entries[key] = entry
+            self._memory_size += _get_entry_size(entry)
+            self._evict_memory()
+            return entry
+
+    def _evict_memory(self):
+        # Always keep the most recent entry, even if it is larger than the limit
+        while len(self._entries) > 1 and self._memory_size > self.max_memory_size:
+            _, entry = self._entries.popitem(last=False)
+            self._memory_size -= _get_entry_size(entry)
+
+    def _get_path(self, key):
+        return join(self.cache_dir, f'{key}{_EXTENSION}')
+
+    def _get_disk_files(self):
+        if not self.cache_dir:
+            return []
+        try:
+            file_names = listdir(self.cache_dir)
+        except OSError:
+            return []
+        return [file_name for file_name in file_names if file_name.endswith(_EXTENSION)]
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._get_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as npz_file:
+                entry = {name: npz_file[name] for name in npz_file.files}
+        except (OSError, ValueError):
+            return None
+        # Mark the file as recently used. Other processes sharing the cache directory may have removed it already
+        try:
+            utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def _save(self, key, entry):
+        if not self.cache_dir:
+            return
+        try:
+            makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file first so that other processes never read a partially written file
+            temporary_path = f'{self._get_path(key)}.tmp'
+            with open(temporary_path, 'wb') as f:
+                np.savez(f, **entry)
+            replace(temporary_path, self._get_path(key))
+        except OSError:
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        files = []
+        for file_name in self._get_disk_files():
+            path = join(self.cache_dir, file_name)
+            try:
+                file_stat = stat(path)
+            except OSError:
+                # Files removed by other processes sharing the cache directory are already gone
+                continue
+            files.append((file_stat.st_mtime_ns, file_stat.st_size, path))
+        files.sort()
+        disk_size = sum(size for _, size, _ in files)
+        # Always keep the most recent file, even if it is larger than the limit
+        for _, size, path in files[:-1]:
+            if disk_size <= self.max_disk_size:
+                break
+            disk_size -= size
+            _remove(path)
+
+
+def _remove(path):
+    # Other processes sharing the cache directory may have removed the file already
+    try:
+        remove(path)
+    except OSError:
+        pass
+
+
+def _get_entry_size(entry):
+    return sum(array.nbytes for array in entry.values())
+
+
+def _to_read_only(array):
+    array = np.asarray(array)
+    array.flags.writeable = False
+    return array
+
+
+design_matrix_cache = DesignMatrixCache()
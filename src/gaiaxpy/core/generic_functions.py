@@ -60,6 +60,29 @@ def parse_band(band):
         raise InvalidBandError(band)
 
 
+def parse_dtype(dtype):
+    """
+    Parse the floating point type requested for the output.
+
+    Args:
+        dtype (str/type/dtype): Either float64 or float32, in any form accepted by NumPy (e.g.: 'float32', np.float32).
+
+    Returns:
+        dtype: The corresponding NumPy dtype.
+
+    Raises:
+        ValueError: If the type is not float64 or float32.
+    """
+    error_message = f'Wrong value for dtype: {dtype}. Accepted values are float64 and float32.'
+    try:
+        parsed_dtype = np.dtype(dtype)
+    except TypeError:
+        raise ValueError(error_message)
+    if parsed_dtype not in (np.dtype(np.float64), np.dtype(np.float32)):
+        raise ValueError(error_message)
+    return parsed_dtype
+
+
 def str_to_matrix(str_matrix):
     """
     Convert a string of the form ((1,2,3),(4,5,6),(7,8,9)) to a NumPy matrix.
@@ -109,6 +132,70 @@ def validate_pwl_sampling(sampling):
                          f'{min_sampling_value} and the maximum is {max_sampling_value}.')
 
 
+def parse_samplings(sampling):
+    """
+    Split the sampling argument of the converter and the calibrator into the sampling grids to use.
+
+    Args:
+        sampling (ndarray/list/dict): A single sampling grid, a list or tuple of grids, or a dictionary of grids. Each
+            grid can be any array-like object (e.g. a NumPy array or a list of numbers). A list or tuple of numbers is
+            a single grid.
+
+    Returns:
+        (tuple): tuple containing:
+            list: The sampling grids, as NumPy arrays when several grids are given.
+            list: The keys identifying each grid (the positions in the list or the keys in the dictionary), or None if a
+                single grid was given.
+
+    Raises:
+        ValueError: If an empty dictionary of grids is given, or if a list or tuple mixes numbers and grids.
+    """
+    if isinstance(sampling, dict):
+        if not sampling:
+            raise ValueError('The dictionary of samplings must contain at least one sampling.')
+        return [np.asarray(grid) for grid in sampling.values()], list(sampling.keys())
+    if isinstance(sampling, (list, tuple)) and sampling:
+        is_grid = [np.ndim(grid) > 0 for grid in sampling]
+        if all(is_grid):
+            return [np.asarray(grid) for grid in sampling], list(range(len(sampling)))
+        if any(is_grid):
+            raise ValueError('The sampling must be either a single grid of numbers or a list of grids, but it mixes '
+                             'numbers and grids.')
+    return [sampling], None
+
+
+def collect_sampling_results(results, sampling, keys):
+    """
+    Arrange the results obtained for each sampling grid in the same structure as the sampling argument.
+
+    Args:
+        results (list): The result obtained for each sampling grid.
+        sampling (ndarray/list/dict): The sampling argument.
+        keys (list): The keys identifying each grid, as returned by parse_samplings.
+
+    Returns:
+        object: The result itself if a single grid was given, a list of results if a list of grids was given, or a
+            dictionary of results with the same keys as the sampling argument.
+    """
+    if keys is None:
+        return results[0]
+    return dict(zip(keys, results)) if isinstance(sampling, dict) else results
+
+
+def get_sampling_output_file(output_file, key):
+    """
+    Get the name of the output file for one of the sampling grids.
+
+    Args:
+        output_file (str): Name of the output file without extension.
+        key (object): The key identifying the grid, or None if a single grid was given.
+
+    Returns:
+        str: The output file name, including the key of the grid as a suffix if several grids were given.
+    """
+    return output_file if key is None else f'{output_file}_{key}'
+
+
 def validate_wl_sampling(sampling):
     min_value = 330
     max_value = 1050
@@ -227,13 +314,160 @@ def _extract_systems_from_data(data_columns, photometric_system=None):
 def correlation_from_covariance(covariance):
     if covariance is None:
         return None
-    v = np.sqrt(np.diag(covariance))
-    outer_v = np.outer(v, v)
+    # Works both on a single matrix and on a stack of matrices (last two axes)
+    v = np.sqrt(np.diagonal(covariance, axis1=-2, axis2=-1))
+    outer_v = v[..., :, np.newaxis] * v[..., np.newaxis, :]
     correlation = covariance / outer_v
     correlation[covariance == 0] = 0
     return correlation
 
 
+def covariance_from_factor(factor: np.ndarray, rows=None, columns=None) -> np.ndarray:
+    """
+    Compute the covariance matrix (or a block of it) of a sampled spectrum from its covariance factor, as returned by
+        convert and calibrate when correlation_format is 'factor'.
+
+    Args:
+        factor (ndarray): A 2D numpy array of shape (n_factors, n_samples) such that the covariance matrix is
+            factor.T @ factor.
+        rows (slice/ndarray): Samples defining the rows of the block. All samples are used by default.
+        columns (slice/ndarray): Samples defining the columns of the block. By default, the same as the rows.
+
+    Returns:
+        ndarray: A 2D numpy array containing the requested block of the covariance matrix.
+    """
+    rows = slice(None) if rows is None else rows
+    columns = rows if columns is None else columns
+    return factor[:, rows].T @ factor[:, columns]
+
+
+def correlation_from_factor(factor: np.ndarray, rows=None, columns=None) -> np.ndarray:
+    """
+    Compute the correlation matrix (or a block of it) of a sampled spectrum from its covariance factor, as returned by
+        convert and calibrate when correlation_format is 'factor'.
+
+    Args:
+        factor (ndarray): A 2D numpy array of shape (n_factors, n_samples) such that the covariance matrix is
+            factor.T @ factor.
+        rows (slice/ndarray): Samples defining the rows of the block. All samples are used by default.
+        columns (slice/ndarray): Samples defining the columns of the block. By default, the same as the rows.
+
+    Returns:
+        ndarray: A 2D numpy array containing the requested block of the correlation matrix.
+    """
+    rows = slice(None) if rows is None else rows
+    columns = rows if columns is None else columns
+    errors = np.sqrt(np.sum(factor ** 2, axis=0))
+    covariance = covariance_from_factor(factor, rows, columns)
+    outer_errors = np.outer(errors[rows], errors[columns])
+    correlation = np.divide(covariance, outer_errors, out=np.zeros_like(covariance), where=outer_errors != 0)
+    return correlation
+
+
+def correlation_band_from_covariance_band(covariance_band: np.ndarray) -> np.ndarray:
+    """
+    Compute the banded correlation of one or more sampled spectra from their banded covariance.
+
+    Args:
+        covariance_band (ndarray): Array of shape (..., bandwidth + 1, n_samples) where element [d, i] contains the
+            covariance between samples i + d and i. The first row is the variance of each sample.
+
+    Returns:
+        ndarray: Array of shape (..., bandwidth, n_samples) where element [d - 1, i] contains the correlation between
+            samples i + d and i. Elements outside the matrix (i + d >= n_samples) are NaN.
+    """
+    bandwidth, n_samples = covariance_band.shape[-2] - 1, covariance_band.shape[-1]
+    v = np.sqrt(covariance_band[..., 0, :])
+    correlation_band = np.full(covariance_band.shape[:-2] + (bandwidth, n_samples), np.nan, dtype=covariance_band.dtype)
+    for offset in range(1, min(bandwidth, n_samples - 1) + 1):
+        covariance = covariance_band[..., offset, :n_samples - offset]
+        correlation = covariance / (v[..., offset:] * v[..., :n_samples - offset])
+        correlation[covariance == 0] = 0
+        correlation_band[..., offset - 1, :n_samples - offset] = correlation
+    return correlation_band
+
+
+def correlation_from_band(correlation_band: np.ndarray) -> np.ndarray:
+    """
+    Build the full correlation matrix of a sampled spectrum from its banded correlation, as returned by convert and
+        calibrate when correlation_bandwidth is set. Correlations outside the band are set to zero.
+
+    Args:
+        correlation_band (ndarray): A 2D numpy array of shape (bandwidth, n_samples) where element [d - 1, i] contains
+            the correlation between samples i + d and i.
+
+    Returns:
+        ndarray: A 2D numpy array of shape (n_samples, n_samples) containing the correlation matrix.
+    """
+    bandwidth, n_samples = correlation_band.shape
+    correlation = np.eye(n_samples)
+    for offset in range(1, min(bandwidth, n_samples - 1) + 1):
+        diagonal = correlation_band[offset - 1, :n_samples - offset]
+        correlation += np.diag(diagonal, k=-offset) + np.diag(diagonal, k=offset)
+    return correlation
+
+
+def validate_correlation_format(correlation_format, correlation_bandwidth=None):
+    correlation_formats = ('matrix', 'factor')
+    if correlation_format not in correlation_formats:
+        raise ValueError(f"Wrong value for correlation_format. Accepted values are {', '.join(correlation_formats)}.")
+    if correlation_bandwidth is None:
+        return
+    if isinstance(correlation_bandwidth, bool) or not isinstance(correlation_bandwidth, (int, np.integer)) or \
+            correlation_bandwidth < 1:
+        raise ValueError('Wrong value for correlation_bandwidth. It must be a positive integer or None.')
+    if correlation_format != 'matrix':
+        raise ValueError("correlation_bandwidth can only be used when correlation_format is 'matrix'.")
+
+
+def validate_return_type(return_type):
+    return_types = ('dataframe', 'arrays')
+    if return_type not in return_types:
+        raise ValueError(f"Wrong value for return_type. Accepted values are {', '.join(return_types)}.")
+
+
+def parse_outputs(outputs, valid_outputs):
+    """
+    Parse the quantities requested in the output.
+
+    Args:
+        outputs (str/list/set): Quantity or collection of quantities to compute. If None, all the valid quantities are
+            computed.
+        valid_outputs (tuple): Quantities that can be computed.
+
+    Returns:
+        set: The requested quantities.
+
+    Raises:
+        ValueError: If no quantity is requested or any of them is not valid.
+    """
+    if outputs is None:
+        return set(valid_outputs)
+    parsed_outputs = {outputs} if isinstance(outputs, str) else set(outputs)
+    if not parsed_outputs or not parsed_outputs.issubset(valid_outputs):
+        raise ValueError(f"Wrong value for outputs: {outputs}. It must be a non-empty collection of the values "
+                         f"{', '.join(valid_outputs)}.")
+    return parsed_outputs
+
+
+def validate_spectra_outputs(outputs, with_correlation):
+    """
+    Ensure that the quantities requested in the output of the converter or the calibrator can be computed.
+
+    Args:
+        outputs (set): Quantities requested (refer to parse_outputs).
+        with_correlation (bool): Whether correlation information is requested.
+
+    Raises:
+        ValueError: If the flux is not requested, or if correlation information is requested without the flux errors.
+    """
+    if 'flux' not in outputs:
+        raise ValueError("The output spectra always include the flux, 'flux' must be one of the outputs.")
+    if with_correlation and 'flux_error' not in outputs:
+        raise ValueError("Correlation information can only be computed together with the flux errors, 'flux_error' "
+                         "must be one of the outputs.")
+
+
 def correlation_to_covariance(correlation: np.ndarray, error: np.ndarray, stdev: float) -> np.ndarray:
     """
     Compute the covariance matrix from the correlation values.
@@ -585,12 +819,3 @@ def parse_config(xml_file: Union[Path, str]) -> namedtuple:
     x_root = __get_file_root(xml_file)
     outer_title = x_root.tag.split('}')[1]
     return __parse_config(x_root, outer_title=outer_title)
-
-
-def format_sampled_output(spectra_series, with_correlation):
-    positions = spectra_series.iloc[0].get_positions()
-    spectra_type = get_spectra_type(spectra_series.iloc[0])
-    spectra_series = spectra_series.map(lambda x: x.spectrum_to_dict(with_correlation))
-    spectra_df = pd.DataFrame(spectra_series.tolist())
-    spectra_df.attrs['data_type'] = spectra_type
-    return spectra_df, positions
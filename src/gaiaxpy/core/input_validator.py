@@ -3,6 +3,8 @@ input_validator.py
 ====================================
 Module to validate the input data columns, etc.
 """
+from numbers import Integral
+
 from gaiaxpy.core.generic_functions import _warning
 
 
@@ -56,6 +58,20 @@ def validate_save_arguments(default_output_file, given_output_file, default_outp
                  "to store the output of the function.")
 
 
+def validate_chunk_size(chunk_size):
+    """
+    Validate the number of sources processed at once by the chunked versions of the tools.
+
+    Args:
+        chunk_size (int): Maximum number of sources in each chunk.
+
+    Raises:
+        ValueError: If the chunk size is not a positive integer.
+    """
+    if isinstance(chunk_size, bool) or not isinstance(chunk_size, Integral) or chunk_size <= 0:
+        raise ValueError(f'The chunk size must be a positive integer. Value {chunk_size} was given.')
+
+
 def check_column_overwrite(additional_columns, required_columns):
     common_names = []
     for key, value in additional_columns.items():
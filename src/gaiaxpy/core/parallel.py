@@ -0,0 +1,100 @@
+"""
+parallel.py
+====================================
+Module to process the input sources in several worker processes.
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from math import ceil
+from numbers import Integral
+from os import cpu_count
+
+import pandas as pd
+
+# Chunks per worker. Using more than one balances the load when some chunks take longer than others.
+_CHUNKS_PER_WORKER = 4
+
+
+def validate_parallel_arguments(n_workers, executor):
+    """
+    Validate the arguments that define how the sources are distributed among worker processes.
+
+    Args:
+        n_workers (int): Number of worker processes.
+        executor (Executor): Executor provided by the user.
+
+    Raises:
+        ValueError: If the number of workers is not a positive integer or the executor is not an Executor.
+    """
+    if n_workers is not None and (isinstance(n_workers, bool) or not isinstance(n_workers, Integral) or
+                                  n_workers <= 0):
+        raise ValueError(f'The number of workers must be a positive integer. Value {n_workers} was given.')
+    if executor is not None and not isinstance(executor, Executor):
+        raise ValueError('The executor must be an instance of concurrent.futures.Executor.')
+
+
+def use_workers(n_workers, executor):
+    """
+    Tell whether the sources should be processed in worker processes.
+
+    Args:
+        n_workers (int): Number of worker processes.
+        executor (Executor): Executor provided by the user.
+
+    Returns:
+        bool: True if an executor is given or more than one worker is requested.
+    """
+    return executor is not None or (n_workers is not None and n_workers > 1)
+
+
+def map_chunks(function, data, n_workers=None, executor=None, initializer=None, initargs=(), **kwargs):
+    """
+    Split the data in chunks of consecutive rows and apply a function to each chunk in worker processes.
+
+    Args:
+        function (function): Function applied to each chunk. It receives the chunk (a DataFrame indexed from zero) as
+            first argument and kwargs as keyword arguments. It must be defined at module level so that it can be sent to
+            the workers.
+        data (DataFrame): Data to split.
+        n_workers (int): Number of worker processes. If an executor is given, it is only used to decide the number of
+            chunks. Defaults to the number of CPUs.
+        executor (Executor): Executor where the chunks are processed. If None, a ProcessPoolExecutor with n_workers
+            processes is created and shut down once all chunks are processed.
+        initializer (function): Function called once by each worker process created by this function. It is used to
+            load the data shared by all chunks. Workers of an executor provided by the user load that data when they
+            process their first chunk.
+        initargs (tuple): Arguments passed to the initializer.
+        **kwargs: Other arguments passed to the function.
+
+    Returns:
+        list: The results for each chunk, in the same order as the rows in the data.
+    """
+    n_workers = n_workers if n_workers else cpu_count() or 1
+    chunk_size = max(ceil(len(data) / (n_workers * _CHUNKS_PER_WORKER)), 1)
+    chunks = [data.iloc[start:start + chunk_size].reset_index(drop=True) for start in
+              range(0, max(len(data), 1), chunk_size)]
+    if executor is not None:
+        return _process_chunks(executor, function, chunks, kwargs)
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=initializer, initargs=initargs) as pool:
+        return _process_chunks(pool, function, chunks, kwargs)
+
+
+def _process_chunks(executor, function, chunks, kwargs):
+    futures = [executor.submit(function, chunk, **kwargs) for chunk in chunks]
+    # Results are collected in submission order, so the output does not depend on how the chunks are scheduled
+    return [future.result() for future in futures]
+
+
+def concat_chunks(dfs):
+    """
+    Concatenate the DataFrames obtained for consecutive chunks of sources.
+
+    Args:
+        dfs (list): List of DataFrames.
+
+    Returns:
+        DataFrame: A DataFrame indexed from zero with the attributes of the first DataFrame.
+    """
+    df = pd.concat(dfs, ignore_index=True)
+    df.attrs = dict(dfs[0].attrs)
+    return df
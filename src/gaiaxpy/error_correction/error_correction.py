@@ -11,7 +11,6 @@ from sys import stdout
 
 import numpy as np
 import pandas as pd
-from scipy.interpolate import interp1d
 from tqdm import tqdm
 
 from gaiaxpy.config.paths import correction_tables_path
@@ -37,50 +36,87 @@ def _read_system_table(system):
     raise FileNotFoundError(f'No correction table found for system {system}.')
 
 
-def _get_correction_array(_mag_G_values, system):
+@lru_cache(maxsize=None)
+def _load_correction_table(system):
+    """
+    Load the correction table of a system as the knots of a piecewise linear function of the G magnitude. The factors
+        are constant from the start to the centre of each bin, and change linearly from the centre to the end of the
+        bin up to the factors of the next bin. The table of each system is only read once.
+
+    Args:
+        system (str): Label of the photometric system.
+
+    Returns:
+        (tuple): tuple containing:
+            ndarray: The G magnitudes of the knots in increasing order.
+            ndarray: The correction factors at the knots, one column per error column of the system.
+    """
     correction_table = _read_system_table(system)
-    min_value, max_value = correction_table['min_Gmag_bin'].iloc[0], correction_table['max_Gmag_bin'].iloc[-1]
-    floor_mag_dict = correction_table.set_index('min_Gmag_bin').T.to_dict()
     factor_columns = [col for col in correction_table.columns if 'factor_' in col]
-    _mag_G_values = _mag_G_values.to_frame(name='mag_G')
-    _mag_G_values['row'] = _mag_G_values['mag_G'].map(lambda x: floor_mag_dict.get(float(np.floor(x))))
-    return _mag_G_values.apply(_get_correction_factor, args=(correction_table, factor_columns,
-                                                             min_value, max_value,), axis=1)
-
-
-def _get_correction_factor(mag_row, correction_table, factor_columns, min_value, max_value):
-    mag = mag_row['mag_G']
-    row = mag_row['row']
-    if (mag > max_value) or pd.isna(mag):
-        return correction_table[factor_columns].iloc[-1].values
-    elif mag < min_value:
-        return correction_table[factor_columns].iloc[0].values
-    bin_centre = row['bin_centre']
-    factors = np.array([row[factor] for factor in factor_columns])
-    if mag <= bin_centre:
-        return factors
-    range_row_max_Gmag_bin = row['max_Gmag_bin']
-    if bin_centre < mag < range_row_max_Gmag_bin:
-        try:
-            next_range_row = correction_table[correction_table['min_Gmag_bin'] == range_row_max_Gmag_bin].iloc[0]
-            next_factors = next_range_row[factor_columns]
-        except IndexError:
-            return factors
-        return interp1d(np.array([bin_centre, range_row_max_Gmag_bin]), np.vstack([factors, next_factors]), axis=0)(mag)
-    # Raise an exception if none of the conditions match
-    raise ValueError('Check the variables being used. The program should never fall in this case.')
-
-
-def _correct_system(system_df, correction_array):
-    # Extract error columns
-    error_df = system_df[[column for column in system_df.columns if '_error' in column]]
-    error_df_columns = error_df.columns
-    if len(error_df_columns) != len(correction_array[0]):
-        raise ValueError('DataFrames should have the same number of columns.')
-    error_df = np.array(error_df)
-    correction_array = np.array([x for x in correction_array])
-    product_array = error_df * correction_array
-    return pd.DataFrame(product_array, columns=error_df_columns)
+    factors = correction_table[factor_columns].to_numpy(dtype=np.float64)
+    min_bins, max_bins, bin_centres = [correction_table[column].to_numpy(dtype=np.float64) for column in
+                                       ['min_Gmag_bin', 'max_Gmag_bin', 'bin_centre']]
+    knots, knot_factors = [], []
+    for index, (bin_centre, max_bin) in enumerate(zip(bin_centres, max_bins)):
+        next_bins = np.flatnonzero(min_bins == max_bin)
+        knots.extend([bin_centre, max_bin])
+        knot_factors.extend([factors[index], factors[next_bins[0]] if next_bins.size else factors[index]])
+    knots, knot_factors = np.array(knots), np.array(knot_factors)
+    knots.flags.writeable = knot_factors.flags.writeable = False
+    return knots, knot_factors
+
+
+def _get_correction_factors(mag_G, system):
+    """
+    Get the correction factors of a system for all the sources at once. The factors are clamped to those of the first
+        and last bins outside the magnitude range of the table.
+
+    Args:
+        mag_G (ndarray): G magnitudes of the sources.
+        system (str): Label of the photometric system.
+
+    Returns:
+        ndarray: The correction factors, one row per source and one column per error column of the system.
+    """
+    knots, knot_factors = _load_correction_table(system)
+    # Sources without G magnitude get the factors of the faintest bin
+    mag_G = np.clip(np.where(np.isnan(mag_G), np.inf, mag_G), knots[0], knots[-1])
+    upper = np.clip(np.searchsorted(knots, mag_G, side='right'), 1, len(knots) - 1)
+    lower = upper - 1
+    slope = (knot_factors[upper] - knot_factors[lower]) / (knots[upper] - knots[lower])[:, np.newaxis]
+    return slope * (mag_G - knots[lower])[:, np.newaxis] + knot_factors[lower]
+
+
+def _apply_error_correction_to_arrays(photometry, photometric_system):
+    """
+    Apply the error correction to a synthetic photometry stored in arrays. The photometry is modified in place. This
+        is the version of _apply_error_correction used by the generator.
+
+    Args:
+        photometry (SyntheticPhotometryArrays): Synthetic photometry including the Gaia_DR3_Vega system.
+        photometric_system (list): Photometric systems to correct.
+    """
+    gaia_system = 'GaiaDr3Vega'
+    if gaia_system not in [system.get_system_label() for system in photometry.photometric_system]:
+        raise ValueError('System Gaia_DR3_Vega, required to apply the error correction is not present in the input'
+                         ' photometry.')
+    systems_in_data = _extract_systems_from_data([], photometric_system)
+    systems_to_skip = [system for system in systems_in_data if system not in __correctable_systems]
+    for system in systems_to_skip:
+        _warning(f'System {system} does not have a correction table. The program will not apply error correction over'
+                 ' this system.')
+    mag_G = photometry.get_column(gaia_system, 'mag', 'G').astype(np.float64)
+    for system in systems_in_data:
+        if system in systems_to_skip:
+            continue
+        index = photometry.get_system_index(system)
+        correction_factors = _get_correction_factors(mag_G, system)
+        system_bands = photometry.photometric_system[index].get_bands()
+        if len(system_bands) != correction_factors.shape[1]:
+            raise ValueError('DataFrames should have the same number of columns.')
+        # Keep the factors of the bands in the photometry
+        correction_factors = correction_factors[:, [system_bands.index(band) for band in photometry.bands[index]]]
+        photometry.flux_error[index] = photometry.flux_error[index].astype(np.float64) * correction_factors
 
 
 # The correction can only be applied for the systems present in the config files
@@ -134,17 +170,24 @@ def _apply_error_correction(input_multi_photometry, photometric_system=None, out
     for system in systems_to_skip:
         _warning(f'System {system} does not have a correction table. The program will not apply error correction over'
                  ' this system.')
+    mag_G = input_multi_photometry[gaia_G_mag_column].to_numpy(dtype=np.float64)
+    error_columns, correction_factors = [], []
     for system in tqdm(systems, desc=pbar_message[__FUNCTION_KEY], total=len(systems), unit=pbar_units[__FUNCTION_KEY],
                        leave=False, colour=pbar_colour, file=stdout):
-        system_df = input_multi_photometry[[column for column in input_multi_photometry.columns if
-                                            (column.startswith(system) and f'{system}Std' not in column) or
-                                            column == gaia_G_mag_column]]
+        system_error_columns = [column for column in input_multi_photometry.columns if column.startswith(system) and
+                                f'{system}Std' not in column and '_error' in column]
         # Get the correction factors for the mag G column
-        correction_array = _get_correction_array(system_df[gaia_G_mag_column], system)
-        # Correct error magnitudes
-        corrected_system = _correct_system(system_df, correction_array)
-        # Apply correction to the original input_multi_photometry
-        input_multi_photometry.update(corrected_system)
+        system_correction_factors = _get_correction_factors(mag_G, system)
+        if len(system_error_columns) != system_correction_factors.shape[1]:
+            raise ValueError('DataFrames should have the same number of columns.')
+        error_columns.extend(system_error_columns)
+        correction_factors.append(system_correction_factors)
+    # Correct the errors of all the systems at once
+    if error_columns:
+        corrected_errors = input_multi_photometry[error_columns].to_numpy(dtype=np.float64) * np.hstack(
+            correction_factors)
+        for column, values in zip(error_columns, corrected_errors.T):
+            input_multi_photometry[column] = values.astype(input_multi_photometry[column].dtype, copy=False)
     output_data = PhotometryData(input_multi_photometry)
     output_data.data = cast_output(output_data)
     output_data.save(save_file, output_path, output_file, output_format, extension)
@@ -83,6 +83,62 @@ class GenericParser(object):
             self.print_info_msg(done=True)
         return parsed_data, extension
 
+    def parse_file_chunks(self, file_path, chunk_size, disable_info=False):
+        """
+        Parse the input file according to its extension, one chunk of rows at a time.
+
+        Args:
+            file_path (str): Path to a file.
+            chunk_size (int): Maximum number of rows in each chunk.
+            disable_info (bool): Whether to disable the progress tracker or not.
+
+        Returns:
+            generator: Generator of tuples containing a Pandas DataFrame with the rows in the chunk and the file
+                extension.
+        """
+        if not disable_info:
+            self.print_info_msg()
+        extension = _get_file_extension(file_path)
+        parser = self.get_parser(extension)
+        if extension == 'avro':
+            chunks = self._parse_avro_chunks(file_path, chunk_size)
+        elif extension in ['csv', 'ecsv']:
+            chunks = self._parse_csv_chunks(file_path, chunk_size)
+        else:
+            chunks = _split_rows(parser(file_path), chunk_size)
+        for chunk in chunks:
+            yield _cast(chunk), extension
+        if not disable_info:
+            self.print_info_msg(done=True)
+
+    def _parse_avro_chunks(self, avro_file, chunk_size):
+        """
+        Parse the input AVRO file in chunks. Parsers that cannot read the file incrementally parse the whole file and
+            split the result.
+
+        Args:
+            avro_file (str): Path to an AVRO file.
+            chunk_size (int): Maximum number of rows in each chunk.
+
+        Returns:
+            generator: Generator of Pandas DataFrames.
+        """
+        return _split_rows(self._parse_avro(avro_file), chunk_size)
+
+    def _parse_csv_chunks(self, csv_file, chunk_size):
+        """
+        Parse the input CSV file in chunks. Parsers that cannot read the file incrementally parse the whole file and
+            split the result.
+
+        Args:
+            csv_file (str): Path to a CSV file.
+            chunk_size (int): Maximum number of rows in each chunk.
+
+        Returns:
+            generator: Generator of Pandas DataFrames.
+        """
+        return _split_rows(self._parse_csv(csv_file), chunk_size)
+
     def _parse_avro(self, avro_file):
         raise NotImplementedError('Method not implemented for base class.')
 
@@ -101,15 +157,7 @@ class GenericParser(object):
             DataFrame: A pandas DataFrame representing the CSV file.
         """
         df = pd.read_csv(csv_file, comment='#', float_precision='round_trip', usecols=_usecols)
-        if _array_columns:  # Pandas converters seemed slower
-            for column in _array_columns:
-                if column in df.columns:
-                    df[column] = df[column].apply(lambda x: str_to_array(x))
-        if _matrix_columns:
-            for size_column, values_column in _matrix_columns:
-                df[values_column] = df.apply(lambda row: array_to_symmetric_matrix(str_to_array(row[values_column]),
-                                                                                   row[size_column]), axis=1)
-        return df
+        return _parse_csv_arrays(df, _array_columns, _matrix_columns)
 
     def _parse_fits(self, fits_file, _array_columns=None, _matrix_columns=None, _usecols=None):
         """
@@ -176,3 +224,42 @@ def _get_file_extension(file_path):
     """
     _, file_extension = splitext(file_path)
     return file_extension[1:]
+
+
+def _parse_csv_arrays(df, array_columns=None, matrix_columns=None):
+    """
+    Convert the columns of a DataFrame read from a CSV file that contain arrays or matrices as strings.
+
+    Args:
+        df (DataFrame): DataFrame read from a CSV file.
+        array_columns (list): List of columns that contain arrays as strings.
+        matrix_columns (list of tuples): List of tuples where the first element is the number of rows/columns of a
+            square matrix which values are those contained in the second element of the tuple.
+
+    Returns:
+        DataFrame: The input DataFrame with the arrays and matrices parsed.
+    """
+    if array_columns:  # Pandas converters seemed slower
+        for column in array_columns:
+            if column in df.columns:
+                df[column] = df[column].apply(lambda x: str_to_array(x))
+    if matrix_columns:
+        for size_column, values_column in matrix_columns:
+            df[values_column] = df.apply(lambda row: array_to_symmetric_matrix(str_to_array(row[values_column]),
+                                                                               row[size_column]), axis=1)
+    return df
+
+
+def _split_rows(df, chunk_size):
+    """
+    Split a DataFrame in chunks of consecutive rows.
+
+    Args:
+        df (DataFrame): DataFrame to split.
+        chunk_size (int): Maximum number of rows in each chunk.
+
+    Returns:
+        generator: Generator of DataFrames.
+    """
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
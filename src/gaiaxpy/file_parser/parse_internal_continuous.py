@@ -4,6 +4,8 @@ parse_internal_continuous.py
 Module to parse input files containing internally calibrated continuous spectra.
 """
 
+from itertools import islice
+
 import numpy as np
 import pandas as pd
 from fastavro import __version__ as fa_version
@@ -14,7 +16,7 @@ from requests.exceptions import ConnectionError
 
 from gaiaxpy.core.generic_functions import array_to_symmetric_matrix, rename_with_required
 from .cast import _cast
-from .parse_generic import GenericParser
+from .parse_generic import GenericParser, _parse_csv_arrays
 from .utils import _csv_to_avro_map, _get_from_dict
 from ..core.custom_errors import SelectorNotImplementedError
 from ..core.satellite import BANDS
@@ -70,6 +72,27 @@ class InternalContinuousParser(GenericParser):
         df = rename_with_required(df, self.additional_columns)
         return df
 
+    def _parse_csv_chunks(self, csv_file, chunk_size):
+        """
+        Parse the input CSV file in chunks of rows if it contains internally calibrated continuous spectra. Only the
+            rows in the current chunk are kept in memory.
+
+        Args:
+            csv_file (str): Path to a CSV file.
+            chunk_size (int): Maximum number of rows in each chunk.
+
+        Returns:
+            generator: Generator of Pandas DataFrames.
+        """
+        if self.selector is not None:
+            raise SelectorNotImplementedError('E/CSV')
+        for df in pd.read_csv(csv_file, comment='#', float_precision='round_trip', usecols=self.requested_columns,
+                              chunksize=chunk_size):
+            df = _parse_csv_arrays(df, array_columns, matrix_columns)
+            for band in BANDS:
+                df[f'{band}_covariance_matrix'] = df.apply(get_covariance_matrix, axis=1, args=(band,))
+            yield rename_with_required(df, self.additional_columns)
+
     def _parse_fits(self, fits_file, _array_columns=None, _matrix_columns=None, _usecols=None):
         """
         Parse the input FITS file and store the result in a pandas DataFrame if it contains internally calibrated
@@ -184,34 +207,11 @@ class InternalContinuousParser(GenericParser):
         for record in records:
             yield InternalContinuousParser.__process_avro_record(record, additional_columns)
 
-    def _parse_avro(self, avro_file):
-        """
-        Parse the input AVRO file and return the result as a Pandas DataFrame.
-
-        Args:
-            avro_file (str): Path to an AVRO file.
-
-        Returns:
-            DataFrame: Pandas DataFrame representing the AVRO file.
-        """
-
-        def __records_to_df(max_conn_retries=10, **_records_arguments):
-            retries = 0
-            while retries < max_conn_retries:
-                try:
-                    _df = pd.DataFrame(__get_records(**_records_arguments))
-                    break
-                except ConnectionError:
-                    retries += 1
-            else:
-                raise ConnectionError(
-                    f'Failed to connect to HDFS after {max_conn_retries} attempts for file {avro_file}.')
-            return _df
-
+    def __get_records(self, avro_file):
         if version.parse(fa_version) <= version.parse('1.4.7'):
-            __get_records = InternalContinuousParser.__get_records_up_to_1_4_7
+            get_records = InternalContinuousParser.__get_records_up_to_1_4_7
         elif version.parse(fa_version) > version.parse('1.4.7'):
-            __get_records = InternalContinuousParser.__get_records_later_than_1_4_7
+            get_records = InternalContinuousParser.__get_records_later_than_1_4_7
         else:
             raise ValueError(f'Fastavro version {fa_version} may not have been parsed properly.')
         records_arguments = {
@@ -222,7 +222,10 @@ class InternalContinuousParser(GenericParser):
         if hasattr(self, 'address') and hasattr(self, 'port'):
             records_arguments['address'] = self.address
             records_arguments['port'] = self.port
-        df = __records_to_df(**records_arguments)
+        return get_records(**records_arguments)
+
+    @staticmethod
+    def __records_to_spectra(df):
         # Pairs of the form (matrix_size (N), values_to_put_in_matrix)
         to_matrix_columns = [('bp_n_parameters', 'bp_coefficient_covariances'),
                              ('rp_n_parameters', 'rp_coefficient_covariances')]
@@ -232,3 +235,43 @@ class InternalContinuousParser(GenericParser):
         for band in BANDS:
             df[f'{band}_covariance_matrix'] = df.apply(get_covariance_matrix, axis=1, args=(band,))
         return _cast(df)
+
+    def _parse_avro(self, avro_file):
+        """
+        Parse the input AVRO file and return the result as a Pandas DataFrame.
+
+        Args:
+            avro_file (str): Path to an AVRO file.
+
+        Returns:
+            DataFrame: Pandas DataFrame representing the AVRO file.
+        """
+        max_conn_retries = 10
+        retries = 0
+        while retries < max_conn_retries:
+            try:
+                df = pd.DataFrame(self.__get_records(avro_file))
+                break
+            except ConnectionError:
+                retries += 1
+        else:
+            raise ConnectionError(f'Failed to connect to HDFS after {max_conn_retries} attempts for file {avro_file}.')
+        return InternalContinuousParser.__records_to_spectra(df)
+
+    def _parse_avro_chunks(self, avro_file, chunk_size):
+        """
+        Parse the input AVRO file in chunks of records. Only the records in the current chunk are kept in memory.
+
+        Args:
+            avro_file (str): Path to an AVRO file.
+            chunk_size (int): Maximum number of records in each chunk.
+
+        Returns:
+            generator: Generator of Pandas DataFrames.
+        """
+        records = self.__get_records(avro_file)
+        while True:
+            df = pd.DataFrame(list(islice(records, chunk_size)))
+            if df.empty:
+                break
+            yield InternalContinuousParser.__records_to_spectra(df)
@@ -0,0 +1,117 @@
+"""
+filter_bundle.py
+====================================
+Module to compile the filter files of the photometric systems into a binary bundle.
+"""
+
+import hashlib
+from functools import lru_cache
+from glob import glob
+from os.path import basename, exists, getmtime, join, splitext
+
+import numpy as np
+
+from gaiaxpy.config.paths import filters_path
+from gaiaxpy.core.satellite import BANDS
+from gaiaxpy.core.xml_utils import get_file_root, parse_array, get_array_text, get_xp_sampling_matrix, get_xp_merge
+
+FILTER_BUNDLE_FILE = 'XpFilterBundle.npz'
+_BUILT_IN_FILTER_FILES = 'XpFilter_*_*.xml'
+_CHECKSUM_FIELD = 'checksum'
+
+
+def get_file_checksum(file_path):
+    """
+    Compute the checksum of a file.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        str: The SHA-256 digest of the contents of the file.
+    """
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_filter_file(filter_file):
+    """
+    Read all the arrays defining a photometric system from its filter XML file.
+
+    Args:
+        filter_file (str): Path to the filter file.
+
+    Returns:
+        dict: A dictionary containing the bands, zero-points, offsets, the XpSampling matrix of each band, the sampling
+            grid and the XpMerge weights of each band.
+    """
+    x_root = get_file_root(filter_file)
+    bands, n_bands = get_array_text(x_root, 'bands')
+    sampling_grid, bp_merge, rp_merge = get_xp_merge(x_root)
+    return {'bands': np.array(bands), 'zero_points': parse_array(x_root, 'zeropoints'),
+            'offsets': parse_array(x_root, 'fluxBias'),
+            **{f'{band}_sampling': get_xp_sampling_matrix(x_root, band, n_bands) for band in BANDS},
+            'sampling_grid': sampling_grid, **dict(zip([f'{band}_merge' for band in BANDS], [bp_merge, rp_merge]))}
+
+
+def _get_key(filter_file, field):
+    return f'{splitext(basename(filter_file))[0]}.{field}'
+
+
+def compile_filter_bundle(filter_files=None, bundle_dir=filters_path):
+    """
+    Compile filter files into a bundle stored in the given directory. Together with the arrays of each system, the
+        bundle stores the checksum of the filter file it was compiled from, so that the bundle is ignored for the
+        filter files modified after compiling it. The built-in bundle shipped with the package must be recompiled
+        whenever a built-in filter file changes, calling this function without arguments:
+
+            python -c "from gaiaxpy.generator.filter_bundle import compile_filter_bundle; compile_filter_bundle()"
+
+    Args:
+        filter_files (list): Paths to the filter files. If not given, the built-in filter files are compiled.
+        bundle_dir (str): Directory where the bundle is written. Filter files are looked up in the bundle of the
+            directory containing the filters of the system.
+
+    Returns:
+        str: Path to the bundle.
+    """
+    filter_files = sorted(glob(join(filters_path, _BUILT_IN_FILTER_FILES))) if filter_files is None else filter_files
+    arrays = dict()
+    for filter_file in filter_files:
+        arrays[_get_key(filter_file, _CHECKSUM_FIELD)] = np.array(get_file_checksum(filter_file))
+        arrays.update({_get_key(filter_file, field): values for field, values in read_filter_file(filter_file).items()})
+    bundle_file = join(bundle_dir, FILTER_BUNDLE_FILE)
+    np.savez(bundle_file, **arrays)
+    return bundle_file
+
+
+@lru_cache(maxsize=None)
+def __open_bundle(bundle_file, modification_time):
+    # The modification time is part of the key, so that recompiled bundles are opened again
+    return np.load(bundle_file)
+
+
+def load_bundled_filter(filter_file, bundle_dir):
+    """
+    Load the arrays of a photometric system from the bundle in the given directory.
+
+    Args:
+        filter_file (str): Path to the filter file of the system.
+        bundle_dir (str): Directory containing the bundle.
+
+    Returns:
+        dict: The read-only arrays of the system with the same keys as read_filter_file, or None if the bundle does not
+            exist, does not contain the system or was compiled from a different version of the filter file.
+    """
+    bundle_file = join(bundle_dir, FILTER_BUNDLE_FILE)
+    if not exists(bundle_file):
+        return None
+    bundle = __open_bundle(bundle_file, getmtime(bundle_file))
+    checksum_key = _get_key(filter_file, _CHECKSUM_FIELD)
+    if checksum_key not in bundle.files or str(bundle[checksum_key]) != get_file_checksum(filter_file):
+        return None
+    prefix = _get_key(filter_file, '')
+    arrays = {key[len(prefix):]: bundle[key] for key in bundle.files if key.startswith(prefix) and key != checksum_key}
+    for values in arrays.values():
+        values.flags.writeable = False
+    return arrays
@@ -1,24 +1,35 @@
+from concurrent.futures import Executor
+from functools import lru_cache
 from pathlib import Path
-from typing import Union, Optional
+from typing import Iterator, Optional, Union
 
+import numpy as np
 import pandas as pd
 
-from gaiaxpy.colour_equation.xp_filter_system_colour_equation import _apply_colour_equation
-from gaiaxpy.core.generic_functions import cast_output, format_additional_columns, validate_photometric_system
-from gaiaxpy.error_correction.error_correction import _apply_error_correction
+from gaiaxpy.colour_equation.xp_filter_system_colour_equation import _apply_colour_equation_to_arrays, \
+    _get_colour_equation_bands
+from gaiaxpy.core.generic_functions import cast_output, format_additional_columns, parse_dtype, parse_outputs, \
+    validate_photometric_system
+from gaiaxpy.error_correction.error_correction import _apply_error_correction_to_arrays
+from gaiaxpy.core.parallel import concat_chunks, map_chunks, use_workers, validate_parallel_arguments
 from gaiaxpy.input_reader.input_reader import InputReader
+from gaiaxpy.output.output_data import validate_append_format
 from gaiaxpy.output.photometry_data import PhotometryData
 from .multi_synthetic_photometry_generator import MultiSyntheticPhotometryGenerator
-from .photometric_system import PhotometricSystem
-from ..core.input_validator import validate_save_arguments
+from .photometric_system import PhotometricSystem, _get_systems_from_names
+from ..core.input_validator import validate_chunk_size, validate_save_arguments
 from ..file_parser.cast import _cast
 
+_OUTPUTS = ('mag', 'flux', 'flux_error')
+
 
 def generate(input_object: Union[list, Path, pd.DataFrame, str], photometric_system: Union[list, PhotometricSystem],
              output_path: Union[Path, str] = '.', output_file: str = 'output_synthetic_photometry',
              output_format: str = None, save_file: bool = True, error_correction: bool = False,
-             additional_columns: Optional[Union[dict, list, str]] = None, username: str = None, password: str = None) \
-        -> pd.DataFrame:
+             additional_columns: Optional[Union[dict, list, str]] = None, username: str = None, password: str = None,
+             dtype: str = 'float64', n_workers: int = None, executor: Executor = None,
+             bands: Optional[Union[dict, list]] = None,
+             outputs: Optional[Union[set, list, str]] = None) -> pd.DataFrame:
     """
     Synthetic photometry utility: generates synthetic photometry in a set of available systems from the input
     internally-calibrated continuously-represented mean spectra.
@@ -42,6 +53,24 @@ def generate(input_object: Union[list, Path, pd.DataFrame, str], photometric_sys
             columns must be available in the input (files, DataFrames) or in the Archive response (lists, queries).
         username (str): Cosmos username, only suggested when input_object is a list or ADQL query.
         password (str): Cosmos password, only suggested when input_object is a list or ADQL query.
+        dtype (str/type): Floating point type used to compute and store the synthetic photometry, either 'float64' or
+            'float32'. The relative difference in fluxes and errors with respect to double precision is of the order of
+            1e-6, and the difference in magnitudes is of the order of 1e-6 mag.
+        n_workers (int): Number of worker processes used to generate the photometry. The sources are split in chunks
+            that are processed in parallel, and the output keeps the order of the input. By default, the photometry is
+            generated in the current process.
+        executor (Executor): Executor (e.g.: a concurrent.futures.ProcessPoolExecutor) used to process the chunks
+            instead of creating a new pool of n_workers processes. If given, n_workers is only used to decide the number
+            of chunks.
+        bands (dict/list): Bands to compute for some of the photometric systems, as a dictionary with the photometric
+            systems (or their names) as keys and lists of bands as values (e.g. {PhotometricSystem.JPAS: ['J0378',
+            'J0395']}). A list of bands can be given if a single photometric system is requested. Only the given bands
+            are computed and included in the output, in the order of the bands of the system. The systems not included
+            are computed in all their bands.
+        outputs (str/list/set): Quantities to include in the output, any of 'mag', 'flux' and 'flux_error'. By
+            default, all of them are included. If the flux errors are not requested, the covariances of the coefficients
+            are not propagated to the photometry, which is most of the computation, and the error correction is not
+            applied since it only changes the errors.
 
     Returns:
         DataFrame: A DataFrame of all synthetic photometry results.
@@ -49,7 +78,8 @@ def generate(input_object: Union[list, Path, pd.DataFrame, str], photometric_sys
     return _generate(input_object=input_object, photometric_system=photometric_system, output_path=output_path,
                      output_file=output_file, output_format=output_format, save_file=save_file,
                      error_correction=error_correction, additional_columns=additional_columns, username=username,
-                     password=password)
+                     password=password, dtype=dtype, n_workers=n_workers, executor=executor, bands=bands,
+                     outputs=outputs)
 
 
 def _generate(input_object: Union[list, Path, pd.DataFrame, str], photometric_system: Union[list, PhotometricSystem],
@@ -57,7 +87,9 @@ def _generate(input_object: Union[list, Path, pd.DataFrame, str], photometric_sy
               output_file: str = 'output_synthetic_photometry', output_format: str = None, save_file: bool = True,
               error_correction: bool = False, additional_columns: Optional[Union[dict, list, str]] = None,
               selector=None, username: str = None, password: str = None, bp_model: str = 'v375wi',
-              rp_model: str = 'v142r') -> pd.DataFrame:
+              rp_model: str = 'v142r', dtype: str = 'float64', n_workers: int = None, executor: Executor = None,
+              bands: Optional[Union[dict, list]] = None, outputs: Optional[Union[set, list, str]] = None) -> \
+        pd.DataFrame:
     """
     Internal function of the calibration utility. Refer to "generate".
 
@@ -73,53 +105,341 @@ def _generate(input_object: Union[list, Path, pd.DataFrame, str], photometric_sy
         rp_model (str): The rp model.
     """
 
-    def __is_gaia_initially_in_systems(_internal_photometric_system: list,
-                                       _gaia_system: PhotometricSystem = PhotometricSystem.Gaia_DR3_Vega):
-        """
-        Check whether Gaia DR3 is originally in the input photometric systems.
+    validate_photometric_system(photometric_system)
+    validate_parallel_arguments(n_workers, executor)
+    dtype = parse_dtype(dtype)
+    outputs = parse_outputs(outputs, _OUTPUTS)
+    # The error correction only changes the errors
+    error_correction = error_correction and 'flux_error' in outputs
+    validate_save_arguments(generate.__defaults__[1], output_file, generate.__defaults__[2], output_format, save_file)
+    internal_phot_system, is_gaia_in_input = __get_internal_photometric_systems(photometric_system, error_correction)
+    output_bands = __parse_bands(photometric_system, bands)
+    computed_bands = __get_computed_bands(internal_phot_system, output_bands, is_gaia_in_input, error_correction)
+    additional_columns = format_additional_columns(additional_columns)
+    # Read input data
+    parsed_input_data, extension = InputReader(input_object, generate, truncation=truncation,
+                                               additional_columns=additional_columns, selector=selector, user=username,
+                                               password=password).read()
+    # Generate photometry
+    if use_workers(n_workers, executor):
+        # Photometric systems cannot be sent to other processes, the workers receive their names instead
+        system_names = tuple(system.get_system_name() for system in internal_phot_system)
+        requested_system_names = [system.get_system_name() for system in photometric_system] if isinstance(
+            photometric_system, list) else [photometric_system.get_system_name()]
+        # The bands are part of the key of the cached generators
+        computed_bands = tuple((label, tuple(bands)) for label, bands in computed_bands.items())
+        results = map_chunks(_generate_photometry_in_worker, parsed_input_data, n_workers=n_workers, executor=executor,
+                             initializer=_get_photometry_generator,
+                             initargs=(system_names, bp_model, rp_model, computed_bands),
+                             extension=extension, system_names=system_names,
+                             requested_system_names=requested_system_names, is_gaia_in_input=is_gaia_in_input,
+                             error_correction=error_correction, additional_columns=additional_columns,
+                             truncation=truncation, dtype=dtype, bp_model=bp_model, rp_model=rp_model,
+                             computed_bands=computed_bands, output_bands=output_bands, outputs=outputs)
+        photometry_df = concat_chunks(results)
+    else:
+        phot_generator = MultiSyntheticPhotometryGenerator(internal_phot_system, bp_model=bp_model, rp_model=rp_model,
+                                                           bands=computed_bands)
+        photometry_df = __generate_photometry(parsed_input_data, extension, phot_generator, photometric_system,
+                                              internal_phot_system, is_gaia_in_input, error_correction,
+                                              additional_columns, truncation, dtype, output_bands=output_bands,
+                                              outputs=outputs)
+    # Save data
+    output_data = PhotometryData(photometry_df)
+    output_data.save(save_file, output_path, output_file, output_format, extension)
+    return _cast(photometry_df)
 
-        Args:
-            _internal_photometric_system (list): List of photometric systems.
-            _gaia_system (PhotometricSystem): Gaia DR3 system.
 
-        Returns:
-            bool: True if Gaia DR3 is in the list, False otherwise.
-        """
-        gaia_system_name = _gaia_system.get_system_name()
-        return any([item.get_system_name() == gaia_system_name for item in _internal_photometric_system])
+def generate_iter(input_object: Union[list, Path, pd.DataFrame, str],
+                  photometric_system: Union[list, PhotometricSystem], output_path: Union[Path, str] = '.',
+                  output_file: str = 'output_synthetic_photometry', output_format: str = None, save_file: bool = True,
+                  error_correction: bool = False, additional_columns: Optional[Union[dict, list, str]] = None,
+                  username: str = None, password: str = None, dtype: str = 'float64', chunk_size: int = 1000,
+                  bands: Optional[Union[dict, list]] = None,
+                  outputs: Optional[Union[set, list, str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Chunked version of the synthetic photometry utility (refer to "generate"). The input is read and processed in
+    chunks of at most chunk_size sources, so that the memory required depends on the chunk size rather than on the size
+    of the input. AVRO and CSV/ECSV files are read incrementally. If save_file is True, the photometry of each chunk is
+    appended to the output file as soon as it is computed, which is only possible for AVRO, CSV and ECSV outputs.
 
+    Args:
+        input_object (list/Path/pd.DataFrame/str): Path to the file containing the mean spectra as downloaded from
+            the archive in their continuous representation, a list of sources ids (string or long), or a pandas
+            DataFrame.
+        photometric_system (list/PhotometricSystem): Desired photometric system or list of photometric systems.
+        output_path (Path/str): Path where to save the output data.
+        output_file (str): Name of the output file without extension (e.g. 'my_file').
+        output_format (str): Desired output format. If no format is given, the output file format will be the same as
+            the input file (e.g. 'csv').
+        save_file (bool): Whether to save the output in a file or not. If false, output_format and output_file_name will
+            be ignored.
+        error_correction (bool): Whether to apply to the photometric errors the tabulated factors to mitigate
+            underestimated errors (see Montegriffo et al., 2022, for more details).
+        additional_columns (str/list): List of additional columns to include in the output.
+        username (str): Cosmos username, only suggested when input_object is a list or ADQL query.
+        password (str): Cosmos password, only suggested when input_object is a list or ADQL query.
+        dtype (str/type): Floating point type used to compute and store the synthetic photometry, either 'float64' or
+            'float32'.
+        chunk_size (int): Maximum number of sources processed at once.
+        bands (dict/list): Bands to compute for some of the photometric systems, as a dictionary with the photometric
+            systems (or their names) as keys and lists of bands as values (e.g. {PhotometricSystem.JPAS: ['J0378',
+            'J0395']}). A list of bands can be given if a single photometric system is requested. Only the given bands
+            are computed and included in the output, in the order of the bands of the system. The systems not included
+            are computed in all their bands.
+        outputs (str/list/set): Quantities to include in the output (refer to "generate").
+
+    Returns:
+        generator: Generator of DataFrames with the synthetic photometry of the sources in each chunk.
+    """
+    return _generate_iter(input_object=input_object, photometric_system=photometric_system, output_path=output_path,
+                          output_file=output_file, output_format=output_format, save_file=save_file,
+                          error_correction=error_correction, additional_columns=additional_columns,
+                          username=username, password=password, dtype=dtype, chunk_size=chunk_size, bands=bands,
+                          outputs=outputs)
+
+
+def _generate_iter(input_object: Union[list, Path, pd.DataFrame, str],
+                   photometric_system: Union[list, PhotometricSystem], truncation: bool = False,
+                   output_path: Union[Path, str] = '.', output_file: str = 'output_synthetic_photometry',
+                   output_format: str = None, save_file: bool = True, error_correction: bool = False,
+                   additional_columns: Optional[Union[dict, list, str]] = None, selector=None, username: str = None,
+                   password: str = None, bp_model: str = 'v375wi', rp_model: str = 'v142r', dtype: str = 'float64',
+                   chunk_size: int = 1000, bands: Optional[Union[dict, list]] = None,
+                   outputs: Optional[Union[set, list, str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Internal function of the chunked synthetic photometry utility. Refer to "generate_iter" and "_generate".
+
+    Raises:
+        ValueError: If save_file is True and the output format does not allow appending data to an existing file.
+    """
     validate_photometric_system(photometric_system)
+    validate_chunk_size(chunk_size)
+    dtype = parse_dtype(dtype)
+    outputs = parse_outputs(outputs, _OUTPUTS)
+    error_correction = error_correction and 'flux_error' in outputs
     validate_save_arguments(generate.__defaults__[1], output_file, generate.__defaults__[2], output_format, save_file)
+    internal_phot_system, is_gaia_in_input = __get_internal_photometric_systems(photometric_system, error_correction)
+    output_bands = __parse_bands(photometric_system, bands)
+    computed_bands = __get_computed_bands(internal_phot_system, output_bands, is_gaia_in_input, error_correction)
+    additional_columns = format_additional_columns(additional_columns)
+    chunks = InputReader(input_object, generate, truncation=truncation, additional_columns=additional_columns,
+                         selector=selector, user=username, password=password).read_chunks(chunk_size)
+    # The generator (and the sampled bases of the systems) is shared by all chunks
+    phot_generator = MultiSyntheticPhotometryGenerator(internal_phot_system, bp_model=bp_model, rp_model=rp_model,
+                                                       bands=computed_bands)
+    for index, (parsed_input_data, extension) in enumerate(chunks):
+        if save_file and index == 0:
+            validate_append_format(output_format if output_format else extension)
+        photometry_df = __generate_photometry(parsed_input_data, extension, phot_generator, photometric_system,
+                                              internal_phot_system, is_gaia_in_input, error_correction,
+                                              additional_columns, truncation, dtype, output_bands=output_bands,
+                                              outputs=outputs)
+        output_data = PhotometryData(photometry_df)
+        output_data.save(save_file, output_path, output_file, output_format, extension, append=index > 0)
+        yield _cast(photometry_df)
+
+
+def __get_internal_photometric_systems(photometric_system: Union[list, PhotometricSystem],
+                                       error_correction: bool) -> tuple:
+    """
+    Get the list of photometric systems to compute, which includes Gaia DR3 if it is required by the error correction.
+
+    Args:
+        photometric_system (list/PhotometricSystem): Photometric system or list of photometric systems requested.
+        error_correction (bool): Whether the error correction will be applied.
+
+    Returns:
+        (tuple): tuple containing:
+            list: The photometric systems to compute.
+            bool: Whether Gaia DR3 is in the requested systems.
+    """
+    gaia_system = PhotometricSystem.Gaia_DR3_Vega
     # Prepare systems, keep track of original systems (especially required for error_correction)
     internal_phot_system = photometric_system.copy() if isinstance(photometric_system, list) else (
         [photometric_system].copy())
-    gaia_system = PhotometricSystem.Gaia_DR3_Vega
-    is_gaia_in_input = __is_gaia_initially_in_systems(internal_phot_system)
+    gaia_system_name = gaia_system.get_system_name()
+    is_gaia_in_input = any([item.get_system_name() == gaia_system_name for item in internal_phot_system])
     if error_correction and not is_gaia_in_input:
         internal_phot_system.append(gaia_system)
-    additional_columns = format_additional_columns(additional_columns)
-    # Read input data
-    parsed_input_data, extension = InputReader(input_object, generate, truncation=truncation,
-                                               additional_columns=additional_columns, selector=selector, user=username,
-                                               password=password).read()
+    return internal_phot_system, is_gaia_in_input
+
+
+def __parse_bands(photometric_system: Union[list, PhotometricSystem], bands: Optional[Union[dict, list]]) -> dict:
+    """
+    Get the bands requested for each photometric system.
+
+    Args:
+        photometric_system (list/PhotometricSystem): Photometric system or list of photometric systems requested.
+        bands (dict/list): Bands requested per photometric system, or list of bands if a single system is requested.
+
+    Returns:
+        dict: The requested bands of each system label, in the order of the bands of the system. Systems computed in
+            all their bands are not included.
+    """
+    if bands is None:
+        return dict()
+    systems = photometric_system if isinstance(photometric_system, list) else [photometric_system]
+    if not isinstance(bands, dict):
+        if len(systems) > 1:
+            raise ValueError('A list of bands can only be given if a single photometric system is requested. Use a '
+                             'dictionary with the photometric systems as keys instead.')
+        bands = {systems[0]: bands}
+    systems_by_name = {system.get_system_name(): system for system in systems}
+    output_bands = dict()
+    for system, system_bands in bands.items():
+        name = system if isinstance(system, str) else system.get_system_name()
+        if name not in systems_by_name:
+            raise ValueError(f'Bands were given for photometric system {name}, which is not a requested system.')
+        system_bands = [system_bands] if isinstance(system_bands, str) else list(system_bands)
+        available_bands = systems_by_name[name].get_bands()
+        if not system_bands:
+            raise ValueError(f'At least one band of photometric system {name} is required.')
+        for band in system_bands:
+            if band not in available_bands:
+                raise ValueError(f'Band {band} is not available in photometric system {name}. Available bands are: '
+                                 f'{", ".join(available_bands)}.')
+        output_bands[systems_by_name[name].get_system_label()] = [band for band in available_bands if
+                                                                  band in system_bands]
+    return output_bands
+
+
+def __get_computed_bands(internal_phot_system: list, output_bands: dict, is_gaia_in_input: bool,
+                         error_correction: bool) -> dict:
+    """
+    Get the bands to compute for the photometric systems restricted to some bands. Together with the requested bands,
+        the bands of the colour index of a system are computed if its colour equation applies to a requested band, and
+        the G band of Gaia DR3 is computed if the error correction is applied.
+
+    Args:
+        internal_phot_system (list): Photometric systems computed by the generator.
+        output_bands (dict): The requested bands of each system label.
+        is_gaia_in_input (bool): Whether Gaia DR3 is in the requested systems.
+        error_correction (bool): Whether the error correction will be applied.
+
+    Returns:
+        dict: The bands to compute for each system label, in the order of the bands of the system.
+    """
+    gaia_label = PhotometricSystem.Gaia_DR3_Vega.get_system_label()
+    computed_bands = dict()
+    for system in internal_phot_system:
+        label = system.get_system_label()
+        if label in output_bands:
+            bands = _get_colour_equation_bands(system, output_bands[label])
+        elif label == gaia_label and not is_gaia_in_input:
+            bands = []  # Only required by the error correction
+        else:
+            continue
+        bands = bands + ['G'] if error_correction and label == gaia_label else bands
+        computed_bands[label] = [band for band in system.get_bands() if band in bands]
+    return computed_bands
+
+
+@lru_cache(maxsize=None)
+def _get_photometry_generator(system_names: tuple, bp_model: str, rp_model: str,
+                              computed_bands: tuple = ()) -> MultiSyntheticPhotometryGenerator:
+    """
+    Get the photometry generator for the given photometric systems and load their sampled bases. Generators are cached,
+        so each process loads the bases of a set of systems only once.
+
+    Args:
+        system_names (tuple): Names of the photometric systems.
+        bp_model (str): The bp model.
+        rp_model (str): The rp model.
+        computed_bands (tuple): Pairs of system label and bands to compute for the systems restricted to some bands.
+
+    Returns:
+        MultiSyntheticPhotometryGenerator: The photometry generator.
+    """
+    phot_generator = MultiSyntheticPhotometryGenerator(_get_systems_from_names(system_names), bp_model=bp_model,
+                                                       rp_model=rp_model, bands=dict(computed_bands))
+    phot_generator._get_sampled_bases()
+    return phot_generator
+
+
+def _generate_photometry_in_worker(parsed_input_data: pd.DataFrame, extension: str, system_names: tuple,
+                                   requested_system_names: list, is_gaia_in_input: bool, error_correction: bool,
+                                   additional_columns: dict, truncation: bool, dtype: np.dtype, bp_model: str,
+                                   rp_model: str, computed_bands: tuple = (), output_bands: dict = None,
+                                   outputs: set = None) -> pd.DataFrame:
+    """
+    Generate the synthetic photometry of a chunk of sources in a worker process.
+
+    Args:
+        parsed_input_data (DataFrame): Parsed input data of the chunk.
+        extension (str): Extension of the input.
+        system_names (tuple): Names of the photometric systems computed by the generator.
+        requested_system_names (list): Names of the photometric systems requested.
+        is_gaia_in_input (bool): Whether Gaia DR3 is in the requested systems.
+        error_correction (bool): Whether to apply the error correction.
+        additional_columns (dict): Additional columns to include in the output.
+        truncation (bool): Toggle truncation of the set of bases.
+        dtype (dtype): Floating point type of the synthetic photometry.
+        bp_model (str): The bp model.
+        rp_model (str): The rp model.
+        computed_bands (tuple): Pairs of system label and bands to compute for the systems restricted to some bands.
+        output_bands (dict): Bands to include in the output for the systems restricted to some bands.
+        outputs (set): Quantities to include in the output. If not given, all of them are included.
+
+    Returns:
+        DataFrame: The synthetic photometry of the chunk.
+    """
+    phot_generator = _get_photometry_generator(system_names, bp_model, rp_model, computed_bands)
+    internal_phot_system = phot_generator.photometric_system
+    photometric_system = [system for system in internal_phot_system if system.get_system_name() in
+                          requested_system_names]
+    return __generate_photometry(parsed_input_data, extension, phot_generator, photometric_system,
+                                 internal_phot_system, is_gaia_in_input, error_correction, additional_columns,
+                                 truncation, dtype, disable_info=True, output_bands=output_bands, outputs=outputs)
+
+
+def __generate_photometry(parsed_input_data: pd.DataFrame, extension: str,
+                          phot_generator: MultiSyntheticPhotometryGenerator,
+                          photometric_system: Union[list, PhotometricSystem], internal_phot_system: list,
+                          is_gaia_in_input: bool, error_correction: bool, additional_columns: dict, truncation: bool,
+                          dtype: np.dtype, disable_info: bool = False, output_bands: dict = None,
+                          outputs: set = None) -> pd.DataFrame:
+    """
+    Generate the synthetic photometry of the parsed input sources, including the colour equations, the error correction
+        (if requested) and the additional columns.
+
+    Args:
+        parsed_input_data (DataFrame): Parsed input data.
+        extension (str): Extension of the input.
+        phot_generator (MultiSyntheticPhotometryGenerator): Generator for the internal photometric systems.
+        photometric_system (list/PhotometricSystem): Photometric system or list of photometric systems requested.
+        internal_phot_system (list): Photometric systems computed by the generator.
+        is_gaia_in_input (bool): Whether Gaia DR3 is in the requested systems.
+        error_correction (bool): Whether to apply the error correction.
+        additional_columns (dict): Additional columns to include in the output.
+        truncation (bool): Toggle truncation of the set of bases.
+        dtype (dtype): Floating point type of the synthetic photometry.
+        disable_info (bool): Whether to disable the progress bar.
+        output_bands (dict): Bands to include in the output for the systems restricted to some bands.
+        outputs (set): Quantities to include in the output. If the flux errors are not included, they are not
+            computed. If not given, all of them are included.
+
+    Returns:
+        DataFrame: The synthetic photometry.
+    """
     additional_data = parsed_input_data[list(additional_columns.keys())]
-    # Generate photometry
-    phot_generator = MultiSyntheticPhotometryGenerator(internal_phot_system, bp_model=bp_model, rp_model=rp_model)
-    photometry_df = phot_generator.generate(parsed_input_data, extension, output_file=None, output_format=None,
-                                            save_file=False, truncation=truncation)
-    photometry_df = _apply_colour_equation(photometry_df, photometric_system=internal_phot_system, save_file=False,
-                                           disable_info=True)
+    # The post-processing works on the arrays of the photometry, the DataFrame is only built at the end
+    photometry = phot_generator._generate_arrays(parsed_input_data, truncation=truncation, dtype=dtype,
+                                                 disable_info=disable_info,
+                                                 with_error=outputs is None or 'flux_error' in outputs)
+    _apply_colour_equation_to_arrays(photometry)
     if error_correction:
-        photometry_df = _apply_error_correction(photometry_df, photometric_system=photometric_system, save_file=False,
-                                                disable_info=True)
+        photometric_system = photometric_system if isinstance(photometric_system, list) else [photometric_system]
+        _apply_error_correction_to_arrays(photometry, photometric_system)
         if not is_gaia_in_input:  # Remove Gaia_DR3_Vega system from the final result
-            gaia_label = gaia_system.get_system_label()
-            gaia_columns = [column for column in photometry_df if column.startswith(gaia_label)]
-            photometry_df = photometry_df.drop(columns=gaia_columns)
+            photometry.remove_system(PhotometricSystem.Gaia_DR3_Vega.get_system_label())
+    # Remove the bands only computed for the colour equation or the error correction
+    for label, bands in (output_bands if output_bands else dict()).items():
+        photometry.select_bands(label, bands)
+    # The colour equation and the error correction are applied in double precision
+    photometry_df = photometry.to_data_frame(dtype=dtype, variables=outputs)
     additional_data = additional_data[[c for c in additional_data.columns if c not in photometry_df.columns]]
-    photometry_df = pd.concat([photometry_df, additional_data], axis=1)
+    for column in additional_data.columns:
+        photometry_df[column] = additional_data[column].array
     photometry_df = cast_output(photometry_df)
-    # Save data
-    output_data = PhotometryData(photometry_df)
-    output_data.save(save_file, output_path, output_file, output_format, extension)
-    return _cast(photometry_df)
+    return photometry_df
@@ -5,10 +5,13 @@ Module for the parent class of the standardised and regular photometric systems.
 """
 import re
 from configparser import ConfigParser
+from copy import copy
 from glob import glob
 from os import remove
 from os.path import exists, split, join
 
+import numpy as np
+
 from gaiaxpy.config.paths import config_ini_file
 from gaiaxpy.core.config import (get_filter_version_from_config, replace_file_name, get_file_path,
                                  ADDITIONAL_SYSTEM_PREFIX)
@@ -17,9 +20,16 @@ from gaiaxpy.core.satellite import BANDS
 from gaiaxpy.core.version import __version__
 from gaiaxpy.core.xml_utils import get_file_root, parse_array, get_array_text, get_xp_sampling_matrix, get_xp_merge
 from .config import _CFG_FILE_PATH, _ADDITIONAL_SYSTEM_FILES_REGEX
+from .filter_bundle import load_bundled_filter
 
 
 class InternalPhotometricSystem(object):
+    """
+    Photometric system defined by a filter file. The filter file is located and read the first time the bands,
+        zero-points, offsets or tables of the system are needed, and the values read are kept for later uses. The
+        values are read from the compiled filter bundle of the filters directory when it is up to date with the filter
+        file, and parsed from the XML file otherwise.
+    """
 
     def __init__(self, name: str, config_file: str = None, bp_model: str = 'v375wi', rp_model: str = 'v142r'):
         self.label = _get_system_label(name)
@@ -27,15 +37,57 @@ class InternalPhotometricSystem(object):
         self.__set_version(config_file)
         config_file = config_ini_file if not config_file else config_file
         self.config_file = config_file
-        self.filter_file = None
-        self._set_file(bp_model=bp_model, rp_model=rp_model)
-        self.bands = None
-        self.zero_points = None
-        self._load_xpzeropoint_from_xml()
-        self.offsets = None
-        self._load_offset_from_xml()
+        self.bp_model = bp_model
+        self.rp_model = rp_model
+        self._filter_file = None
+        self._bands = None
+        self._zero_points = None
+        self._offsets = None
+        self._xp_sampling = None
+        self._xp_merge = None
+        self._bundled_arrays = None
         self.name = name
 
+    @property
+    def filter_file(self):
+        if self._filter_file is None:
+            self._set_file(bp_model=self.bp_model, rp_model=self.rp_model)
+        return self._filter_file
+
+    @filter_file.setter
+    def filter_file(self, filter_file):
+        self._filter_file = filter_file
+
+    @property
+    def bands(self):
+        if self._bands is None:
+            self._load_xpzeropoint_from_xml()
+        return self._bands
+
+    @bands.setter
+    def bands(self, bands):
+        self._bands = bands
+
+    @property
+    def zero_points(self):
+        if self._zero_points is None:
+            self._load_xpzeropoint_from_xml()
+        return self._zero_points
+
+    @zero_points.setter
+    def zero_points(self, zero_points):
+        self._zero_points = zero_points
+
+    @property
+    def offsets(self):
+        if self._offsets is None:
+            self._load_offset_from_xml()
+        return self._offsets
+
+    @offsets.setter
+    def offsets(self, offsets):
+        self._offsets = offsets
+
     def set_bands(self, bands):
         """
         Set the bands of the photometric system.
@@ -152,51 +204,116 @@ class InternalPhotometricSystem(object):
         _validate_path(actual_path)
         self.filter_file = actual_path[0]
 
-    def _load_offset_from_xml(self):
+    def _get_bundled_arrays(self):
         """
-        Load the offset of a standard photometric system from the filter XML file.
+        Get the arrays of the photometric system from the filter bundle.
 
         Returns:
-            ndarray: Array of offsets.
+            dict: The arrays of the system, empty if they are not available in an up-to-date bundle.
         """
-        x_root = get_file_root(self.filter_file)
+        if self._bundled_arrays is None:
+            bundled_arrays = load_bundled_filter(self.filter_file, get_file_path(self.config_file))
+            self._bundled_arrays = bundled_arrays if bundled_arrays is not None else dict()
+        return self._bundled_arrays
+
+    def _load_offset_from_xml(self, x_root=None):
+        """
+        Load the offset of a standard photometric system from the filter XML file.
+
+        Args:
+            x_root (Element): Root of the filter XML file, if it has already been parsed.
+        """
+        bundled_arrays = self._get_bundled_arrays() if x_root is None else None
+        if bundled_arrays:
+            self.offsets = bundled_arrays['offsets']
+            return
+        x_root = get_file_root(self.filter_file) if x_root is None else x_root
         self.offsets = parse_array(x_root, 'fluxBias')
 
     def _load_xpzeropoint_from_xml(self):
         """
-        Load the zero-points for each band from the filter XML file.
-
-        Returns:
-            ndarray: Array of zero-points.
+        Load the zero-points and the bands from the filter XML file. The offsets are read from the same parsed file.
         """
+        bundled_arrays = self._get_bundled_arrays()
+        if bundled_arrays:
+            self.zero_points = bundled_arrays['zero_points']
+            self.bands = bundled_arrays['bands'].tolist()
+            return
         x_root = get_file_root(self.filter_file)
         self.zero_points = parse_array(x_root, 'zeropoints')
         self.bands, _ = get_array_text(x_root, 'bands')
+        if self._offsets is None:
+            self._load_offset_from_xml(x_root)
 
     def load_xpsampling_from_xml(self):
         """
-        Load the XpSampling table from the XML filter file.
+        Load the XpSampling table from the XML filter file. The table is read only once, the arrays returned are
+            read-only.
 
         Returns:
             dict: A dictionary containing the XpSampling table with one entry for BP and one for RP.
         """
-        x_root = get_file_root(self.filter_file)
-        _, n_bands = get_array_text(x_root, 'bands')
+        if self._xp_sampling is None:
+            bundled_arrays = self._get_bundled_arrays()
+            if bundled_arrays:
+                self._xp_sampling = {band: bundled_arrays[f'{band}_sampling'] for band in BANDS}
+            else:
+                x_root = get_file_root(self.filter_file)
+                _, n_bands = get_array_text(x_root, 'bands')
 
-        bp_sampling = get_xp_sampling_matrix(x_root, 'bp', n_bands)
-        rp_sampling = get_xp_sampling_matrix(x_root, 'rp', n_bands)
+                bp_sampling = get_xp_sampling_matrix(x_root, 'bp', n_bands)
+                rp_sampling = get_xp_sampling_matrix(x_root, 'rp', n_bands)
 
-        xp_sampling = dict(zip(BANDS, [bp_sampling, rp_sampling]))
-        return xp_sampling
+                self._xp_sampling = dict(zip(BANDS, _read_only([bp_sampling, rp_sampling])))
+        return dict(self._xp_sampling)
 
     def load_xpmerge_from_xml(self):
         """
-        Load the XpMerge table from the filter XML file.
+        Load the XpMerge table from the filter XML file. The table is read only once, the arrays returned are
+            read-only.
 
         Returns:
             ndarray: Array containing the sampling grid values.
             dict: A dictionary containing the XpMerge table with one entry for BP and one for RP.
         """
-        x_root = get_file_root(self.filter_file)
-        sampling_grid, bp_merge, rp_merge = get_xp_merge(x_root)
-        return sampling_grid, dict(zip(BANDS, [bp_merge, rp_merge]))
+        if self._xp_merge is None:
+            bundled_arrays = self._get_bundled_arrays()
+            if bundled_arrays:
+                self._xp_merge = bundled_arrays['sampling_grid'], {band: bundled_arrays[f'{band}_merge']
+                                                                   for band in BANDS}
+            else:
+                x_root = get_file_root(self.filter_file)
+                sampling_grid, bp_merge, rp_merge = _read_only(get_xp_merge(x_root))
+                self._xp_merge = sampling_grid, dict(zip(BANDS, [bp_merge, rp_merge]))
+        sampling_grid, xp_merge = self._xp_merge
+        return sampling_grid, dict(xp_merge)
+
+    def _select_bands(self, bands):
+        """
+        Get a copy of the photometric system restricted to some of its bands. The zero-points, offsets and tables of
+            the copy only contain the values of the selected bands, so that the photometry in the other bands is not
+            computed.
+
+        Args:
+            bands (list): Bands to keep, all of them must be bands of the system.
+
+        Returns:
+            InternalPhotometricSystem: The photometric system restricted to the given bands.
+        """
+        indices = [self.get_bands().index(band) for band in bands]
+        sampling_grid, xp_merge = self.load_xpmerge_from_xml()
+        selected_system = copy(self)
+        selected_system.bands = list(bands)
+        selected_system.zero_points = self.get_zero_points()[indices]
+        selected_system.offsets = self.get_offsets()[indices]
+        selected_system._xp_sampling = {band: matrix[:, indices] for band, matrix in
+                                        self.load_xpsampling_from_xml().items()}
+        selected_system._xp_merge = sampling_grid[indices], {band: np.asarray(weights)[indices] for band, weights in
+                                                             xp_merge.items()}
+        return selected_system
+
+
+def _read_only(arrays):
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
@@ -1,15 +1,19 @@
 from sys import stdout
 
+import numpy as np
 from tqdm import tqdm
 
+from gaiaxpy.core.custom_errors import NoBandsAvailableError
 from gaiaxpy.core.generic_variables import pbar_colour, pbar_units, pbar_message
-from gaiaxpy.spectrum.multi_synthetic_photometry import MultiSyntheticPhotometry
+from gaiaxpy.core.satellite import BANDS
+from gaiaxpy.spectrum.synthetic_photometry_arrays import SyntheticPhotometryArrays
+from gaiaxpy.spectrum.xp_spectra_batch import get_batches
 from .synthetic_photometry_generator import SyntheticPhotometryGenerator
 
 
 class MultiSyntheticPhotometryGenerator(SyntheticPhotometryGenerator):
 
-    def __init__(self, photometric_system, bp_model, rp_model):
+    def __init__(self, photometric_system, bp_model, rp_model, bands=None):
         self.function_label = 'photsystem'
         if not photometric_system:
             raise ValueError('Photometric system list cannot be empty.')
@@ -17,29 +21,119 @@ class MultiSyntheticPhotometryGenerator(SyntheticPhotometryGenerator):
         self.system_label = [phot_system.get_system_label() for phot_system in self.photometric_system]
         self.bp_model = bp_model
         self.rp_model = rp_model
+        # Bands to compute for each system label, the systems not included are computed in all their bands
+        self.bands = dict(bands) if bands else dict()
+        self._internal_systems = None
+        self._sampled_bases = None
+        self._fused_design_matrices = None
 
-    def generate(self, parsed_input_data, extension, output_file, output_format, save_file, truncation):
+    def _get_internal_systems(self):
+        """
+        Get the internal photometric systems restricted to the bands to compute.
+
+        Returns:
+            list: The internal photometric system of each photometric system.
+        """
+        if self._internal_systems is None:
+            self._internal_systems = [system.value._select_bands(self.bands[label]) if label in self.bands else
+                                      system.value for system, label in zip(self.photometric_system, self.system_label)]
+        return self._internal_systems
+
+    def _get_sampled_bases(self):
+        """
+        Get the sampled basis functions and the merge weights of each photometric system. They are loaded once and
+            shared by all the calls to generate.
+
+        Returns:
+            list: A tuple (sampled basis functions, merge weights) per photometric system.
+        """
+        if self._sampled_bases is None:
+            internal_systems = self._get_internal_systems()
+            xp_sampling_list = [system.load_xpsampling_from_xml() for system in internal_systems]
+            xp_sampling_grid_xp_merge_tuples_list = [system.load_xpmerge_from_xml() for system in internal_systems]
+            self._sampled_bases = [(self._get_sampled_basis_functions(xp_sampling, xp_sampling_grid), xp_merge) for
+                                   xp_sampling, (xp_sampling_grid, xp_merge) in
+                                   zip(xp_sampling_list, xp_sampling_grid_xp_merge_tuples_list)]
+        return self._sampled_bases
+
+    def _get_fused_design_matrices(self):
+        """
+        Get the design matrices of all the photometric systems concatenated into one design matrix per band, with the
+            merge weights of each system applied to its columns. Bands shared by several systems are only kept once, so
+            that they are sampled once and get identical values in all of them. The matrices are built once and shared
+            by all the calls to generate.
+
+        Returns:
+            (tuple): tuple containing:
+                dict: The concatenated design matrix of each band.
+                list: The indices of the columns of the concatenated design matrices corresponding to each photometric
+                    system.
+        """
+        if self._fused_design_matrices is None:
+            sampled_bases = self._get_sampled_bases()
+            weighted_matrices = [{band: sampled_basis_func[band].get_design_matrix() * np.asarray(xp_merge[band])
+                                  for band in BANDS} for sampled_basis_func, xp_merge in sampled_bases]
+            stacked_matrix = np.hstack([np.vstack([matrices[band] for band in BANDS])
+                                        for matrices in weighted_matrices])
+            _, first_columns, inverse = np.unique(stacked_matrix, axis=1, return_index=True, return_inverse=True)
+            # Keep the unique columns in their original order
+            order = np.argsort(first_columns)
+            positions = np.empty_like(order)
+            positions[order] = np.arange(len(order))
+            kept_columns = first_columns[order]
+            n_rows = np.cumsum([0] + [weighted_matrices[0][band].shape[0] for band in BANDS])
+            design_matrices = {band: np.ascontiguousarray(stacked_matrix[start:stop, kept_columns])
+                               for band, start, stop in zip(BANDS, n_rows[:-1], n_rows[1:])}
+            bounds = np.cumsum([0] + [matrices[BANDS.bp].shape[1] for matrices in weighted_matrices])
+            columns = [positions[inverse.ravel()[start:stop]] for start, stop in zip(bounds[:-1], bounds[1:])]
+            self._fused_design_matrices = design_matrices, columns
+        return self._fused_design_matrices
+
+    def generate(self, parsed_input_data, extension, output_file, output_format, save_file, truncation,
+                 dtype=np.float64, disable_info=False):
+        return self._generate_arrays(parsed_input_data, truncation, dtype=dtype,
+                                     disable_info=disable_info).to_data_frame()
+
+    def _generate_arrays(self, parsed_input_data, truncation, dtype=np.float64, disable_info=False, with_error=True):
+        """
+        Generate the synthetic photometry of the input sources in all the photometric systems.
+
+        Args:
+            parsed_input_data (DataFrame): Parsed input data.
+            truncation (bool): Toggle truncation of the set of bases.
+            dtype (dtype): Floating point type of the synthetic photometry.
+            disable_info (bool): Whether to disable the progress bar.
+            with_error (bool): Whether to propagate the covariances to compute the flux errors. If False, the flux
+                errors are set to NaN.
+
+        Returns:
+            SyntheticPhotometryArrays: The synthetic photometry.
+        """
         __FUNCTION_KEY = 'photometry'
         # Recover attributes
         systems = self.photometric_system
-        internal_systems = [system.value for system in systems]
-        # Generate XP variables
-        xp_sampling_list = [system.load_xpsampling_from_xml() for system in internal_systems]
-        xp_sampling_grid_xp_merge_tuples_list = [system.load_xpmerge_from_xml() for system in internal_systems]
-        xp_sampling_grid_list = [element[0] for element in xp_sampling_grid_xp_merge_tuples_list]
-        xp_merge_list = [element[1] for element in xp_sampling_grid_xp_merge_tuples_list]
-        # Get basis functions list
-        sampled_basis_func_list = [self._get_sampled_basis_functions(xp_sampling, xp_sampling_grid) for
-                                   xp_sampling, xp_sampling_grid in zip(xp_sampling_list, xp_sampling_grid_list)]
-        # One list per system
-        photometry_list_of_lists = [self._create_photometry_list(parsed_input_data, phot_system,
-                                                                 sampled_basis_func, truncation, xp_merge)
-                                    for phot_system, sampled_basis_func, xp_merge
-                                    in zip(systems, sampled_basis_func_list, xp_merge_list)]
-        # Now the first list contains the photometries in all systems for the first source_id, and so on.
-        rearranged_photometry_list = [sublist for sublist in tqdm(zip(*photometry_list_of_lists),
-                                                                  desc=pbar_message[__FUNCTION_KEY],
-                                                                  total=len(parsed_input_data),
-                                                                  unit=pbar_units[__FUNCTION_KEY], leave=False,
-                                                                  colour=pbar_colour, file=stdout)]
-        return MultiSyntheticPhotometry(systems, rearranged_photometry_list)._generate_output_df()
+        design_matrices, columns = self._get_fused_design_matrices()
+        # The weighted fluxes and errors of every band of every system are sampled with one product per band
+        batches = get_batches(parsed_input_data, truncation=truncation, dtype=dtype)
+        has_band = {band: batches[band].has_covariance for band in BANDS}
+        if not (has_band[BANDS.bp] | has_band[BANDS.rp]).all():
+            raise NoBandsAvailableError()
+        n_sources = len(parsed_input_data)
+        with tqdm(total=n_sources, desc=pbar_message[__FUNCTION_KEY], unit=pbar_units[__FUNCTION_KEY], leave=False,
+                  colour=pbar_colour, file=stdout, disable=disable_info) as progress_bar:
+            # The merge weights are already applied to the sampled values
+            flux = batches[BANDS.bp].sample_flux(design_matrices[BANDS.bp]) + batches[BANDS.rp].sample_flux(
+                design_matrices[BANDS.rp])
+            error = np.hypot(batches[BANDS.bp].sample_error(design_matrices[BANDS.bp]),
+                             batches[BANDS.rp].sample_error(design_matrices[BANDS.rp])) if with_error else \
+                np.full_like(flux, np.nan)
+            # Photometry is only defined for the sources with both bands
+            has_one_band = has_band[BANDS.bp] != has_band[BANDS.rp]
+            flux[has_one_band] = np.nan
+            error[has_one_band] = np.nan
+            photometry = SyntheticPhotometryArrays.from_fluxes(parsed_input_data['source_id'].tolist(), systems,
+                                                               [flux[:, system_columns] for system_columns in columns],
+                                                               [error[:, system_columns] for system_columns in columns],
+                                                               internal_systems=self._get_internal_systems())
+            progress_bar.update(n_sources)
+        return photometry
@@ -12,6 +12,7 @@ from aenum import Enum
 
 from gaiaxpy.core.generic_functions import _get_built_in_systems, _is_built_in_system
 from .config import _CFG_FILE_PATH, create_config, get_additional_filters_names, contains_filter_key
+from .filter_bundle import compile_filter_bundle
 from .regular_photometric_system import RegularPhotometricSystem
 from .standardised_photometric_system import StandardisedPhotometricSystem
 from .utils import get_yes_no_answer
@@ -87,6 +88,23 @@ PhotometricSystem = AutoName('PhotometricSystem', system_tuples)
 PhotometricSystem.get_available_systems = get_available_systems
 
 
+def _get_systems_from_names(system_names):
+    """
+    Get the photometric systems with the given names. Enum members cannot be sent to other processes, so worker
+    processes receive the names of the systems and use this function to recover them.
+
+    Args:
+        system_names (list): Names of the photometric systems.
+
+    Returns:
+        list: The photometric systems.
+    """
+    # Systems loaded after this module was imported are only available in an updated enumeration
+    systems_enum = PhotometricSystem if all(name in PhotometricSystem.__members__ for name in system_names) else \
+        AutoName('PhotometricSystem', _get_system_tuples())
+    return [systems_enum[name] for name in system_names]
+
+
 def get_current_filters_path():
     _config_parser = ConfigParser()
     _config_parser.read(_CFG_FILE_PATH)
@@ -130,7 +148,27 @@ def __load_additional_systems(_filters_path=None, config_file=None):
                           yes_args=_filters_path)
     else:
         create_config(_filters_path, config_file)
-    return AutoName('PhotometricSystem', _get_system_tuples())
+    system_tuples = _get_system_tuples()
+    # Systems are loaded lazily, locate the new filter files now so that invalid directories are reported here
+    for name, system in system_tuples:
+        if not _is_built_in_system(name):
+            _ = system.filter_file
+    return AutoName('PhotometricSystem', system_tuples)
+
+
+def compile_additional_systems():
+    """
+    Compile the filter files of the loaded additional photometric systems into a binary bundle stored in the directory
+    of the additional filters. The bundle is then used instead of parsing the XML files of the systems, except for the
+    filter files modified after compiling it.
+
+    Returns:
+        str: Path to the bundle.
+    """
+    if not (exists(_CFG_FILE_PATH) and contains_filter_key(_CFG_FILE_PATH)):
+        raise ValueError('No additional systems have been loaded. Use load_additional_systems to load them.')
+    filter_files = [system.filter_file for name, system in _get_system_tuples() if not _is_built_in_system(name)]
+    return compile_filter_bundle(filter_files, get_current_filters_path())
 
 
 def remove_additional_systems():
@@ -17,7 +17,6 @@ class StandardisedPhotometricSystem(InternalPhotometricSystem):
             name (str): Name of the PhotometricSystem
         """
         super().__init__(name, config_file)
-        self._load_offset_from_xml()
 
     def _correct_flux(self, flux):
         flux_corr = flux + self.offsets
@@ -75,7 +75,7 @@ class FileReader:
             return [self.additional_columns[c][0] for c in self.additional_columns.keys() if c not in
                     self.required_columns]
 
-    def read(self):
+    def __get_parser(self):
         parser_arguments = {
             'requested_columns': self.requested_columns,
             'additional_columns': self.additional_columns,
@@ -84,9 +84,27 @@ class FileReader:
         if hasattr(self, 'address') and hasattr(self, 'port'):
             parser_arguments['address'] = self.address
             parser_arguments['port'] = self.port
-        data, extension = self.fps.parser(**parser_arguments).parse_file(self.file, disable_info=self.disable_info)
+        return self.fps.parser(**parser_arguments)
+
+    def read(self):
+        data, extension = self.__get_parser().parse_file(self.file, disable_info=self.disable_info)
         return cast_output(data), extension
 
+    def read_chunks(self, chunk_size):
+        """
+        Read the file in chunks of rows. AVRO and CSV/ECSV files are read incrementally, other formats are read in full
+            and then split.
+
+        Args:
+            chunk_size (int): Maximum number of rows in each chunk.
+
+        Returns:
+            generator: Generator of tuples containing a DataFrame with the rows in the chunk and the file extension.
+        """
+        for data, extension in self.__get_parser().parse_file_chunks(self.file, chunk_size,
+                                                                     disable_info=self.disable_info):
+            yield cast_output(data), extension
+
 
 class FileParserSelector(object):
 
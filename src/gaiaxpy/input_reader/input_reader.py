@@ -4,7 +4,7 @@ from pathlib import Path
 import pandas as pd
 
 from .dataframe_reader import DataFrameReader
-from .file_reader import FileParserSelector
+from .file_reader import FileParserSelector, FileReader
 from .hdfs_reader import HDFSReader
 from .list_reader import ListReader
 from .local_file_reader import LocalFileReader
@@ -30,8 +30,7 @@ class InputReader(object):
         self.user = user
         self.password = password
 
-    def read(self):
-        content = self.content
+    def __get_reader(self, content):
         function = self.function
         truncation = self.truncation
         disable_info = self.disable_info
@@ -58,6 +57,40 @@ class InputReader(object):
                                 disable_info=disable_info)
         else:
             raise ValueError('The input provided does not match any of the expected input types.')
-        parsed_data, extension = reader.read()
+        return reader
+
+    def read(self):
+        parsed_data, extension = self.__get_reader(self.content).read()
         extension = default_extension if extension is None else extension
         return parsed_data, extension
+
+    def read_chunks(self, chunk_size):
+        """
+        Read the input in chunks of at most chunk_size sources, so that the whole input does not need to be kept in
+            memory. DataFrames and lists of source IDs are split before being read, AVRO and CSV/ECSV files are read
+            incrementally. Other files and ADQL queries are read in full and then split.
+
+        Args:
+            chunk_size (int): Maximum number of sources in each chunk.
+
+        Returns:
+            generator: Generator of tuples containing a DataFrame with the parsed data of the sources in the chunk
+                (indexed from zero) and the extension of the input.
+        """
+        content = self.content
+        if isinstance(content, (pd.DataFrame, list)):
+            # An empty input is passed to the reader so that it raises the corresponding error
+            rows = content.iloc if isinstance(content, pd.DataFrame) else content
+            contents = (rows[start:start + chunk_size] for start in range(0, max(len(content), 1), chunk_size))
+            chunks = (self.__get_reader(content_chunk).read() for content_chunk in contents)
+        else:
+            reader = self.__get_reader(content)
+            if isinstance(reader, FileReader):
+                chunks = reader.read_chunks(chunk_size)
+            else:
+                parsed_data, extension = reader.read()
+                chunks = ((parsed_data.iloc[start:start + chunk_size], extension) for start in
+                          range(0, len(parsed_data), chunk_size))
+        for parsed_data, extension in chunks:
+            extension = default_extension if extension is None else extension
+            yield parsed_data.reset_index(drop=True), extension
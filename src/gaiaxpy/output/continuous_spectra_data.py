@@ -28,13 +28,14 @@ class ContinuousSpectraData(OutputData):
     def __init__(self, data):
         super().__init__(data, None)
 
-    def _save_avro(self, output_path, output_file):
+    def _save_avro(self, output_path, output_file, append=False):
         """
         Save the output spectra in AVRO format.
 
         Args:
             output_path (str): Path where to save the file.
             output_file (str): Name of the output file.
+            append (bool): Whether to add the spectra to an existing file.
         """
 
         def _generate_avro_schema(_spectra_dicts):
@@ -79,39 +80,44 @@ class ContinuousSpectraData(OutputData):
         parsed_schema, spectra_dicts = _generate_avro_schema(spectra_dicts)
         Path(output_path).mkdir(parents=True, exist_ok=True)
         output_path = join(output_path, f'{output_file}.avro')
-        with open(output_path, 'wb') as output:
+        with open(output_path, 'a+b' if append else 'wb') as output:
             writer(output, parsed_schema, spectra_dicts)
 
-    def _save_csv(self, output_path, output_file):
+    def _save_csv(self, output_path, output_file, append=False):
         """
         Save the output spectra in CSV format.
 
         Args:
             output_path (str): Path where to save the file.
             output_file (str): Name of the output file.
+            append (bool): Whether to add the spectra to an existing file.
         """
         spectra_df = self.data
         array_columns = [column for column in spectra_df.columns if isinstance(spectra_df[column].iloc[0], np.ndarray)]
         spectra_df[array_columns] = spectra_df[array_columns].apply(lambda col: col.apply(tuple)).astype('str')
         Path(output_path).mkdir(parents=True, exist_ok=True)
         output_path = join(output_path, f'{output_file}.csv')
-        spectra_df.to_csv(output_path, index=False)
+        spectra_df.to_csv(output_path, index=False, mode='a' if append else 'w', header=not append)
 
-    def _save_ecsv(self, output_path, output_file):
+    def _save_ecsv(self, output_path, output_file, append=False):
         """
         Save the output spectra in ECSV format.
 
         Args:
             output_path (str): Path where to save the file.
             output_file (str): Name of the output file.
+            append (bool): Whether to add the spectra to an existing file.
         """
         spectra_df = self.data
         array_columns = [column for column in spectra_df.columns if isinstance(spectra_df[column].iloc[0], np.ndarray)]
         header_lines = _build_ecsv_header(spectra_df)
         spectra_df[array_columns] = spectra_df[array_columns].apply(lambda col: col.apply(tuple)).astype('str')
         Path(output_path).mkdir(parents=True, exist_ok=True)
-        spectra_df.to_csv(join(output_path, f'{output_file}.ecsv'), index=False)
-        _add_ecsv_header(header_lines, output_path, output_file)
+        spectra_df.to_csv(join(output_path, f'{output_file}.ecsv'), index=False, mode='a' if append else 'w',
+                          header=not append)
+        # The header is only written with the first rows
+        if not append:
+            _add_ecsv_header(header_lines, output_path, output_file)
 
     def _save_fits(self, output_path, output_file):
         """
@@ -13,6 +13,9 @@ from gaiaxpy.file_parser.parse_generic import InvalidExtensionError
 
 set_printoptions(legacy='1.21')
 
+# Formats that support adding rows to an existing file
+appendable_formats = ['avro', 'csv', 'ecsv']
+
 
 def _initialise_header():
     return ["# %ECSV 1.0", "# ---", "# delimiter: ','", "# datatype:"]
@@ -28,6 +31,22 @@ def _load_header_dict():
     return header_dict
 
 
+def validate_append_format(output_format):
+    """
+    Check that data can be appended to an existing file in the given format.
+
+    Args:
+        output_format (str): Format of the output file.
+
+    Raises:
+        ValueError: If data cannot be appended to files in the given format.
+    """
+    if standardise_extension(output_format) not in appendable_formats:
+        valid = ', '.join(appendable_formats)
+        raise ValueError(f"Output can only be appended to files in one of the formats: {valid}. Format "
+                         f"'{output_format}' was given.")
+
+
 def _build_regular_header(columns):
     header_dict = _load_header_dict()
     header = _initialise_header()
@@ -48,7 +67,7 @@ class OutputData(object):
         self.data = data.copy()
         self.positions = positions
 
-    def save(self, save_file, output_path, output_file, output_format, extension):
+    def save(self, save_file, output_path, output_file, output_format, extension, append=False):
         """
         Save the output data.
 
@@ -58,20 +77,27 @@ class OutputData(object):
             output_file (str): Name of the output file.
             output_format (str): Format of the output file.
             extension (str): Format of the original input file.
+            append (bool): Whether to add the data to the end of an existing file (written by a previous call with the
+                same arguments) instead of replacing it. Only available for AVRO, CSV and ECSV files.
+
+        Raises:
+            ValueError: If append is True and data cannot be appended to files in the output format.
         """
         if save_file:
             if output_file is None:
                 raise ValueError('The parameter output_file cannot be None.')
             if output_format is None:
                 output_format = extension
-            print('Saving file...', end='\r')
             output_format = standardise_extension(output_format)
+            if append:
+                validate_append_format(output_format)
+            print('Saving file...', end='\r')
             if output_format == 'avro':
-                self._save_avro(output_path, output_file)
+                self._save_avro(output_path, output_file, append=append)
             elif output_format == 'csv':
-                self._save_csv(output_path, output_file)
+                self._save_csv(output_path, output_file, append=append)
             elif output_format == 'ecsv':
-                self._save_ecsv(output_path, output_file)
+                self._save_ecsv(output_path, output_file, append=append)
             elif output_format == 'fits':
                 self._save_fits(output_path, output_file)
             elif output_format == 'xml':
@@ -80,13 +106,13 @@ class OutputData(object):
                 raise InvalidExtensionError()
             print(f"Done! Output saved to path: {join(output_path, output_file + '.' + output_format)}", end='\r')
 
-    def _save_avro(self, output_path, output_file):
+    def _save_avro(self, output_path, output_file, append=False):
         raise NotImplementedError()
 
-    def _save_csv(self, output_path, output_file):
+    def _save_csv(self, output_path, output_file, append=False):
         raise NotImplementedError()
 
-    def _save_ecsv(self, output_path, output_file):
+    def _save_ecsv(self, output_path, output_file, append=False):
         raise NotImplementedError()
 
     def _save_fits(self, output_path, output_file):
@@ -21,13 +21,14 @@ class PhotometryData(OutputData):
     def __init__(self, data):
         super().__init__(data, None)
 
-    def _save_avro(self, output_path, output_file):
+    def _save_avro(self, output_path, output_file, append=False):
         """
         Save the output photometry in AVRO format.
 
         Args:
             output_path (str): Path where to save the file.
             output_file (str): Name of the output file.
+            append (bool): Whether to add the photometry to an existing file.
         """
 
         def build_field(keys):
@@ -46,35 +47,40 @@ class PhotometryData(OutputData):
         parsed_schema = parse_schema(schema)
         Path(output_path).mkdir(parents=True, exist_ok=True)
         output_path = join(output_path, f'{output_file}.avro')
-        with open(output_path, 'wb') as output:
+        with open(output_path, 'a+b' if append else 'wb') as output:
             writer(output, parsed_schema, phot_list)
 
-    def _save_csv(self, output_path, output_file):
+    def _save_csv(self, output_path, output_file, append=False):
         """
         Save the output photometry in CSV format.
 
         Args:
             output_path (str): Path where to save the file.
             output_file (str): Name of the output file.
+            append (bool): Whether to add the photometry to an existing file.
         """
         photometry_df = self.data
         Path(output_path).mkdir(parents=True, exist_ok=True)
         output_path = join(output_path, f'{output_file}.csv')
-        photometry_df.to_csv(output_path, index=False)
+        photometry_df.to_csv(output_path, index=False, mode='a' if append else 'w', header=not append)
 
-    def _save_ecsv(self, output_path, output_file):
+    def _save_ecsv(self, output_path, output_file, append=False):
         """
         Save the output photometry in ECSV format.
 
         Args:
             output_path (str): Path where to save the file.
             output_file (str): Name of the output file.
+            append (bool): Whether to add the photometry to an existing file.
         """
         photometry_df = self.data
-        header_lines = _build_photometry_header(photometry_df.columns)
         Path(output_path).mkdir(parents=True, exist_ok=True)
-        photometry_df.to_csv(join(output_path, f'{output_file}.ecsv'), index=False)
-        _add_ecsv_header(header_lines, output_path, output_file)
+        photometry_df.to_csv(join(output_path, f'{output_file}.ecsv'), index=False, mode='a' if append else 'w',
+                             header=not append)
+        # The header is only written with the first rows
+        if not append:
+            header_lines = _build_photometry_header(photometry_df.columns, photometry_df.dtypes)
+            _add_ecsv_header(header_lines, output_path, output_file)
 
     def _save_fits(self, output_path, output_file):
         """
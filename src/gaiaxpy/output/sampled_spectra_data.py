@@ -8,6 +8,7 @@ import warnings
 from os.path import join
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 from astropy.io import fits
 from astropy.io.votable.tree import Field, Param, Resource, VOTableFile
@@ -18,7 +19,7 @@ from numpy import ndarray
 
 from .output_data import OutputData
 from .utils import (_add_ecsv_header, _array_to_standard, _build_ecsv_header, _generate_fits_header,
-                    _get_sampling_dict, _load_header_dict, _get_col_subtype_len)
+                    _get_sampling_dict, _load_header_dict, _get_col_dtype, _get_col_subtype_len, _get_col_subtype_shape)
 
 try:
     from astropy.io.votable.tree import TableElement as ATable
@@ -26,18 +27,23 @@ except ImportError:
     from astropy.io.votable.tree import Table as ATable
 
 
+# Columns containing one 2D array per spectrum
+_MATRIX_COLUMNS = ('covariance_factor', 'banded_correlation')
+
+
 class SampledSpectraData(OutputData):
 
     def __init__(self, data, positions):
         super().__init__(data, positions)
 
-    def _save_avro(self, output_path, output_file):
+    def _save_avro(self, output_path, output_file, append=False):
         """
         Save the output spectra in AVRO format.
 
         Args:
             output_path (str): Path where to save the file.
             output_file (str): Name of the output file.
+            append (bool): Whether to add the spectra to an existing file.
         """
 
         def _save_avro_sampling(_positions, _output_path, _output_file):
@@ -73,7 +79,8 @@ class SampledSpectraData(OutputData):
                 list: A list of dictionaries with the modified input spectra according to the valid AVRO types.
             """
             field_to_type = {'source_id': 'long', 'xp': 'string', 'flux': 'string', 'flux_error': 'string',
-                             'correlation': 'string', 'standard_deviation': 'float'}
+                             'correlation': 'string', 'covariance_factor': 'string', 'banded_correlation': 'string',
+                             'standard_deviation': 'float'}
 
             def build_field(keys):
                 return [{'name': key, 'type': field_to_type[key]} for key in keys]
@@ -83,7 +90,9 @@ class SampledSpectraData(OutputData):
             # Spectrum fields to string
             for spectrum in _spectra_dicts:
                 for field, _type in field_to_type.items():
-                    if _type == 'string' and field in spectrum.keys() and not field == 'xp':
+                    if field in _MATRIX_COLUMNS and field in spectrum.keys():
+                        spectrum[field] = str(_array_to_standard(spectrum[field]))
+                    elif _type == 'string' and field in spectrum.keys() and not field == 'xp':
                         spectrum[field] = str(tuple(spectrum[field]))
             # Validate that records match the schema
             validate_many(_spectra_dicts, schema)
@@ -92,47 +101,55 @@ class SampledSpectraData(OutputData):
         data = self.data
         positions = self.positions
         Path(output_path).mkdir(parents=True, exist_ok=True)
-        _save_avro_sampling(positions, output_path, output_file)
+        if not append:
+            _save_avro_sampling(positions, output_path, output_file)
         # List with one dictionary per source
         spectra_dicts = data.to_dict('records')
         parsed_schema, spectra_dicts = _generate_avro_schema(spectra_dicts)
         output_path = join(output_path, f'{output_file}.avro')
-        with open(output_path, 'wb') as output:
+        # Fastavro adds the records to the existing blocks when the file is opened in append mode
+        with open(output_path, 'a+b' if append else 'wb') as output:
             writer(output, parsed_schema, spectra_dicts)
 
-    def _save_csv(self, output_path, output_file):
+    def _save_csv(self, output_path, output_file, append=False):
         """
         Save the output spectra in CSV format.
 
         Args:
             output_path (str): Path where to save the file.
             output_file (str): Name of the output file.
+            append (bool): Whether to add the spectra to an existing file.
         """
         data = self.data
         positions = self.positions
         modified_data = data.map(lambda x: _array_to_standard(x) if isinstance(x, ndarray) else x)
         Path(output_path).mkdir(parents=True, exist_ok=True)
-        modified_data.to_csv(join(output_path, f'{output_file}.csv'), index=False)
-        # Assume the sampling is the same for all spectra
-        pos = [str(_array_to_standard(positions))]
-        sampling_df = pd.DataFrame({'pos': pos})
-        sampling_df.to_csv(join(output_path, f'{output_file}_sampling.csv'), index=False)
+        modified_data.to_csv(join(output_path, f'{output_file}.csv'), index=False, mode='a' if append else 'w',
+                             header=not append)
+        if not append:
+            # Assume the sampling is the same for all spectra
+            pos = [str(_array_to_standard(positions))]
+            sampling_df = pd.DataFrame({'pos': pos})
+            sampling_df.to_csv(join(output_path, f'{output_file}_sampling.csv'), index=False)
 
-    def _save_ecsv(self, output_path, output_file):
+    def _save_ecsv(self, output_path, output_file, append=False):
         """
         Save the output spectra in ECSV format.
 
         Args:
             output_path (str): Path where to save the file.
             output_file (str): Name of the output file.
+            append (bool): Whether to add the spectra to an existing file.
         """
         data = self.data
         positions = self.positions
         modified_data = data.map(lambda x: _array_to_standard(x, 'ecsv') if isinstance(x, ndarray) else x)
-        header_lines = _build_ecsv_header(modified_data, positions)
         Path(output_path).mkdir(parents=True, exist_ok=True)
-        modified_data.to_csv(join(output_path, f'{output_file}.ecsv'), index=False)
-        _add_ecsv_header(header_lines, output_path, output_file)
+        modified_data.to_csv(join(output_path, f'{output_file}.ecsv'), index=False, mode='a' if append else 'w',
+                             header=not append)
+        # The header is only written with the first rows
+        if not append:
+            _add_ecsv_header(_build_ecsv_header(data, positions), output_path, output_file)
 
     def _save_fits(self, output_path, output_file):
         """
@@ -164,20 +181,31 @@ class SampledSpectraData(OutputData):
         units_dict = data_type.get_units()
         pos_len = len(positions)
         contains_none = _flux_contains_none(output_by_column_dict)
-        # D: double precision float
-        flux_format = 'PD()' if contains_none else f'{pos_len}D'
-        # E: single precision float
+        # D: double precision float, E: single precision float
+        float_format = {column: 'E' if _get_col_dtype(data, column) == np.float32 else 'D' for column in data.columns}
+        flux_format = f"P{float_format['flux']}()" if contains_none else f"{pos_len}{float_format['flux']}"
         flux_error_format = 'PE()' if contains_none else f'{pos_len}E'
         aux_corr = data.get('correlation')
         correlation_format = ''
         if aux_corr is not None:
-            correlation_format = 'PD()' if contains_none else f"{_get_col_subtype_len(data, 'correlation')}D"
+            correlation_format = f"P{float_format['correlation']}()" if contains_none else \
+                f"{_get_col_subtype_len(data, 'correlation')}{float_format['correlation']}"
         # Define formats for each type according to FITS
         column_formats = {'source_id': 'K', 'xp': '2A', 'flux': flux_format, 'flux_error': flux_error_format,
                           'correlation': correlation_format, 'standard_deviation': 'E'}
+        column_dims = dict()
+        # 2D arrays are stored flattened if their size varies
+        for column in set(_MATRIX_COLUMNS) & set(data.columns):
+            shape = next(value.shape for value in data[column] if value is not None)
+            column_formats[column] = f'P{float_format[column]}()' if contains_none else \
+                f'{shape[0] * shape[1]}{float_format[column]}'
+            column_dims[column] = None if contains_none else f'({shape[1]},{shape[0]})'
+            output_by_column_dict[column] = [value.flatten() if contains_none and value is not None else value for
+                                             value in output_by_column_dict[column]]
         columns = [
             fits.Column(name=key, array=[value if value is not None else [] for value in output_by_column_dict[key]],
-                        format=column_formats[key], unit=units_dict.get(key, '')) for key in spectra_keys]
+                        format=column_formats[key], unit=units_dict.get(key, ''), dim=column_dims.get(key))
+            for key in spectra_keys]
         header = _generate_fits_header(data, column_formats)
         header['Sampling'] = str(tuple(positions))
         hdu = fits.BinTableHDU.from_columns(columns, header=header)
@@ -207,16 +235,24 @@ class SampledSpectraData(OutputData):
 
         def _create_fields(_votable, _spectra_df):
             _spectra_flux_len = _get_col_subtype_len(_spectra_df, 'flux')
-            _spectra_flux_error_len = _get_col_subtype_len(_spectra_df, 'flux_error')
             len_flux = str(_spectra_flux_len)
-            len_error = str(_spectra_flux_error_len)
+            len_error = str(_get_col_subtype_len(_spectra_df, 'flux_error')) if 'flux_error' in _spectra_df.columns \
+                else ''
             len_correlation = str(
                 len(_spectra_df['correlation'].iloc[0])) if 'correlation' in _spectra_df.columns else ''
             fields_datatypes = {'source_id': 'long', 'xp': 'char', 'flux': 'double', 'flux_error': 'float',
                                 'correlation': 'double', 'standard_deviation': 'float'}
+            # Single precision arrays are stored as such
+            fields_datatypes.update({column: 'float' for column in ['flux', 'correlation'] if column in
+                                     _spectra_df.columns and _get_col_dtype(_spectra_df, column) == np.float32})
             fields_array_size = {'source_id': '', 'xp': '2', 'flux': len_flux, 'flux_error': len_error,
                                  'correlation': len_correlation, 'standard_deviation': ''}
-            fields_id = {key: f'_{key}' for key in ['source_id', 'xp', 'flux', 'flux_error', 'correlation']}
+            for column in set(_MATRIX_COLUMNS) & set(_spectra_df.columns):
+                fields_datatypes[column] = 'float' if _get_col_dtype(_spectra_df, column) == np.float32 else 'double'
+                # VOTable array sizes list the fastest varying dimension first
+                fields_array_size[column] = 'x'.join(reversed(_get_col_subtype_shape(_spectra_df, column).split(',')))
+            fields_id = {key: f'_{key}' for key in ['source_id', 'xp', 'flux', 'flux_error', 'correlation',
+                                                    *_MATRIX_COLUMNS]}
             fields_id.update({'source_id': None})
             header_dict = _load_header_dict()
             data_type = _spectra_df.attrs['data_type']
@@ -35,6 +35,10 @@ def _array_to_standard(array, extension='csv'):
         return list(row)
 
     conversion_functions = {'csv': tuple, 'ecsv': convert_ecsv}
+    if array.ndim > 1 and extension == 'ecsv':
+        rows = [convert_ecsv(row) for row in array]
+        # Rows containing nan values are already strings, so the whole array must be represented as a string too
+        return '[' + ', '.join(str(row) for row in rows) + ']' if any(isinstance(row, str) for row in rows) else rows
     if array.ndim > 1:
         conversion_function = conversion_functions[extension]
         return conversion_function([conversion_function(row) for row in array])
@@ -70,6 +74,22 @@ def _get_col_subtype_len(_df, _column):
     raise ValueError('All arrays in the data seem to be empty. This should never happen.')
 
 
+def _get_col_dtype(_df, _column):
+    # Floating point type of the arrays in a column, double precision if the column contains no arrays
+    for value in _df[_column]:
+        if isinstance(value, ndarray):
+            return value.dtype
+    return np.dtype(np.float64)
+
+
+def _get_col_subtype_shape(_df, _column):
+    # Shape of the arrays in a column, e.g.: '55,600' for the covariance factors
+    for value in _df[_column]:
+        if isinstance(value, ndarray) and value.ndim > 1:
+            return ','.join(str(dimension) for dimension in value.shape)
+    return str(_get_col_subtype_len(_df, _column))
+
+
 def _build_ecsv_header(df, positions=None):
     positions = None if positions is None else str(list(positions))
     columns = df.columns
@@ -83,8 +103,10 @@ def _build_ecsv_header(df, positions=None):
         header.append(f'#   name: {column}')
         header.append(f'#   datatype: {current_column["datatype"]}')
         if 'subtype' in current_column.keys():
-            header.append(
-                f'#   subtype: {current_column["subtype"].replace("null", str(_get_col_subtype_len(df, column)))}')
+            subtype = current_column['subtype'].replace('null', _get_col_subtype_shape(df, column))
+            if _get_col_dtype(df, column) == np.float32:
+                subtype = subtype.replace('float64', 'float32')
+            header.append(f'#   subtype: {subtype}')
         header.append(f'#   description: {current_column["description"]}')
         if units_dict.get(column, None):
             header.append(f'#   unit: {units_dict[column]}')
@@ -101,7 +123,9 @@ def _initialise_header():
     return ["# %ECSV 1.0", "# ---", "# delimiter: ','", "# datatype:"]
 
 
-def _build_photometry_header(columns):
+def _build_photometry_header(columns, dtypes=None):
+    # The data types of the columns (if given) override the default ones for single precision photometry
+    single_precision = set() if dtypes is None else {column for column in columns if dtypes[column] == np.float32}
     header_dict = _load_header_dict()
     header = _initialise_header()
     for column in columns:
@@ -116,7 +140,8 @@ def _build_photometry_header(columns):
                 parameter = '_mag_'
             system, band = column.split(parameter)
             parameter = f'phot{parameter}'[:-1]
-            header.append(f'#   datatype: {header_dict[parameter]["datatype"]}')
+            datatype = 'float32' if column in single_precision else header_dict[parameter]['datatype']
+            header.append(f'#   datatype: {datatype}')
             header.append(f'#   description: {header_dict[parameter]["description"]} {band} band')
         else:
             header.append(f'#   datatype: {header_dict[column]["datatype"]}')
@@ -122,3 +122,11 @@ class AbsoluteSampledSpectrum(SampledSpectrum):
             dict: A dictionary populated with the sampling grid used for this spectrum.
         """
         return {'pos': _list_to_array(self.pos)}
+
+
+def _sample_covariance(batch, design_matrix, rows, covariance_key, bandwidth=None):
+    if covariance_key == 'factor':
+        return batch.sample_covariance_factor(design_matrix, rows)
+    if covariance_key == 'band':
+        return batch.sample_covariance_band(design_matrix, bandwidth, rows)
+    return batch.sample_covariance(design_matrix, rows)
@@ -18,8 +18,9 @@ class CalibrationAbsoluteSampledSpectrum(AbsoluteSampledSpectrum):
         if n_bands == 2:
             self.flux = np.add(np.multiply(split_spectrum[BANDS.bp]['flux'], merge[BANDS.bp]),
                                np.multiply(split_spectrum[BANDS.rp]['flux'], merge[BANDS.rp]))
-            self.error = np.sqrt(np.add(np.multiply(split_spectrum[BANDS.bp]['error'] ** 2, merge[BANDS.bp] ** 2),
-                                        np.multiply(split_spectrum[BANDS.rp]['error'] ** 2, merge[BANDS.rp] ** 2)))
+            # Equivalent to the square root of the sum of squares, but the squares of small errors cannot underflow
+            self.error = np.hypot(np.multiply(split_spectrum[BANDS.bp]['error'], merge[BANDS.bp]),
+                                  np.multiply(split_spectrum[BANDS.rp]['error'], merge[BANDS.rp]))
             if with_correlation:
                 self.covariance = np.add(np.multiply(split_spectrum[BANDS.bp]['cov'], merge[BANDS.bp]),
                                          np.multiply(split_spectrum[BANDS.rp]['cov'], merge[BANDS.rp]))
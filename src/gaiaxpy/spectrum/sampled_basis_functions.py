@@ -4,12 +4,8 @@ sampled_basis_functions.py
 Module to represent a set of basis functions evaluated on a grid.
 """
 
-import functools
-import math
-
 import numpy as np
-from scipy.interpolate import BSpline
-from scipy.special import eval_hermite, gamma
+from scipy.sparse import coo_array
 
 from gaiaxpy.core import nature, satellite
 
@@ -50,37 +46,26 @@ class SampledBasisFunctions(object):
         Returns:
             SampledBasisFunctions: An instance of this class.
         """
-        n_samples = len(sampling)
-        scale = ((external_instrument_model.bases['normRangeMax'] -
-                  external_instrument_model.bases['normRangeMin']) /
-                 (external_instrument_model.bases['pwlRangeMax'] -
-                  external_instrument_model.bases['pwlRangeMin']))
-        offset = (external_instrument_model.bases['normRangeMin'] -
-                  external_instrument_model.bases['pwlRangeMin'] * scale)
+        sampling = np.asarray(sampling, dtype=float)
+        bases = external_instrument_model.bases
+        scale = (bases['normRangeMax'] - bases['normRangeMin']) / (bases['pwlRangeMax'] - bases['pwlRangeMin'])
+        offset = bases['normRangeMin'] - bases['pwlRangeMin'] * scale
 
         sampling_pwl = external_instrument_model.wl_to_pwl(sampling)
         rescaled_pwl = (sampling_pwl * scale) + offset
 
-        bases_transformation = external_instrument_model.bases['transformationMatrix']
-        evaluated_hermite_bases = np.array([_evaluate_hermite_function(n_h, pos, weight) for pos, weight in
-                                            zip(rescaled_pwl, weights) for n_h in np.arange(
-                int(external_instrument_model.bases['nInverseBasesCoefficients']))]).reshape(
-            n_samples, int(external_instrument_model.bases['nInverseBasesCoefficients']))
-        _design_matrix = external_instrument_model.bases['inverseBasesCoefficients'] @ evaluated_hermite_bases.T
-        transformed_design_matrix = bases_transformation @ _design_matrix
+        # Hermite functions evaluated on the whole grid at once, only where some contribution is expected
+        evaluated_hermite_bases = _evaluate_hermite_functions(int(bases['nInverseBasesCoefficients']), rescaled_pwl)
+        evaluated_hermite_bases[:, ~(np.asarray(weights) > 0)] = 0.
+        transformed_design_matrix = bases['transformationMatrix'] @ (bases['inverseBasesCoefficients'] @
+                                                                     evaluated_hermite_bases)
 
         hc = 1.e9 * nature.C * nature.PLANCK
-
-        def compute_norm(wl):
-            r = external_instrument_model.get_response(wl)
-            if r > 0:
-                return hc / (satellite.TELESCOPE_PUPIL_AREA * r * wl)
-            else:
-                return 0.0
-
-        norm = np.array([compute_norm(wl) for wl in sampling])
-        design_matrix = np.array([transformed_design_matrix[i] * norm for i in
-                                  np.arange(external_instrument_model.bases['nBases'])])
+        response = external_instrument_model.get_response(sampling)
+        norm = np.zeros(len(sampling))
+        positive = response > 0
+        norm[positive] = hc / (satellite.TELESCOPE_PUPIL_AREA * response[positive] * sampling[positive])
+        design_matrix = transformed_design_matrix[:int(bases['nBases'])] * norm
 
         return cls(sampling, design_matrix=design_matrix)
 
@@ -121,27 +106,75 @@ class SampledBasisFunctions(object):
         return self.sampling_grid
 
 
-def _evaluate_hermite_function(n, x, w):
-    return _hermite_function(n, x) if w > 0 else 0
+def _evaluate_hermite_functions(n_functions, x):
+    """
+    Evaluate the first Hermite functions on all the input positions at once using the three-term recurrence relation
+        psi_n(x) = sqrt(2 / n) * x * psi_n-1(x) - sqrt((n - 1) / n) * psi_n-2(x), which is numerically stable and avoids
+        the overflow of the Hermite polynomials and normalisation factors for large orders.
 
+    Args:
+        n_functions (int): Number of Hermite functions to evaluate.
+        x (ndarray): 1D array containing the positions where the functions need to be evaluated.
 
-@functools.lru_cache(maxsize=128)
-def _hermite_function(n, x):
-    if n == 0:
-        return sqrt_4_pi * np.exp(-x ** 2. / 2.)
-    elif n == 1:
-        return sqrt_4_pi * np.exp(-x ** 2. / 2.) * np.sqrt(2.) * x
-    c1 = np.sqrt(2. / n) * x
-    c2 = -np.sqrt((n - 1) / n)
-    return c1 * _hermite_function(n - 1, x) + c2 * _hermite_function(n - 2, x)
+    Returns:
+        ndarray: 2D array (n_functions, n_positions) containing the evaluation of each function at each position.
+    """
+    x = np.asarray(x, dtype=float)
+    hermite_functions = np.empty((n_functions, len(x)))
+    if n_functions > 0:
+        hermite_functions[0] = sqrt_4_pi * np.exp(-x ** 2. / 2.)
+    if n_functions > 1:
+        hermite_functions[1] = np.sqrt(2.) * x * hermite_functions[0]
+    for n in range(2, n_functions):
+        hermite_functions[n] = (np.sqrt(2. / n) * x * hermite_functions[n - 1] -
+                                np.sqrt((n - 1) / n) * hermite_functions[n - 2])
+    return hermite_functions
+
+
+def _evaluate_b_splines(knots, order, x):
+    """
+    Evaluate all the B-spline bases defined by a knot vector on the input positions. Only the bases that are non-zero
+        on the knot interval containing each position (order bases at most) are evaluated, using the Cox-de Boor
+        recursion over all positions at once. Positions outside the base interval are extrapolated from the first or
+        last polynomial pieces, as done by scipy.interpolate.BSpline.
+
+    Args:
+        knots (iterable): The knot vector.
+        order (int): Order of the B-splines (degree + 1).
+        x (ndarray): 1D array containing the positions where the bases need to be evaluated.
+
+    Returns:
+        csr_array: Sparse 2D array (n_bases, n_positions) containing the evaluation of each basis at each position.
+    """
+    knots = np.asarray(knots, dtype=float)
+    x = np.asarray(x, dtype=float)
+    order = int(order)
+    degree = order - 1
+    n_bases = len(knots) - order
+    # Knot interval [knots[i], knots[i + 1]) containing each position
+    interval = np.clip(np.searchsorted(knots, x, side='right') - 1, degree, n_bases - 1)
+    # values[:, j] contains the evaluation of the basis interval - degree + j
+    values = np.zeros((len(x), order))
+    values[:, 0] = 1.
+    left = np.zeros((len(x), order))
+    right = np.zeros((len(x), order))
+    for j in range(1, order):
+        left[:, j] = x - knots[interval + 1 - j]
+        right[:, j] = knots[interval + j] - x
+        saved = np.zeros(len(x))
+        for r in range(j):
+            temp = values[:, r] / (right[:, r + 1] + left[:, j - r])
+            values[:, r] = saved + right[:, r + 1] * temp
+            saved = left[:, j - r] * temp
+        values[:, j] = saved
+    rows = interval[:, np.newaxis] - degree + np.arange(order)
+    columns = np.repeat(np.arange(len(x))[:, np.newaxis], order, axis=1)
+    design_matrix = coo_array((values.ravel(), (rows.ravel(), columns.ravel())), shape=(n_bases, len(x))).tocsr()
+    design_matrix.eliminate_zeros()
+    return design_matrix
 
 
 def populate_design_matrix(sampling_grid, bases_config):
-    def __psi(n, x):
-        return (1.0 / np.sqrt(math.pow(2, n) * gamma(n + 1) * np.sqrt(np.pi)) * np.exp(-x ** 2 / 2.0) *
-                eval_hermite(n, x))
-
-    n_samples = len(sampling_grid)
     bc_columns = bases_config.columns
     if 'knots' not in bc_columns and 'transformedSetDimension' in bc_columns:  # Hermite
         normalised_range_lower, normalised_range_upper = bases_config['normalizedRange'].iloc(0)[0]
@@ -153,30 +186,19 @@ def populate_design_matrix(sampling_grid, bases_config):
         transformed_set_dimension = int(bases_config['transformedSetDimension'].iloc[0])
         bases_transformation = bases_config['transformationMatrix'].iloc(0)[0].reshape(dimension,
                                                                                        transformed_set_dimension)
-        design_matrix = np.array([__psi(n_h, pos) for pos in rescaled_pwl for n_h in np.arange(dimension)]).reshape(
-            n_samples, dimension)
-        return bases_transformation @ design_matrix.T
+        return bases_transformation @ _evaluate_hermite_functions(dimension, rescaled_pwl)
     elif 'knots' in bc_columns:  # Spline
         if len(bases_config) != 1:
             raise ValueError('Only one row should be accepted at a time.')
         knots = bases_config['knots'].iloc[0]
-        n_knots = len(knots)
         order = bases_config['order'].iloc[0]
-        degree = order - 1
-        n_bases = n_knots - order
+        design_matrix = _evaluate_b_splines(knots, order, sampling_grid)
         if 'transformationMatrix' in bases_config.__dir__():
+            n_bases = len(knots) - order
             transformation_matrix = np.array(bases_config.transformationMatrix.values[0])
             ts_dim = bases_config.transformedSetDimension.values[0]
             bases_transformation = transformation_matrix.reshape(ts_dim, n_bases)
-        else:
-            bases_transformation = np.identity(n_bases)
-        design_matrix = np.zeros((n_bases, n_samples))
-
-        for basis_id in np.arange(n_bases):  # Evaluate
-            c = np.zeros(n_knots)
-            c[basis_id] = 1.0
-            basis = BSpline(knots, c, degree)
-            design_matrix[basis_id] = np.array([basis(pos) for pos in sampling_grid])
-        return bases_transformation.dot(design_matrix)
+            return bases_transformation @ design_matrix
+        return design_matrix
     else:
         raise ValueError('Design matrix cannot be populated from the given configuration.')
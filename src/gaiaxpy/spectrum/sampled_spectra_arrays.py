@@ -0,0 +1,100 @@
+"""
+sampled_spectra_arrays.py
+====================================
+Module to represent a set of sampled spectra as contiguous arrays.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class SampledSpectraArrays(object):
+    """
+    A set of sampled spectra stored in contiguous arrays with one row per spectrum. Unlike the DataFrame output of the
+        converter and the calibrator, the spectra are never split into one array per row, so they can be used in array
+        computations without copying them again.
+    """
+
+    def __init__(self, source_id, flux, flux_error, pos, data_type, xp=None, correlation=None, correlation_type=None,
+                 standard_deviation=None):
+        """
+        Initialise a set of sampled spectra.
+
+        Args:
+            source_id (ndarray): 1D array of shape (N,) containing the source identifier of each spectrum.
+            flux (ndarray): 2D array of shape (N, n_samples) containing the fluxes. Missing spectra are filled with NaN.
+            flux_error (ndarray): 2D array of shape (N, n_samples) containing the flux errors. Missing errors are filled
+                with NaN. None if the errors were not computed.
+            pos (ndarray): 1D array containing the positions of the samples.
+            data_type (type): Class of the spectra (e.g.: XpSampledSpectrum).
+            xp (ndarray): 1D array containing the band ('BP' or 'RP') of each spectrum, if the spectra are not merged.
+            correlation (ndarray): Correlation information of the spectra stacked along the first axis, with NaN for
+                missing values. Its layout is given by correlation_type.
+            correlation_type (str): Either 'correlation' (lower triangles of the correlation matrices, shape
+                (N, n_samples * (n_samples - 1) / 2)), 'covariance_factor' (covariance factors, shape
+                (N, n_rows, n_samples)) or 'banded_correlation' (bands of the correlation matrices, shape
+                (N, bandwidth, n_samples)).
+            standard_deviation (ndarray): 1D array containing the standard deviation of the least squares solution of
+                each spectrum.
+        """
+        self.source_id = source_id
+        self.xp = xp
+        self.flux = flux
+        self.flux_error = flux_error
+        self.correlation = correlation
+        self.correlation_type = correlation_type
+        self.standard_deviation = standard_deviation
+        self.pos = pos
+        self.data_type = data_type
+
+    def __len__(self):
+        return len(self.source_id)
+
+    @classmethod
+    def concatenate(cls, spectra_arrays):
+        """
+        Concatenate several sets of spectra sampled on the same grid.
+
+        Args:
+            spectra_arrays (list): List of SampledSpectraArrays.
+
+        Returns:
+            SampledSpectraArrays: The spectra of all the sets, in the same order.
+        """
+        first = spectra_arrays[0]
+
+        def concatenate_field(field):
+            values = [getattr(spectra, field) for spectra in spectra_arrays]
+            return None if values[0] is None else np.concatenate(values)
+
+        return cls(concatenate_field('source_id'), concatenate_field('flux'), concatenate_field('flux_error'),
+                   first.pos, first.data_type, xp=concatenate_field('xp'),
+                   correlation=concatenate_field('correlation'), correlation_type=first.correlation_type,
+                   standard_deviation=concatenate_field('standard_deviation'))
+
+    def to_data_frame(self):
+        """
+        Represent the spectra as a DataFrame in the format returned by default by the converter and the calibrator, with
+            one array per cell. Spectra whose values are all missing are represented by None.
+
+        Returns:
+            DataFrame: The spectra.
+        """
+
+        def rows_to_list(values):
+            missing = np.isnan(values).all(axis=tuple(range(1, values.ndim)))
+            return [None if is_missing else row for row, is_missing in zip(values, missing)]
+
+        spectra_dict = {'source_id': self.source_id}
+        if self.xp is not None:
+            spectra_dict['xp'] = self.xp
+        spectra_dict['flux'] = rows_to_list(self.flux)
+        if self.flux_error is not None:
+            spectra_dict['flux_error'] = rows_to_list(self.flux_error)
+        if self.correlation is not None:
+            spectra_dict[self.correlation_type] = rows_to_list(self.correlation)
+        if self.standard_deviation is not None:
+            spectra_dict['standard_deviation'] = self.standard_deviation
+        spectra_df = pd.DataFrame(spectra_dict)
+        spectra_df.attrs['data_type'] = self.data_type
+        return spectra_df
@@ -6,6 +6,7 @@ Module to represent a sampled spectrum.
 
 import numpy as np
 from numpy import ndarray, nan
+from scipy.sparse import issparse
 
 from .generic_spectrum import Spectrum
 
@@ -132,6 +133,7 @@ class SampledSpectrum(Spectrum):
             ndarray: 1D array containing the errors in flux for all samples.
         """
         if isinstance(covariance, ndarray):
+            design_matrix = design_matrix.toarray() if issparse(design_matrix) else design_matrix
             return np.sqrt(
                 np.sum(np.multiply(design_matrix.T @ covariance, design_matrix.T), axis=1)) * standard_deviation
         elif np.isnan(covariance):
@@ -36,13 +36,9 @@ class SingleSyntheticPhotometry(PhotometricAbsoluteSampledSpectrum):
         PhotometricAbsoluteSampledSpectrum.__init__(self, source_id, xp_spectra, sampled_bases, merge,
                                                     truncation=truncation)
         self.photometric_system = photometric_system.value
-        # Correct flux if necessary (regular Photometric systems return the original value)
-        aux_flux = self.flux
-        self.flux = self.photometric_system._correct_flux(aux_flux)
-        # Correct the errors
-        self.error = self.photometric_system._correct_error(aux_flux, self.error)
-        # Magnitude is computed from self.flux which is the corrected flux
-        self.mag = self._compute_mag()
+        # Correct flux and errors if necessary (regular Photometric systems return the original values). Magnitude is
+        # computed from the corrected flux
+        self.mag, self.flux, self.error = _compute_photometry(self.photometric_system, self.flux, self.error)
 
     def _photometry_to_dict(self):
         """
@@ -69,21 +65,40 @@ class SingleSyntheticPhotometry(PhotometricAbsoluteSampledSpectrum):
         return {f'{name}_{band}': values[i] for i, band in enumerate(bands)}
 
     def _compute_mag(self):
-        def flux_to_mag(flux, zero_point):
-            """
-            Convert flux to magnitude.
-
-            Args:
-                flux (float): Flux value.
-                zero_point (float): Photometric zero-point.
-
-            Returns:
-                float: The magnitude.
-            """
-            if flux <= 0:
-                return np.nan
-            result = -2.5 * np.log10(flux) + zero_point
-            return result
-
-        return [flux_to_mag(flux, zero_point) for flux, zero_point in
-                zip(self.flux, self.photometric_system.get_zero_points())]
+        return _flux_to_mag(np.asarray(self.flux), self.photometric_system.get_zero_points())
+
+
+def _flux_to_mag(flux, zero_points):
+    """
+    Convert fluxes to magnitudes.
+
+    Args:
+        flux (ndarray): Array of fluxes with one value per band in its last axis.
+        zero_points (ndarray): 1D array containing the photometric zero-point of each band.
+
+    Returns:
+        ndarray: The magnitudes, NaN where the flux is not positive.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(flux > 0, -2.5 * np.log10(flux) + np.asarray(zero_points), np.nan)
+
+
+def _compute_photometry(photometric_system, flux, error):
+    """
+    Apply the corrections of a photometric system to the fluxes and errors and compute the magnitudes. The arrays can
+        contain one source or one row per source.
+
+    Args:
+        photometric_system (InternalPhotometricSystem): The photometric system of the synthetic photometry.
+        flux (ndarray): Array of fluxes with one value per band in its last axis.
+        error (ndarray): Array of flux errors with the same shape as flux.
+
+    Returns:
+        (tuple): tuple containing:
+            ndarray: The magnitudes.
+            ndarray: The corrected fluxes.
+            ndarray: The corrected flux errors.
+    """
+    corrected_flux = photometric_system._correct_flux(flux)
+    corrected_error = photometric_system._correct_error(flux, error)
+    return _flux_to_mag(corrected_flux, photometric_system.get_zero_points()), corrected_flux, corrected_error
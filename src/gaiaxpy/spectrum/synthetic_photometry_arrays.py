@@ -0,0 +1,162 @@
+"""
+synthetic_photometry_arrays.py
+====================================
+Module to represent a synthetic photometry in multiple photometric systems as arrays.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .single_synthetic_photometry import _compute_photometry
+
+_VARIABLES = ['mag', 'flux', 'flux_error']
+
+
+class SyntheticPhotometryArrays(object):
+    """
+    Synthetic photometry of a set of sources in multiple photometric systems, stored as one array per system and
+        variable with one row per source and one column per band. The post-processing of the photometry works on these
+        arrays, and the output DataFrame is only built at the end.
+    """
+
+    def __init__(self, source_id, photometric_system, mag, flux, flux_error, bands=None):
+        """
+        Initialise a synthetic photometry in multiple photometric systems.
+
+        Args:
+            source_id (list): Source identifiers.
+            photometric_system (list): List of photometric systems.
+            mag (list): One array of magnitudes per photometric system.
+            flux (list): One array of fluxes per photometric system.
+            flux_error (list): One array of flux errors per photometric system.
+            bands (list): The bands of the columns of the arrays of each photometric system. If not given, the arrays
+                contain all the bands of the systems.
+        """
+        self.source_id = source_id
+        self.photometric_system = list(photometric_system)
+        self.bands = [list(system_bands) for system_bands in bands] if bands is not None else \
+            [phot_system.get_bands() for phot_system in self.photometric_system]
+        self.mag = list(mag)
+        self.flux = list(flux)
+        self.flux_error = list(flux_error)
+
+    def __len__(self):
+        return len(self.source_id)
+
+    @classmethod
+    def from_fluxes(cls, source_id, photometric_system, fluxes, errors, internal_systems=None):
+        """
+        Create the synthetic photometry from the merged fluxes and errors of each system, applying the corrections of
+            the standardised systems and computing the magnitudes.
+
+        Args:
+            source_id (list): Source identifiers.
+            photometric_system (list): List of photometric systems.
+            fluxes (list): One array of fluxes per photometric system, with one row per source and one column per band.
+            errors (list): One array of flux errors per photometric system, with the same shape as the fluxes.
+            internal_systems (list): The internal photometric systems the fluxes were computed for, which may be
+                restricted to some of the bands of the photometric systems. If not given, the fluxes contain all the
+                bands of the systems.
+
+        Returns:
+            SyntheticPhotometryArrays: The synthetic photometry.
+        """
+        internal_systems = [phot_system.value for phot_system in photometric_system] if internal_systems is None else \
+            internal_systems
+        photometries = [_compute_photometry(internal_system, flux, error) for internal_system, flux, error in
+                        zip(internal_systems, fluxes, errors)]
+        mag, flux, flux_error = zip(*photometries) if photometries else ([], [], [])
+        return cls(source_id, photometric_system, mag, flux, flux_error,
+                   bands=[internal_system.get_bands() for internal_system in internal_systems])
+
+    def get_system_index(self, label):
+        """
+        Get the position of a photometric system in the arrays.
+
+        Args:
+            label (str): Label of the photometric system.
+
+        Returns:
+            int: The position of the system.
+        """
+        return [phot_system.get_system_label() for phot_system in self.photometric_system].index(label)
+
+    def get_column(self, label, variable, band):
+        """
+        Get the values of one band of a photometric system.
+
+        Args:
+            label (str): Label of the photometric system.
+            variable (str): One of 'mag', 'flux' or 'flux_error'.
+            band (str): Band of the photometric system.
+
+        Returns:
+            ndarray: The values of all the sources.
+        """
+        index = self.get_system_index(label)
+        return getattr(self, variable)[index][:, self.bands[index].index(band)]
+
+    def set_column(self, label, variable, band, values):
+        """
+        Replace the values of one band of a photometric system. The array of the system is upcast if necessary to hold
+            the new values.
+
+        Args:
+            label (str): Label of the photometric system.
+            variable (str): One of 'mag', 'flux' or 'flux_error'.
+            band (str): Band of the photometric system.
+            values (ndarray): The new values of all the sources.
+        """
+        index = self.get_system_index(label)
+        arrays = getattr(self, variable)
+        arrays[index] = arrays[index].astype(np.result_type(arrays[index], values), copy=False)
+        arrays[index][:, self.bands[index].index(band)] = values
+
+    def select_bands(self, label, bands):
+        """
+        Keep only some of the bands of a photometric system.
+
+        Args:
+            label (str): Label of the photometric system.
+            bands (list): Bands to keep, all of them must be present in the photometry.
+        """
+        index = self.get_system_index(label)
+        columns = [self.bands[index].index(band) for band in bands]
+        for variable in _VARIABLES:
+            getattr(self, variable)[index] = getattr(self, variable)[index][:, columns]
+        self.bands[index] = list(bands)
+
+    def remove_system(self, label):
+        """
+        Remove a photometric system from the photometry.
+
+        Args:
+            label (str): Label of the photometric system.
+        """
+        index = self.get_system_index(label)
+        for field in ['photometric_system', 'bands', *_VARIABLES]:
+            del getattr(self, field)[index]
+
+    def to_data_frame(self, dtype=None, variables=None):
+        """
+        Represent the photometry as a DataFrame with one column per system, variable and band, in the same format as
+            MultiSyntheticPhotometry._generate_output_df.
+
+        Args:
+            dtype (dtype): Floating point type of the photometry columns. If not given, the types of the arrays are
+                kept.
+            variables (set): Variables to include among 'mag', 'flux' and 'flux_error'. If not given, all of them are
+                included.
+
+        Returns:
+            DataFrame: A DataFrame containing the source identifiers and the synthetic photometry in all the systems.
+        """
+        variables = _VARIABLES if variables is None else [variable for variable in _VARIABLES if variable in variables]
+        columns = {'source_id': self.source_id}
+        for index, phot_system in enumerate(self.photometric_system):
+            label, bands = phot_system.get_system_label(), self.bands[index]
+            for variable in variables:
+                values = getattr(self, variable)[index]
+                values = values if dtype is None else values.astype(dtype, copy=False)
+                columns.update({f'{label}_{variable}_{band}': values[:, i] for i, band in enumerate(bands)})
+        return pd.DataFrame(columns)
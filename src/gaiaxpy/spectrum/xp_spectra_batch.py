@@ -0,0 +1,479 @@
+"""
+xp_spectra_batch.py
+====================================
+Module to represent a batch of BP/RP continuous spectra stacked into arrays.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import issparse
+
+from .utils import get_covariance_matrix
+from ..core.generic_functions import correlation_band_from_covariance_band, correlation_from_covariance
+from ..core.satellite import BANDS
+
+# Upper bound (in bytes) for the intermediate arrays created when propagating the covariance of a block of sources
+_BLOCK_MEMORY = 2 ** 26
+
+
+class XpSpectraBatch(object):
+    """
+    A set of Gaia BP/RP spectra observed with the same photometer and represented in terms of the same set of basis
+        functions. Coefficients are stacked into a single 2D array so that the spectra of all sources can be sampled
+        with a single matrix product instead of one product per source.
+    """
+
+    def __init__(self, source_ids, xp, coefficients, covariances, standard_deviations, n_relevant_bases=None,
+                 dtype=np.float64):
+        """
+        Initialise a batch of XP continuous spectra.
+
+        Args:
+            source_ids (ndarray): 1D array containing the source identifiers.
+            xp (str): Gaia photometer, can be either 'bp' or 'rp'.
+            coefficients (list): The coefficients of each spectrum. Missing spectra can be represented by NaN, None or
+                an empty array.
+            covariances (list): The covariance matrix of each spectrum. Missing matrices can be represented by NaN or
+                None.
+            standard_deviations (ndarray): 1D array containing the standard deviation of each least squares solution.
+            n_relevant_bases (ndarray): 1D array containing the number of bases to be used for each spectrum when
+                truncation is applied. Missing or non-positive values mean no truncation. No truncation is applied by
+                default.
+            dtype (dtype): Floating point type used to store the coefficients and compute the sampled spectra. Either
+                float64 or float32.
+        """
+        self.dtype = np.dtype(dtype)
+        self.source_ids = np.asarray(source_ids)
+        self.xp = xp
+        self.n_sources = len(self.source_ids)
+        self.available = np.array([isinstance(c, np.ndarray) and c.size > 0 for c in coefficients], dtype=bool)
+        n_bases = {len(c) for c, available in zip(coefficients, self.available) if available}
+        if len(n_bases) > 1:
+            raise ValueError('All spectra in a batch must be represented with the same number of bases.')
+        self.n_bases = n_bases.pop() if n_bases else 0
+        self.coefficients = np.full((self.n_sources, self.n_bases), np.nan, dtype=self.dtype)
+        if self.available.any():
+            self.coefficients[self.available] = np.stack([c for c, available in zip(coefficients, self.available)
+                                                          if available])
+        self.covariances = list(covariances)
+        self.has_covariance = self.available & np.array([isinstance(c, np.ndarray) for c in self.covariances],
+                                                        dtype=bool)
+        self.standard_deviations = pd.Series(standard_deviations).to_numpy(dtype=self.dtype, na_value=np.nan)
+        # Truncation level of each spectrum, zero meaning that all bases are used
+        self.truncation = np.zeros(self.n_sources, dtype=int)
+        if n_relevant_bases is not None:
+            n_relevant_bases = pd.Series(n_relevant_bases).to_numpy(dtype=float, na_value=np.nan)
+            truncated = n_relevant_bases > 0
+            self.truncation[truncated] = n_relevant_bases[truncated].astype(int)
+        # Arrays derived from the last design matrix used, which are reused while the blocks of the batch are sampled
+        # on the same grid
+        self._prepared_design_matrix = None
+        self._error_propagation = None
+
+    @classmethod
+    def from_data_frame(cls, df, band, truncation=False, dtype=np.float64):
+        """
+        Initialise a batch of XP continuous spectra from a Pandas DataFrame.
+
+        Args:
+            df (DataFrame): DataFrame containing at least the fields source_id, BAND_coefficients,
+                BAND_standard_deviation and the covariance information (either as BAND_covariance_matrix,
+                BAND_coefficient_covariances or BAND_coefficient_correlations and BAND_coefficient_errors), where BAND
+                is either 'bp' or 'rp'.
+            band (str): Gaia photometer, can be either 'bp' or 'rp'.
+            truncation (bool): Toggle truncation of the set of bases. The level of truncation to be applied is defined
+                by the recommended value in the field BAND_n_relevant_bases.
+            dtype (dtype): Floating point type used to store the coefficients and compute the sampled spectra.
+
+        Returns:
+            XpSpectraBatch: An instance of this class.
+        """
+        if f'{band}_covariance_matrix' in df.columns:
+            covariances = df[f'{band}_covariance_matrix']
+        elif f'{band}_coefficient_covariances' in df.columns:
+            covariances = df[f'{band}_coefficient_covariances']
+        else:
+            covariances = df.apply(get_covariance_matrix, axis=1, args=(band,))
+        n_relevant_bases = df[f'{band}_n_relevant_bases'] if truncation else None
+        return cls(df['source_id'].to_numpy(), band, df[f'{band}_coefficients'].tolist(), covariances.tolist(),
+                   df[f'{band}_standard_deviation'], n_relevant_bases=n_relevant_bases, dtype=dtype)
+
+    def _get_truncation_groups(self, indices, design_matrix):
+        """
+        Group the given rows by truncation level, so that all spectra in a group can be sampled with the same truncated
+            design matrix.
+
+        Args:
+            indices (ndarray): 1D array containing the indices of the rows to be grouped.
+            design_matrix (ndarray): 2D array containing the evaluation of the basis functions on the desired sampling
+                grid.
+
+        Returns:
+            list: List of tuples containing the number of bases used and the indices of the rows in each group.
+
+        Raises:
+            ValueError: If the number of coefficients used does not match the number of bases in the design matrix.
+        """
+        truncation = self.truncation[indices]
+        groups = []
+        for level in np.unique(truncation):
+            n_bases = min(level, self.n_bases) if level else self.n_bases
+            if n_bases != (min(level, design_matrix.shape[0]) if level else design_matrix.shape[0]):
+                raise ValueError("Coefficients length doesn't match the design matrix dimension. Please make sure "
+                                 "you're using the correct input files and configuration.")
+            groups.append((n_bases, indices[truncation == level]))
+        return groups
+
+    def _get_row_indices(self, rows):
+        return np.arange(self.n_sources)[slice(None) if rows is None else rows]
+
+    def _prepare_design_matrix(self, design_matrix):
+        """
+        Cast the design matrix to the type of the batch. In single precision, each column of the design matrix is also
+            rescaled by a power of two so that its largest element is of order one. Otherwise, the variances of spectra
+            with very small fluxes (e.g.: absolute fluxes, around 1e-17 W nm^-1 m^-2) would fall out of the float32
+            range. As the scales are powers of two, undoing them is exact. The result for the last design matrix is
+            kept, so that sampling the batch block by block only prepares it once.
+
+        Args:
+            design_matrix (ndarray): 2D array containing the evaluation of the basis functions on the desired sampling
+                grid.
+
+        Returns:
+            (tuple): tuple containing:
+                ndarray: The design matrix to be used in the computations.
+                ndarray: The scale applied to each column of the design matrix, or None if it was not rescaled.
+        """
+        if self.dtype == np.float64:
+            return design_matrix, None
+        if self._prepared_design_matrix is not None and self._prepared_design_matrix[0] is design_matrix:
+            return self._prepared_design_matrix[1]
+        max_values = abs(design_matrix).max(axis=0)
+        max_values = np.ravel(max_values.toarray() if issparse(max_values) else max_values)
+        exponents = np.floor(np.log2(max_values, out=np.zeros_like(max_values), where=max_values > 0))
+        scales = np.ldexp(1., -exponents.astype(int))
+        scaled_design_matrix = design_matrix.multiply(scales).tocsr() if issparse(design_matrix) else \
+            design_matrix * scales
+        with np.errstate(under='ignore'):
+            prepared = scaled_design_matrix.astype(self.dtype), scales
+        self._prepared_design_matrix = (design_matrix, prepared)
+        return prepared
+
+    def _get_error_propagation(self, design_matrix):
+        """
+        Get the arrays required to propagate the covariances of the batch onto a grid. The variance of each sample is
+            sum_kl D_ks C_kl D_ls. As the covariance is symmetric, it can be written as a product of the packed upper
+            triangle of the covariances (with doubled off-diagonal terms) and the products of pairs of bases, which
+            turns the propagation for a whole group into a single matrix product. The pairs are sorted by their largest
+            basis, so the pairs used by spectra truncated to n bases are the first ones. The result for the last design
+            matrix is kept, so that sampling the batch block by block only builds it once.
+
+        Args:
+            design_matrix (ndarray): 2D array containing the evaluation of the basis functions on the desired sampling
+                grid.
+
+        Returns:
+            (tuple): tuple containing:
+                ndarray: The prepared design matrix (see _prepare_design_matrix).
+                ndarray: The scale applied to each column of the design matrix, or None if it was not rescaled.
+                ndarray: The first basis of each pair.
+                ndarray: The second basis of each pair, which is the largest one.
+                ndarray: The weight of the covariance of each pair (two for off-diagonal terms).
+                ndarray: 2D array (n_pairs, n_samples) containing the products of the bases of each pair.
+        """
+        if self._error_propagation is not None and self._error_propagation[0] is design_matrix:
+            return self._error_propagation[1]
+        prepared_design_matrix, scales = self._prepare_design_matrix(design_matrix)
+        second_basis, first_basis = np.tril_indices(prepared_design_matrix.shape[0])
+        if issparse(prepared_design_matrix):
+            # Bases with disjoint supports (e.g. B-splines) do not contribute, so only overlapping pairs are kept
+            basis_products = prepared_design_matrix[first_basis].multiply(prepared_design_matrix[second_basis]).tocsr()
+            overlapping = np.diff(basis_products.indptr) > 0
+            first_basis, second_basis = first_basis[overlapping], second_basis[overlapping]
+            basis_products = basis_products[overlapping].astype(self.dtype)
+        else:
+            basis_products = prepared_design_matrix[first_basis] * prepared_design_matrix[second_basis]
+        weights = np.where(first_basis == second_basis, 1.0, 2.0).astype(self.dtype)
+        error_propagation = (prepared_design_matrix, scales, first_basis, second_basis, weights, basis_products)
+        self._error_propagation = (design_matrix, error_propagation)
+        return error_propagation
+
+    def _unscale(self, values, scales):
+        # Undo the scaling of the columns of the design matrix, which is computed in double precision as the values
+        # may fall out of the float32 range in the scaled units
+        if scales is None:
+            return values
+        with np.errstate(over='ignore', under='ignore'):
+            return (values.astype(np.float64) / scales).astype(self.dtype)
+
+    def sample_flux(self, design_matrix, rows=None):
+        """
+        Compute the flux values of the spectra in the batch with one matrix product per truncation group.
+
+        Args:
+            design_matrix (ndarray): 2D array containing the evaluation of the basis functions on the desired sampling
+                grid.
+            rows (slice/ndarray): Rows of the batch to be processed, as a slice or sorted indices. All rows are
+                processed by default.
+
+        Returns:
+            ndarray: 2D array (n_rows, n_samples) containing the flux values. Rows corresponding to missing spectra
+                are filled with NaN.
+        """
+        indices = self._get_row_indices(rows)
+        design_matrix, scales = self._prepare_design_matrix(design_matrix)
+        flux = np.full((len(indices), design_matrix.shape[1]), np.nan, dtype=self.dtype)
+        for n_bases, group in self._get_truncation_groups(indices[self.available[indices]], design_matrix):
+            flux[np.searchsorted(indices, group)] = self.coefficients[group, :n_bases] @ design_matrix[:n_bases]
+        return self._unscale(flux, scales)
+
+    def sample_error(self, design_matrix, rows=None):
+        """
+        Compute the errors on the flux values of the spectra in the batch propagating the stacked covariance matrices.
+
+        Args:
+            design_matrix (ndarray): 2D array containing the evaluation of the basis functions on the desired sampling
+                grid.
+            rows (slice/ndarray): Rows of the batch to be processed, as a slice or sorted indices. All rows are
+                processed by default.
+
+        Returns:
+            ndarray: 2D array (n_rows, n_samples) containing the errors in flux. Rows corresponding to missing spectra
+                or spectra without covariance information are filled with NaN.
+        """
+        indices = self._get_row_indices(rows)
+        error = np.full((len(indices), design_matrix.shape[1]), np.nan, dtype=self.dtype)
+        valid_indices = indices[self.has_covariance[indices]]
+        if valid_indices.size == 0:
+            return error
+        design_matrix, scales, first_basis, second_basis, weights, basis_products = self._get_error_propagation(
+            design_matrix)
+        block_size = self._get_block_size(len(weights))
+        for start in range(0, len(valid_indices), block_size):
+            for n_bases, group in self._get_truncation_groups(valid_indices[start:start + block_size], design_matrix):
+                # Truncated spectra only use the pairs of bases below their truncation level, which come first
+                n_pairs = np.searchsorted(second_basis, n_bases)
+                covariances = self._stack_covariances(group)
+                packed_covariances = covariances[:, first_basis[:n_pairs], second_basis[:n_pairs]] * weights[:n_pairs]
+                variance = packed_covariances @ basis_products[:n_pairs]
+                error[np.searchsorted(indices, group)] = np.sqrt(variance) * self.standard_deviations[group, np.newaxis]
+        return self._unscale(error, scales)
+
+    def sample_covariance(self, design_matrix, rows=None, columns=None):
+        """
+        Compute the covariance matrices of the sampled spectra in the batch.
+
+        Args:
+            design_matrix (ndarray): 2D array containing the evaluation of the basis functions on the desired sampling
+                grid.
+            rows (slice/ndarray): Rows of the batch to be processed, as a slice or sorted indices. All rows are
+                processed by default.
+            columns (ndarray): Indices of the samples defining the columns of the covariance matrices to be computed.
+                All columns are computed by default.
+
+        Returns:
+            ndarray: 3D array (n_rows, n_samples, n_columns) containing the covariance matrix (or the requested columns
+                of it) of each sampled spectrum. Rows corresponding to spectra without covariance information are
+                filled with NaN.
+        """
+        covariance, scales = self._sample_covariance(design_matrix, rows, columns)
+        if scales is None:
+            return covariance
+        return self._unscale(covariance, np.outer(scales, scales if columns is None else scales[columns]))
+
+    def _sample_covariance(self, design_matrix, rows=None, columns=None):
+        # Covariance matrices in the units of the prepared design matrix, together with the scales of its columns
+        indices = self._get_row_indices(rows)
+        design_matrix, scales = self._prepare_design_matrix(design_matrix)
+        n_samples = design_matrix.shape[1]
+        n_columns = n_samples if columns is None else len(columns)
+        covariance = np.full((len(indices), n_samples, n_columns), np.nan, dtype=self.dtype)
+        for n_bases, group in self._get_truncation_groups(indices[self.has_covariance[indices]], design_matrix):
+            # The sampled covariance matrices are dense anyway, so dense products are faster even for sparse design
+            # matrices
+            truncated_design_matrix = design_matrix[:n_bases]
+            if issparse(truncated_design_matrix):
+                truncated_design_matrix = truncated_design_matrix.toarray()
+            column_design_matrix = truncated_design_matrix if columns is None else truncated_design_matrix[:, columns]
+            covariances = self._stack_covariances(group)[:, :n_bases, :n_bases]
+            covariance[np.searchsorted(indices, group)] = truncated_design_matrix.T @ covariances @ \
+                column_design_matrix
+        return covariance, scales
+
+    def sample_covariance_factor(self, design_matrix, rows=None):
+        """
+        Compute a factor F of the covariance matrices of the sampled spectra in the batch such that the covariance of
+            each spectrum is F.T @ F. The factor is computed from the Cholesky decomposition of the covariance of the
+            coefficients (C = L @ L.T) as F = L.T @ D, scaled by the standard deviation of the solution, so it only has
+            n_bases rows and the diagonal of F.T @ F is the square of the errors returned by sample_error.
+
+        Args:
+            design_matrix (ndarray): 2D array containing the evaluation of the basis functions on the desired sampling
+                grid.
+            rows (slice/ndarray): Rows of the batch to be processed, as a slice or sorted indices. All rows are
+                processed by default.
+
+        Returns:
+            ndarray: 3D array (n_rows, n_bases, n_samples) containing the factor of each spectrum. The factors of
+                truncated spectra are padded with rows of zeros. Rows corresponding to spectra without covariance
+                information are filled with NaN.
+        """
+        indices = self._get_row_indices(rows)
+        design_matrix, scales = self._prepare_design_matrix(design_matrix)
+        factor = np.full((len(indices), design_matrix.shape[0], design_matrix.shape[1]), np.nan, dtype=self.dtype)
+        for n_bases, group in self._get_truncation_groups(indices[self.has_covariance[indices]], design_matrix):
+            positions = np.searchsorted(indices, group)
+            truncated_design_matrix = design_matrix[:n_bases]
+            if issparse(truncated_design_matrix):
+                truncated_design_matrix = truncated_design_matrix.toarray()
+            square_roots = _get_square_roots(self._stack_covariances(group)[:, :n_bases, :n_bases])
+            factor[positions] = 0.
+            factor[positions, :n_bases] = square_roots.transpose(0, 2, 1) @ truncated_design_matrix * \
+                self.standard_deviations[group, np.newaxis, np.newaxis]
+        return self._unscale(factor, scales)
+
+    def sample_covariance_band(self, design_matrix, bandwidth, rows=None):
+        """
+        Compute the diagonals of the covariance matrices of the sampled spectra in the batch up to a given distance
+            from the main diagonal. The full matrices are never built, so the cost grows linearly with the number of
+            samples.
+
+        Args:
+            design_matrix (ndarray): 2D array containing the evaluation of the basis functions on the desired sampling
+                grid.
+            bandwidth (int): Number of diagonals below the main diagonal to be computed.
+            rows (slice/ndarray): Rows of the batch to be processed, as a slice or sorted indices. All rows are
+                processed by default.
+
+        Returns:
+            ndarray: 3D array (n_rows, bandwidth + 1, n_samples) where element [k, d, i] contains the covariance
+                between samples i + d and i of spectrum k. Elements outside the matrix (i + d >= n_samples) and rows
+                corresponding to spectra without covariance information are filled with NaN.
+        """
+        covariance_band, scales = self._sample_covariance_band(design_matrix, bandwidth, rows)
+        if scales is None:
+            return covariance_band
+        # Element [d, i] is scaled by the scales of samples i + d and i
+        band_scales = np.ones((bandwidth + 1, len(scales)))
+        for offset in range(min(bandwidth, len(scales) - 1) + 1):
+            band_scales[offset, :len(scales) - offset] = scales[offset:] * scales[:len(scales) - offset]
+        return self._unscale(covariance_band, band_scales)
+
+    def _sample_covariance_band(self, design_matrix, bandwidth, rows=None):
+        # Banded covariances in the units of the prepared design matrix, together with the scales of its columns
+        indices = self._get_row_indices(rows)
+        design_matrix, scales = self._prepare_design_matrix(design_matrix)
+        n_samples = design_matrix.shape[1]
+        covariance_band = np.full((len(indices), bandwidth + 1, n_samples), np.nan, dtype=self.dtype)
+        for n_bases, group in self._get_truncation_groups(indices[self.has_covariance[indices]], design_matrix):
+            positions = np.searchsorted(indices, group)
+            truncated_design_matrix = design_matrix[:n_bases]
+            if issparse(truncated_design_matrix):
+                truncated_design_matrix = truncated_design_matrix.toarray()
+            weighted_design_matrices = self._stack_covariances(group)[:, :n_bases, :n_bases] @ truncated_design_matrix
+            for offset in range(min(bandwidth, n_samples - 1) + 1):
+                covariance_band[positions, offset, :n_samples - offset] = np.einsum(
+                    'bi,kbi->ki', truncated_design_matrix[:, offset:],
+                    weighted_design_matrices[:, :, :n_samples - offset])
+        return covariance_band, scales
+
+    def sample_correlation_band(self, design_matrix, bandwidth, rows=None):
+        """
+        Compute the correlations between samples closer than a given distance for the spectra in the batch.
+
+        Args:
+            design_matrix (ndarray): 2D array containing the evaluation of the basis functions on the desired sampling
+                grid.
+            bandwidth (int): Maximum distance (in number of samples) between correlated samples.
+            rows (slice/ndarray): Rows of the batch to be processed, as a slice or sorted indices. All rows are
+                processed by default.
+
+        Returns:
+            ndarray: 3D array (n_rows, bandwidth, n_samples) where element [k, d - 1, i] contains the correlation
+                between samples i + d and i of spectrum k. Elements outside the matrix (i + d >= n_samples) and rows
+                corresponding to spectra without covariance information are filled with NaN.
+        """
+        # Correlations do not depend on the scales of the columns of the design matrix
+        return correlation_band_from_covariance_band(self._sample_covariance_band(design_matrix, bandwidth, rows)[0])
+
+    def sample_correlation(self, design_matrix, rows=None):
+        """
+        Compute the correlation matrices of the spectra in the batch.
+
+        Args:
+            design_matrix (ndarray): 2D array containing the evaluation of the basis functions on the desired sampling
+                grid.
+            rows (slice/ndarray): Rows of the batch to be processed, as a slice or sorted indices. All rows are
+                processed by default.
+
+        Returns:
+            ndarray: 2D array (n_rows, n_samples * (n_samples - 1) / 2) containing the lower triangle (excluding the
+                diagonal) of the correlation matrix of each spectrum. Rows corresponding to spectra without covariance
+                information are filled with NaN.
+        """
+        indices = self._get_row_indices(rows)
+        lower_triangle = np.tril_indices(design_matrix.shape[1], k=-1)
+        correlation = np.full((len(indices), len(lower_triangle[0])), np.nan, dtype=self.dtype)
+        valid = self.has_covariance[indices]
+        if valid.any():
+            # Correlations do not depend on the scales of the columns of the design matrix
+            sampled_covariance, _ = self._sample_covariance(design_matrix, indices[valid])
+            correlation[valid] = correlation_from_covariance(sampled_covariance)[:, lower_triangle[0],
+                                                                                 lower_triangle[1]]
+        return correlation
+
+    def _stack_covariances(self, indices):
+        return np.stack([self.covariances[index] for index in indices]).astype(self.dtype, copy=False)
+
+    @staticmethod
+    def _get_block_size(row_size):
+        return max(1, _BLOCK_MEMORY // (8 * max(1, row_size)))
+
+    def get_blocks(self, row_size):
+        """
+        Split the batch into blocks of consecutive rows so that the intermediate arrays required to process one block
+            stay within a bounded amount of memory.
+
+        Args:
+            row_size (int): Number of elements of the intermediate arrays created per source.
+
+        Returns:
+            list: List of slices, one per block.
+        """
+        block_size = self._get_block_size(row_size)
+        return [slice(start, min(start + block_size, self.n_sources)) for start in range(0, self.n_sources,
+                                                                                         block_size)]
+
+
+def get_batches(df, truncation=False, dtype=np.float64):
+    """
+    Create a batch per band from a Pandas DataFrame. Batches do not depend on the sampling grid, so they can be reused
+        to sample the same spectra on several grids.
+
+    Args:
+        df (DataFrame): DataFrame containing the mean spectra of both bands (refer to XpSpectraBatch.from_data_frame).
+        truncation (bool): Toggle truncation of the set of bases.
+        dtype (dtype): Floating point type used to store the coefficients and compute the sampled spectra.
+
+    Returns:
+        dict: A dictionary containing the batch of each band.
+    """
+    return {band: XpSpectraBatch.from_data_frame(df, band, truncation=truncation, dtype=dtype) for band in BANDS}
+
+
+def _get_square_roots(matrices):
+    """
+    Compute matrices L such that L @ L.T reproduces each of the input symmetric positive semi-definite matrices.
+
+    Args:
+        matrices (ndarray): 3D array containing a stack of symmetric matrices.
+
+    Returns:
+        ndarray: 3D array containing the lower triangular Cholesky factor of each matrix. If any of the matrices is not
+            numerically positive definite, the square roots obtained from the eigendecomposition are returned instead.
+    """
+    try:
+        return np.linalg.cholesky(matrices)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(matrices)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0., None))[:, np.newaxis, :]
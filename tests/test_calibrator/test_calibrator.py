@@ -4,7 +4,7 @@ import pytest
 from pandas import testing as pdt
 
 from gaiaxpy import calibrate
-from gaiaxpy.calibrator.calibrator import _calibrate, _create_spectrum
+from gaiaxpy.calibrator.calibrator import _calibrate
 from gaiaxpy.core.config import load_xpmerge_from_xml, load_xpsampling_from_xml
 from gaiaxpy.core.satellite import BANDS
 from gaiaxpy.file_parser.parse_internal_continuous import InternalContinuousParser
@@ -12,12 +12,13 @@ from gaiaxpy.input_reader.required_columns import MANDATORY_INPUT_COLS, CORR_INP
 from gaiaxpy.spectrum.absolute_sampled_spectrum import AbsoluteSampledSpectrum
 from gaiaxpy.spectrum.sampled_basis_functions import SampledBasisFunctions
 from tests.files.paths import (mean_spectrum_csv_file, mean_spectrum_avro_file, mean_spectrum_fits_file,
-                               mean_spectrum_xml_file, mean_spectrum_xml_plain_file, mean_spectrum_ecsv_file)
+                               mean_spectrum_xml_file, mean_spectrum_xml_plain_file, mean_spectrum_ecsv_file,
+                               with_missing_bp_csv_file)
 from tests.test_calibrator.calibrator_solutions import (solution_default_df, solution_custom_df,
                                                         solution_v211w_default_df, solution_v211w_custom_df,
                                                         sol_custom_sampling_array, sol_v211w_default_sampling_array,
                                                         sol_default_sampling_array)
-from tests.utils.utils import is_instance_err_message, npt_array_err_message
+from tests.utils.utils import create_absolute_sampled_spectrum, is_instance_err_message, npt_array_err_message
 
 # Load variables
 bp_model = 'v211w'  # Alternative bp model
@@ -39,8 +40,8 @@ def test_create_spectrum(input_file):
         # Create sampled basis functions
         sampled_basis_func = {band: SampledBasisFunctions.from_design_matrix(xp_sampling_grid, xp_design_matrices[band])
                               for band in BANDS}
-        return _create_spectrum(parsed_spectrum_file.iloc[0], truncation=False, design_matrix=sampled_basis_func,
-                                merge=xp_merge)
+        return create_absolute_sampled_spectrum(parsed_spectrum_file.iloc[0], truncation=False,
+                                                design_matrix=sampled_basis_func, merge=xp_merge)
 
     spectrum = generate_single_spectrum(input_file)
     assert isinstance(spectrum, AbsoluteSampledSpectrum), is_instance_err_message(input_file, AbsoluteSampledSpectrum)
@@ -82,3 +83,10 @@ def test_custom_sampling_v211w_model(input_file, sampling, sampling_sol, solutio
 def test_sampling_wrong_array(array):
     with pytest.raises(ValueError):
         calibrate(mean_spectrum_avro_file, sampling=array, save_file=False)
+
+
+@pytest.mark.parametrize('input_file', [mean_spectrum_avro_file, with_missing_bp_csv_file])
+def test_outputs(input_file):
+    spectra_df, _ = calibrate(input_file, save_file=False)
+    flux_df, _ = calibrate(input_file, save_file=False, outputs='flux')
+    pdt.assert_frame_equal(flux_df, spectra_df.drop(columns='flux_error'))
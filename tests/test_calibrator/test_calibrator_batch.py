@@ -0,0 +1,146 @@
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+import pytest
+
+from gaiaxpy import calibrate
+from gaiaxpy.calibrator.calibrator import __generate_xp_matrices_and_merge
+from gaiaxpy.core.custom_errors import NoBandsAvailableError
+from gaiaxpy.core.generic_functions import correlation_band_from_covariance_band, correlation_from_covariance
+from gaiaxpy.core.satellite import BANDS, BP_WL, RP_WL
+from gaiaxpy.input_reader.input_reader import InputReader
+from gaiaxpy.spectrum.absolute_sampled_spectrum import _sample_covariance
+from gaiaxpy.spectrum.xp_spectra_batch import get_batches
+from tests.files.paths import with_missing_bp_csv_file
+from tests.utils.utils import assert_frames_close, create_absolute_sampled_spectrum
+
+_rtol, _atol = 1e-12, 1e-30
+
+correlation_options = [{}, {'with_correlation': True}, {'with_correlation': True, 'correlation_format': 'factor'},
+                       {'with_correlation': True, 'correlation_bandwidth': 4}]
+
+
+@pytest.fixture(scope='module')
+def input_df():
+    # Sources with both bands, only RP (from the input file) and only BP (removing RP from the first source)
+    df = pd.read_csv(with_missing_bp_csv_file)
+    missing_rp_row = df.iloc[[0]].copy()
+    missing_rp_row[[column for column in df.columns if column.startswith('rp_')]] = np.nan
+    missing_rp_row['source_id'] = 1
+    yield pd.concat([df, missing_rp_row], ignore_index=True)
+
+
+def _sample_split_spectra(parsed_df, design_matrices, truncation, covariance_key, bandwidth):
+    # Sampled BP and RP spectra of each source, in the format returned by AbsoluteSampledSpectrum.generate_spectra
+    batches = get_batches(parsed_df, truncation=truncation)
+    design_matrices = {band: design_matrices[band].get_design_matrix() for band in BANDS}
+    fluxes = {band: batches[band].sample_flux(design_matrices[band]) for band in BANDS}
+    errors = {band: batches[band].sample_error(design_matrices[band]) for band in BANDS}
+    covariances = {band: _sample_covariance(batches[band], design_matrices[band], None, covariance_key, bandwidth)
+                   for band in BANDS} if covariance_key else dict()
+    for index, source_id in enumerate(parsed_df['source_id']):
+        split_spectrum = dict()
+        for band in BANDS:
+            if not batches[band].has_covariance[index]:
+                continue
+            split_spectrum[band] = {'flux': fluxes[band][index], 'error': errors[band][index]}
+            if covariance_key:
+                split_spectrum[band][covariance_key] = covariances[band][index]
+        yield source_id, split_spectrum
+
+
+def _merge_split_spectrum(source_id, split_spectrum, merge, positions, covariance_key):
+    # Reference merging the bands of a single source, in the format returned by AbsoluteSampledSpectrum.spectrum_to_dict
+    covariance = None
+    if len(split_spectrum) == 2:
+        bp_spectrum, rp_spectrum = split_spectrum[BANDS.bp], split_spectrum[BANDS.rp]
+        flux = bp_spectrum['flux'] * merge[BANDS.bp] + rp_spectrum['flux'] * merge[BANDS.rp]
+        error = np.hypot(bp_spectrum['error'] * merge[BANDS.bp], rp_spectrum['error'] * merge[BANDS.rp])
+        if covariance_key == 'factor':
+            covariance = np.vstack([bp_spectrum['factor'] * merge[BANDS.bp], rp_spectrum['factor'] * merge[BANDS.rp]])
+        elif covariance_key:
+            # Element [..., i] of the band and of the matrix belongs to column i of the covariance matrix
+            covariance = bp_spectrum[covariance_key] * merge[BANDS.bp] + rp_spectrum[covariance_key] * merge[BANDS.rp]
+    else:
+        (band, spectrum), = split_spectrum.items()
+        masked = positions <= RP_WL.low if band == BANDS.rp else positions >= BP_WL.high
+        flux = np.where(masked, np.nan, spectrum['flux'])
+        error = np.where(masked, np.nan, spectrum['error'])
+        if covariance_key == 'factor':
+            # The rows of the missing band are zero so that all factors have the same shape
+            missing_factor = np.zeros_like(spectrum['factor'])
+            covariance = np.vstack([spectrum['factor'], missing_factor] if band == BANDS.bp else
+                                   [missing_factor, spectrum['factor']])
+            covariance[:, masked] = np.nan
+        elif covariance_key == 'band':
+            covariance = spectrum['band'].copy()
+            for offset in range(covariance.shape[0]):
+                # Element [d, i] is masked if its row (i + d) or its column (i) is
+                masked_elements = masked.copy()
+                masked_elements[:len(masked) - offset] |= masked[offset:]
+                covariance[offset, masked_elements] = np.nan
+        elif covariance_key:
+            covariance = spectrum['cov'].copy()
+            covariance[:, masked] = np.nan
+            covariance[masked, :] = np.nan
+    spectrum_dict = {'source_id': source_id, 'flux': flux, 'flux_error': error}
+    if covariance_key == 'factor':
+        spectrum_dict['covariance_factor'] = covariance
+    elif covariance_key == 'band':
+        spectrum_dict['banded_correlation'] = correlation_band_from_covariance_band(covariance)
+    elif covariance_key:
+        spectrum_dict['correlation'] = correlation_from_covariance(covariance)[np.tril_indices(len(positions), k=-1)]
+    return spectrum_dict
+
+
+def _calibrate_per_source(df, sampling, truncation=False, with_correlation=False, correlation_format='matrix',
+                          correlation_bandwidth=None):
+    # Reference merging the bands of each source separately
+    parsed_df, _ = InputReader(df, calibrate, truncation).read()
+    design_matrices, merge = __generate_xp_matrices_and_merge('calibrator', sampling, 'v375wi', 'v142r')
+    covariance_key = None
+    if with_correlation:
+        covariance_key = 'factor' if correlation_format == 'factor' else 'band' if correlation_bandwidth else 'cov'
+    positions = design_matrices[BANDS.bp].get_sampling_grid()
+    split_spectra = _sample_split_spectra(parsed_df, design_matrices, truncation, covariance_key,
+                                          correlation_bandwidth)
+    return pd.DataFrame([_merge_split_spectrum(source_id, split_spectrum, merge, positions, covariance_key)
+                         for source_id, split_spectrum in split_spectra])
+
+
+@pytest.mark.parametrize('sampling', [None, np.linspace(330, 1050, 150), np.linspace(330, 500, 40)])
+@pytest.mark.parametrize('truncation', [False, True])
+@pytest.mark.parametrize('options', correlation_options)
+def test_batch_matches_per_source_merge(input_df, sampling, truncation, options):
+    spectra, _ = calibrate(input_df, sampling=sampling, truncation=truncation, save_file=False, **options)
+    expected = _calibrate_per_source(input_df, sampling, truncation=truncation, **options)
+    assert_frames_close(spectra, expected, rtol=_rtol, atol=_atol)
+
+
+@pytest.mark.parametrize('truncation', [False, True])
+@pytest.mark.parametrize('with_correlation', [False, True])
+def test_batch_matches_create_spectrum(input_df, truncation, with_correlation):
+    spectra, _ = calibrate(input_df, truncation=truncation, with_correlation=with_correlation, save_file=False)
+    parsed_df, _ = InputReader(input_df, calibrate, truncation).read()
+    design_matrices, merge = __generate_xp_matrices_and_merge('calibrator', None, 'v375wi', 'v142r')
+    expected = pd.DataFrame([create_absolute_sampled_spectrum(row, truncation, design_matrices, merge,
+                                                              with_correlation=with_correlation).spectrum_to_dict(
+        with_correlation)
+                             for _, row in parsed_df.iterrows()])
+    assert_frames_close(spectra, expected, rtol=_rtol, atol=_atol)
+
+
+def test_missing_band_masks(input_df):
+    spectra, sampling = calibrate(input_df, save_file=False)
+    flux = np.stack(spectra['flux'])
+    # Only RP in the second source and only BP in the last one
+    npt.assert_array_equal(np.isnan(flux[1]), sampling <= RP_WL.low)
+    npt.assert_array_equal(np.isnan(flux[-1]), sampling >= BP_WL.high)
+    assert not np.isnan(flux[0]).any()
+
+
+def test_no_bands(input_df):
+    df = input_df.iloc[[0]].copy()
+    df[[column for column in df.columns if column.startswith(tuple(f'{band}_' for band in BANDS))]] = np.nan
+    with pytest.raises(NoBandsAvailableError):
+        calibrate(df, save_file=False)
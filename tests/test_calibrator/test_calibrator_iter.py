@@ -0,0 +1,19 @@
+import numpy.testing as npt
+import pandas as pd
+import pytest
+
+from gaiaxpy import calibrate, calibrate_iter
+from tests.files.paths import mean_spectrum_avro_file, with_missing_bp_csv_file
+from tests.utils.utils import assert_frames_close
+
+
+@pytest.mark.parametrize('input_file', [mean_spectrum_avro_file, with_missing_bp_csv_file])
+@pytest.mark.parametrize('with_correlation', [False, True])
+def test_calibrate_iter(input_file, with_correlation):
+    spectra, sampling = calibrate(input_file, truncation=True, with_correlation=with_correlation, save_file=False)
+    chunks = list(calibrate_iter(input_file, truncation=True, with_correlation=with_correlation, save_file=False,
+                                 chunk_size=2))
+    assert [len(chunk) for chunk, _ in chunks] == [min(2, len(spectra) - start) for start in range(0, len(spectra), 2)]
+    for _, chunk_sampling in chunks:
+        npt.assert_array_equal(chunk_sampling, sampling)
+    assert_frames_close(pd.concat([chunk for chunk, _ in chunks], ignore_index=True), spectra)
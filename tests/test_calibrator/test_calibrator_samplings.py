@@ -0,0 +1,30 @@
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+from gaiaxpy import calibrate
+from tests.files.paths import mean_spectrum_avro_file, with_missing_bp_csv_file
+from tests.utils.utils import assert_frames_close
+
+samplings = [np.linspace(400, 900, 100), np.arange(336, 1021, 2), np.geomspace(330, 1049.9999999999, 361)]
+
+
+@pytest.mark.parametrize('input_file', [mean_spectrum_avro_file, with_missing_bp_csv_file])
+@pytest.mark.parametrize('with_correlation', [False, True])
+def test_calibrate_samplings(input_file, with_correlation):
+    output = calibrate(input_file, sampling=samplings, truncation=True, with_correlation=with_correlation,
+                       save_file=False)
+    assert len(output) == len(samplings)
+    for (calibrated_spectra, calibrated_sampling), sampling in zip(output, samplings):
+        spectra, _ = calibrate(input_file, sampling=sampling, truncation=True, with_correlation=with_correlation,
+                               save_file=False)
+        assert_frames_close(calibrated_spectra, spectra, rtol=1e-12, atol=1e-30)
+        npt.assert_array_equal(calibrated_sampling, sampling)
+
+
+def test_calibrate_samplings_files(tmp_path):
+    calibrate(with_missing_bp_csv_file, sampling={'blue': samplings[0], 'full': samplings[1]}, output_path=tmp_path,
+              output_format='csv')
+    for key in ['blue', 'full']:
+        assert (tmp_path / f'output_spectra_{key}.csv').exists()
+        assert (tmp_path / f'output_spectra_{key}_sampling.csv').exists()
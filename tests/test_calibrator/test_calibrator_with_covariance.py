@@ -6,7 +6,9 @@ import pandas as pd
 import pandas.testing as pdt
 
 from gaiaxpy import calibrate
-from gaiaxpy.core.generic_functions import str_to_array, correlation_to_covariance
+from gaiaxpy.core.generic_functions import (str_to_array, correlation_from_factor, correlation_to_covariance,
+                                            covariance_from_factor)
+from gaiaxpy.core.satellite import BP_WL, RP_WL
 from tests.files.paths import files_path, with_missing_bp_csv_file
 from tests.test_calibrator.calibrator_solutions import sol_with_covariance_sampling_array
 
@@ -45,3 +47,44 @@ def test_with_covariance():
         num_close = np.sum(np.isclose(actual_cov, solution_cov, rtol=_rtol))
         total_num = actual_cov.shape[0] * actual_cov.shape[1]
         assert num_close == total_num
+
+
+def test_with_covariance_factor():
+    spectra, _ = calibrate(with_missing_bp_csv_file, with_correlation=True, correlation_format='factor',
+                           save_file=False)
+    factors = spectra['covariance_factor'].values
+    assert len({factor.shape for factor in factors}) == 1
+    for factor, error in zip(factors, spectra['flux_error'].values):
+        npt.assert_allclose(np.sqrt(np.diag(covariance_from_factor(factor))), error, rtol=_rtol, atol=_atol)
+
+
+def test_correlation_formats_match_single_band_samples():
+    spectra, sampling = calibrate(with_missing_bp_csv_file, with_correlation=True, save_file=False)
+    factor_spectra, _ = calibrate(with_missing_bp_csv_file, with_correlation=True, correlation_format='factor',
+                                  save_file=False)
+    n_samples = len(sampling)
+    lower_triangle = np.tril_indices(n_samples, k=-1)
+    # Samples outside the overlap only get flux from one band, so both formats agree on the pairs of them in the
+    # same band. The first and last sources have both bands, so their spectra are merged.
+    for index in [0, 2]:
+        correlation = np.zeros((n_samples, n_samples))
+        correlation[lower_triangle] = spectra['correlation'].iloc[index]
+        factor_correlation = correlation_from_factor(factor_spectra['covariance_factor'].iloc[index])
+        for samples in [np.flatnonzero(sampling < RP_WL.low), np.flatnonzero(sampling > BP_WL.high)]:
+            block = np.ix_(samples, samples)
+            block_lower_triangle = np.tril_indices(len(samples), k=-1)
+            npt.assert_allclose(factor_correlation[block][block_lower_triangle],
+                                correlation[block][block_lower_triangle], rtol=_rtol, atol=_atol)
+
+
+def test_with_banded_correlation():
+    spectra, _ = calibrate(with_missing_bp_csv_file, with_correlation=True, save_file=False)
+    banded_spectra, _ = calibrate(with_missing_bp_csv_file, with_correlation=True, correlation_bandwidth=3,
+                                  save_file=False)
+    for correlation, correlation_band in zip(spectra['correlation'], banded_spectra['banded_correlation']):
+        n_samples = correlation_band.shape[1]
+        full_correlation = np.zeros((n_samples, n_samples))
+        full_correlation[np.tril_indices(n_samples, k=-1)] = correlation
+        for offset in range(1, 4):
+            npt.assert_allclose(correlation_band[offset - 1, :n_samples - offset],
+                                np.diagonal(full_correlation, -offset), rtol=_rtol, atol=_atol)
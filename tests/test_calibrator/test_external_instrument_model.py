@@ -2,6 +2,7 @@ from configparser import ConfigParser
 from os.path import join
 
 import numpy as np
+import numpy.testing as npt
 import pytest
 from numpy import ndarray
 
@@ -9,9 +10,10 @@ from gaiaxpy.calibrator.calibrator import __create_merge
 from gaiaxpy.calibrator.external_instrument_model import ExternalInstrumentModel
 from gaiaxpy.config.paths import config_path, config_ini_file
 from gaiaxpy.core.config import load_xpmerge_from_xml, load_xpsampling_from_xml
-from gaiaxpy.core.satellite import BANDS
+from gaiaxpy.core import nature
+from gaiaxpy.core.satellite import BANDS, BP_WL, RP_WL, TELESCOPE_PUPIL_AREA
 from gaiaxpy.spectrum.sampled_basis_functions import SampledBasisFunctions
-from tests.utils.utils import assert_band_err
+from tests.utils.utils import assert_band_err, evaluate_hermite_function
 
 rtol = 1e-6
 atol = 1e-4
@@ -70,3 +72,33 @@ def test_band_merge(band, sampling_grid_xp_merge, xp_merge_from_instrument_model
     _, xp_merge = sampling_grid_xp_merge
     assert np.allclose(xp_merge_from_instrument_model[band], xp_merge[band], rtol=rtol, atol=atol), assert_band_err(
         band)
+
+
+def _design_matrix_per_sample(sampling, weights, model):
+    # Reference construction evaluating each basis on each sample separately
+    bases = model.bases
+    scale = (bases['normRangeMax'] - bases['normRangeMin']) / (bases['pwlRangeMax'] - bases['pwlRangeMin'])
+    offset = bases['normRangeMin'] - bases['pwlRangeMin'] * scale
+    hermite = np.array([[evaluate_hermite_function(n, float(model.wl_to_pwl(wl)) * scale + offset, weight)
+                         for wl, weight in zip(sampling, weights)] for n in range(bases['nInverseBasesCoefficients'])])
+    transformed = bases['transformationMatrix'] @ (bases['inverseBasesCoefficients'] @ hermite)
+    hc = 1.e9 * nature.C * nature.PLANCK
+    responses = [float(model.get_response(wl)) for wl in sampling]
+    norm = np.array([hc / (TELESCOPE_PUPIL_AREA * r * wl) if r > 0 else 0. for r, wl in zip(responses, sampling)])
+    return transformed[:bases['nBases']] * norm
+
+
+@pytest.mark.parametrize('band', BANDS)
+@pytest.mark.parametrize('sampling', [np.linspace(200, 1200, 120), np.array([RP_WL.low, 640., BP_WL.high])])
+def test_design_matrix_matches_per_sample_evaluation(band, sampling, instrument_model):
+    weights = __create_merge(band, sampling)
+    design_matrix = SampledBasisFunctions.from_external_instrument_model(sampling, weights,
+                                                                         instrument_model[band]).design_matrix
+    npt.assert_allclose(design_matrix, _design_matrix_per_sample(sampling, weights, instrument_model[band]),
+                        rtol=1e-10, atol=1e-30)
+
+
+def test_merge_boundaries():
+    sampling = np.array([RP_WL.low - 1., RP_WL.low, (RP_WL.low + BP_WL.high) / 2., BP_WL.high, BP_WL.high + 1.])
+    npt.assert_array_equal(__create_merge(BANDS.bp, sampling), [1., 1., 0.5, 0., 0.])
+    npt.assert_array_equal(__create_merge(BANDS.rp, sampling), [0., 0., 0.5, 1., 1.])
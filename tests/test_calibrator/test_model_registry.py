@@ -0,0 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+from gaiaxpy import calibrate
+from gaiaxpy.calibrator import model_registry
+from gaiaxpy.calibrator.model_registry import CalibrationModelRegistry
+from gaiaxpy.core.config import load_xpmerge_from_xml, load_xpsampling_from_xml
+from gaiaxpy.core.satellite import BANDS
+from tests.files.paths import mean_spectrum_avro_file
+from tests.test_calibrator.test_external_instrument_model import get_file_for_xp
+from tests.utils.utils import assert_frames_close
+
+bp_model, rp_model = 'v375wi', 'v142r'
+
+
+@pytest.fixture
+def registry():
+    yield CalibrationModelRegistry()
+
+
+def test_files(registry):
+    files = registry.get_files(bp_model, rp_model)
+    for xp in BANDS:
+        assert files[xp] == {key: get_file_for_xp(xp, key) for key in ('dispersion', 'response', 'bases')}
+
+
+def test_instrument_models_parsed_once(registry, monkeypatch):
+    calls = []
+    from_config_csv = model_registry.ExternalInstrumentModel.from_config_csv
+
+    def counting_from_config_csv(*args):
+        calls.append(args)
+        return from_config_csv(*args)
+
+    monkeypatch.setattr(model_registry.ExternalInstrumentModel, 'from_config_csv', counting_from_config_csv)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: registry.get_instrument_models(bp_model, rp_model), range(8)))
+    assert len(calls) == len(BANDS)
+    assert all(result is results[0] for result in results)
+    for instrument_model in results[0].values():
+        assert not instrument_model.bases['transformationMatrix'].flags.writeable
+        assert not instrument_model.response['response'].flags.writeable
+        with pytest.raises(ValueError):
+            instrument_model.dispersion['wavelength'][0] = 0.
+    registry.clear()
+    registry.get_instrument_models(bp_model, rp_model)
+    assert len(calls) == 2 * len(BANDS)
+
+
+def test_default_arrays(registry):
+    arrays = registry.get_default_arrays(bp_model, rp_model)
+    assert arrays is registry.get_default_arrays(bp_model, rp_model)
+    sampling_grid, xp_merge = load_xpmerge_from_xml(bp_model=bp_model)
+    xp_sampling = load_xpsampling_from_xml(bp_model=bp_model)
+    npt.assert_array_equal(arrays['sampling_grid'], sampling_grid)
+    for xp in BANDS:
+        npt.assert_array_equal(arrays[f'{xp}_merge'], xp_merge[xp])
+        npt.assert_array_equal(arrays[f'{xp}_design_matrix'], xp_sampling[xp])
+    assert not any(array.flags.writeable for array in arrays.values())
+
+
+@pytest.mark.parametrize('sampling', [None, np.linspace(350, 1000, 300)])
+def test_calibrate_after_clear(sampling):
+    spectra, _ = calibrate(mean_spectrum_avro_file, sampling=sampling, save_file=False)
+    model_registry.calibration_model_registry.clear()
+    spectra_after_clear, _ = calibrate(mean_spectrum_avro_file, sampling=sampling, save_file=False)
+    assert_frames_close(spectra_after_clear, spectra)
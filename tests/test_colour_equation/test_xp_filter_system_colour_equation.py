@@ -6,7 +6,7 @@ import pandas.testing as pdt
 import pytest
 
 from gaiaxpy import generate, PhotometricSystem
-from gaiaxpy.colour_equation.xp_filter_system_colour_equation import apply_colour_equation
+from gaiaxpy.colour_equation.xp_filter_system_colour_equation import _load_colour_equation, apply_colour_equation
 from gaiaxpy.core.generic_functions import cast_output
 from gaiaxpy.file_parser.cast import _cast
 from tests.files.paths import colour_eq_csv_file
@@ -97,3 +97,42 @@ def test_gaiaxpy_vs_pmn_photometry():
     output_photometry = __arrange_output(output_photometry, label)
     johnson_solution_df = __prepare_solution()
     pdt.assert_frame_equal(output_photometry, johnson_solution_df, check_like=True)
+
+
+def _correct_row(row, label, colour_equation, zero_point):
+    # Reference applying the colour equation to a single source
+    polyfunc, colour_range = colour_equation['polyfunc'], colour_equation['colour_range']
+    band, (band_0, band_1) = colour_equation['filter'], colour_equation['colour_index'].split('-')
+    colour = row[f'{label}_mag_{band_0}'] - row[f'{label}_mag_{band_1}']
+    colour_limit = min(max(colour, min(colour_range)), max(colour_range))
+    correction = polyfunc(colour) if colour == colour_limit else polyfunc(colour_limit) + polyfunc.deriv()(
+        colour_limit) * (colour - colour_limit)
+    mag = row[f'{label}_mag_{band}'] + correction
+    colour_err = math.hypot(get_mag_error(row[f'{label}_flux_{band_0}'], row[f'{label}_flux_error_{band_0}']),
+                            get_mag_error(row[f'{label}_flux_{band_1}'], row[f'{label}_flux_error_{band_1}']))
+    err = math.hypot(get_mag_error(row[f'{label}_flux_{band}'], row[f'{label}_flux_error_{band}']),
+                     colour_err * abs(polyfunc.deriv()(colour)))
+    flux = 10 ** (-0.4 * (mag - zero_point))
+    return {f'{label}_mag_{band}': mag, f'{label}_flux_{band}': flux,
+            f'{label}_flux_error_{band}': err * flux * math.log(10) / 2.5}
+
+
+@pytest.mark.parametrize('phot_system', [PhotometricSystem.JKC_Std, PhotometricSystem.SDSS_Std])
+def test_colour_range_extrapolation(phot_system):
+    label = phot_system.get_system_label()
+    colour_equation = _load_colour_equation(label)
+    band_0, band_1 = colour_equation['colour_index'].split('-')
+    photometry = generate(colour_eq_csv_file, phot_system, save_file=False)
+    photometry = pd.concat([photometry] * 4, ignore_index=True)
+    # Colours inside, below and above the colour range, and a missing colour
+    low, high = min(colour_equation['colour_range']), max(colour_equation['colour_range'])
+    n_sources = len(photometry) // 4
+    colours = np.concatenate([np.linspace(low, high, n_sources), np.linspace(low - 1, low - 0.01, n_sources),
+                              np.linspace(high + 0.01, high + 1, n_sources), np.full(n_sources, np.nan)])
+    photometry[f'{label}_mag_{band_0}'] = photometry[f'{label}_mag_{band_1}'] + colours
+    corrected_photometry = apply_colour_equation(photometry, photometric_system=phot_system, save_file=False)
+    zero_point = dict(zip(phot_system.get_bands(), phot_system.get_zero_points()))[colour_equation['filter']]
+    expected = pd.DataFrame([_correct_row(row, label, colour_equation, zero_point)
+                             for row in photometry.to_dict('records')])
+    pdt.assert_frame_equal(corrected_photometry[expected.columns], expected, rtol=1e-12)
+    assert corrected_photometry.iloc[3 * n_sources:][expected.columns].isna().all().all()
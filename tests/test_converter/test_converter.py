@@ -7,7 +7,7 @@ import pandas.testing as pdt
 import pytest
 
 from gaiaxpy import convert
-from gaiaxpy.converter.converter import _create_spectrum, get_design_matrices
+from gaiaxpy.converter.converter import get_design_matrices
 from gaiaxpy.core.satellite import BANDS
 from gaiaxpy.file_parser.parse_internal_continuous import InternalContinuousParser
 from gaiaxpy.file_parser.parse_internal_sampled import InternalSampledParser
@@ -19,7 +19,8 @@ from tests.files.paths import (con_ref_sampled_csv_path, con_ref_sampled_truncat
                                mean_spectrum_csv_file, mean_spectrum_ecsv_file, mean_spectrum_fits_file,
                                mean_spectrum_xml_file, mean_spectrum_xml_plain_file)
 from tests.test_converter.converter_paths import optimised_bases_df, converter_csv_solution_0_60_481_df
-from tests.utils.utils import get_spectrum_with_source_id_and_xp, npt_array_err_message, is_instance_err_message
+from tests.utils.utils import create_sampled_spectrum, get_spectrum_with_source_id_and_xp, npt_array_err_message, \
+    is_instance_err_message
 
 con_input_files = [mean_spectrum_avro_file, mean_spectrum_csv_file, mean_spectrum_ecsv_file, mean_spectrum_fits_file,
                    mean_spectrum_xml_file, mean_spectrum_xml_plain_file]
@@ -77,7 +78,7 @@ def test_create_spectrum(file, sampling):
     design_matrices = get_design_matrices(sampling, optimised_bases_df)
     for row in islice(parsed_input_dict, 1):  # Just the first row
         for band in BANDS:
-            spectrum[band] = _create_spectrum(row, truncation, design_matrices, band)
+            spectrum[band] = create_sampled_spectrum(row, truncation, design_matrices, band)
     assert spectrum[BANDS.bp].get_source_id() == spectrum[BANDS.rp].get_source_id()
     for band in BANDS:
         assert isinstance(spectrum[band], instance), is_instance_err_message(file, instance, band)
@@ -122,3 +123,17 @@ def test_sampling_error(file, _sampling):
 def test_sampling_equal(file, sampling):
     _, _positions = convert(file, sampling=sampling, truncation=True, save_file=False)
     npt.assert_array_equal(sampling, _positions)
+
+
+@pytest.mark.parametrize('outputs', ['flux', ['flux'], {'flux'}])
+def test_outputs(outputs):
+    converted_df, _ = convert(mean_spectrum_avro_file, save_file=False)
+    flux_df, _ = convert(mean_spectrum_avro_file, save_file=False, outputs=outputs)
+    pdt.assert_frame_equal(flux_df, converted_df.drop(columns='flux_error'))
+
+
+@pytest.mark.parametrize('outputs,with_correlation', [(set(), False), ('mag', False), ({'flux_error'}, False),
+                                                      ({'flux'}, True)])
+def test_wrong_outputs(outputs, with_correlation):
+    with pytest.raises(ValueError):
+        convert(mean_spectrum_avro_file, save_file=False, with_correlation=with_correlation, outputs=outputs)
@@ -0,0 +1,39 @@
+import numpy.testing as npt
+import pandas as pd
+import pytest
+
+from gaiaxpy import convert, convert_iter
+from gaiaxpy.core.generic_functions import str_to_array
+from tests.files.paths import mean_spectrum_avro_file, mean_spectrum_fits_file, with_missing_bp_csv_file
+from tests.utils.utils import assert_frames_close
+
+
+@pytest.mark.parametrize('input_file', [mean_spectrum_avro_file, with_missing_bp_csv_file, mean_spectrum_fits_file])
+@pytest.mark.parametrize('with_correlation', [False, True])
+def test_convert_iter(input_file, with_correlation):
+    spectra, sampling = convert(input_file, with_correlation=with_correlation, save_file=False)
+    chunks = list(convert_iter(input_file, with_correlation=with_correlation, save_file=False, chunk_size=1))
+    # One chunk per source, each one containing both bands
+    assert len(chunks) == len(spectra) // 2
+    for _, chunk_sampling in chunks:
+        npt.assert_array_equal(chunk_sampling, sampling)
+    assert_frames_close(pd.concat([chunk for chunk, _ in chunks], ignore_index=True), spectra)
+
+
+def test_convert_iter_append(tmp_path):
+    spectra, _ = convert(mean_spectrum_avro_file, save_file=False)
+    for _ in convert_iter(mean_spectrum_avro_file, output_path=tmp_path, output_file='spectra', output_format='csv',
+                          chunk_size=1):
+        pass
+    saved_spectra = pd.read_csv(tmp_path / 'spectra.csv')
+    for column in ['flux', 'flux_error']:
+        saved_spectra[column] = saved_spectra[column].apply(str_to_array)
+    assert_frames_close(saved_spectra, spectra)
+
+
+def test_convert_iter_wrong_arguments(tmp_path):
+    with pytest.raises(ValueError):
+        next(convert_iter(mean_spectrum_avro_file, save_file=False, chunk_size=0))
+    # Rows cannot be appended to FITS files
+    with pytest.raises(ValueError):
+        next(convert_iter(mean_spectrum_avro_file, output_path=tmp_path, output_format='fits'))
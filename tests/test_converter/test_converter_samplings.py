@@ -0,0 +1,36 @@
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+from gaiaxpy import convert
+from tests.files.paths import mean_spectrum_avro_file, with_missing_bp_csv_file
+from tests.utils.utils import assert_frames_close
+
+samplings = {'coarse': np.linspace(0, 60, 60), 'default': np.linspace(0, 60, 600), 'fine': np.linspace(-5, 65, 1400)}
+
+
+@pytest.mark.parametrize('input_file', [mean_spectrum_avro_file, with_missing_bp_csv_file])
+@pytest.mark.parametrize('truncation', [False, True])
+def test_convert_samplings(input_file, truncation):
+    output = convert(input_file, sampling=samplings, truncation=truncation, with_correlation=True, save_file=False)
+    assert list(output.keys()) == list(samplings.keys())
+    for key, sampling in samplings.items():
+        spectra, _ = convert(input_file, sampling=sampling, truncation=truncation, with_correlation=True,
+                             save_file=False)
+        assert_frames_close(output[key][0], spectra, rtol=1e-12, atol=1e-30)
+        npt.assert_array_equal(output[key][1], sampling)
+
+
+def test_convert_samplings_list(tmp_path):
+    sampling_list = list(samplings.values())
+    output = convert(with_missing_bp_csv_file, sampling=sampling_list, output_path=tmp_path, output_format='csv')
+    assert len(output) == len(sampling_list)
+    for index, sampling in enumerate(sampling_list):
+        npt.assert_array_equal(output[index][1], sampling)
+        assert (tmp_path / f'output_spectra_{index}.csv').exists()
+        assert (tmp_path / f'output_spectra_{index}_sampling.csv').exists()
+
+
+def test_convert_samplings_wrong_sampling():
+    with pytest.raises(ValueError):
+        convert(with_missing_bp_csv_file, sampling=[np.linspace(0, 60, 10), np.linspace(0, 80, 10)], save_file=False)
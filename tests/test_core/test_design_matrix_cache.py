@@ -0,0 +1,92 @@
+from os import listdir
+
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+from gaiaxpy.config.paths import hermite_bases_file, spline_bases_file
+from gaiaxpy.core import design_matrix_cache
+from gaiaxpy.core.design_matrix_cache import DesignMatrixCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    yield DesignMatrixCache(max_memory_size=2 ** 20, cache_dir=str(tmp_path), max_disk_size=2 ** 20)
+
+
+def _compute(calls, size=10):
+    def compute():
+        calls.append(1)
+        return {'design_matrix': np.arange(size, dtype=float)}
+
+    return compute
+
+
+def test_key_depends_on_content():
+    cache = DesignMatrixCache()
+    sampling = np.linspace(0, 60, 600)
+    key = cache.get_key('converter', sampling, files=[hermite_bases_file])
+    assert key == cache.get_key('converter', sampling.copy(), files=[hermite_bases_file])
+    assert key != cache.get_key('converter', np.linspace(0, 60, 601), files=[hermite_bases_file])
+    assert key != cache.get_key('converter', sampling, files=[spline_bases_file])
+    assert key != cache.get_key('calibrator', sampling, files=[hermite_bases_file])
+    assert key != cache.get_key('converter', sampling, files=[hermite_bases_file], bp_model='v211w')
+
+
+def test_memory_cache(cache):
+    calls = []
+    first = cache.get('key', _compute(calls))
+    second = cache.get('key', _compute(calls))
+    assert len(calls) == 1
+    assert first is second
+    with pytest.raises(ValueError):
+        first['design_matrix'][0] = 1.
+
+
+def test_disk_cache(cache):
+    calls = []
+    entry = cache.get('key', _compute(calls))
+    assert listdir(cache.cache_dir) == ['key.npz']
+    # A new cache using the same directory does not need to compute the entry again
+    other_cache = DesignMatrixCache(cache_dir=cache.cache_dir)
+    npt.assert_array_equal(other_cache.get('key', _compute(calls))['design_matrix'], entry['design_matrix'])
+    assert len(calls) == 1
+
+
+def test_eviction(cache):
+    calls = []
+    # Two entries (plus the .npz headers) fit in the cache, three do not
+    size = 2 ** 20 // 8 // 2 - 1000
+    cache.get('first', _compute(calls, size))
+    cache.get('second', _compute(calls, size))
+    cache.get('third', _compute(calls, size))
+    assert list(cache._entries.keys()) == ['second', 'third']
+    assert sorted(listdir(cache.cache_dir)) == ['second.npz', 'third.npz']
+    cache.clear(disk=True)
+    assert not cache._entries and not listdir(cache.cache_dir)
+
+
+def test_files_removed_by_other_processes(cache, monkeypatch):
+    calls = []
+    size = 2 ** 20 // 8 // 2 - 1000
+    cache.get('first', _compute(calls, size))
+    cache.get('second', _compute(calls, size))
+    other_cache = DesignMatrixCache(cache_dir=cache.cache_dir)
+    original_stat, original_utime = design_matrix_cache.stat, design_matrix_cache.utime
+
+    def remove_and_stat(path):
+        # Another process removes the file while the cache directory is being listed
+        design_matrix_cache.remove(path)
+        return original_stat(path)
+
+    def remove_and_utime(path):
+        design_matrix_cache.remove(path)
+        return original_utime(path)
+
+    monkeypatch.setattr(design_matrix_cache, 'utime', remove_and_utime)
+    npt.assert_array_equal(other_cache.get('first', _compute(calls, size))['design_matrix'], np.arange(size))
+    monkeypatch.setattr(design_matrix_cache, 'stat', remove_and_stat)
+    cache.get('third', _compute(calls, size))
+    assert len(calls) == 3
+    assert listdir(cache.cache_dir) == []
+    cache.clear(disk=True)
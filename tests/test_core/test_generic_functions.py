@@ -5,7 +5,11 @@ import pytest
 from gaiaxpy import generate, PhotometricSystem
 from gaiaxpy.core.generic_functions import (_get_system_label, _extract_systems_from_data, validate_pwl_sampling,
                                             array_to_symmetric_matrix, correlation_to_covariance,
-                                            get_matrix_size_from_lower_triangle)
+                                            get_matrix_size_from_lower_triangle, covariance_from_factor,
+                                            correlation_from_factor, correlation_from_covariance,
+                                            validate_correlation_format, correlation_band_from_covariance_band,
+                                            correlation_from_band, parse_dtype, parse_samplings,
+                                            collect_sampling_results)
 from tests.files.paths import mean_spectrum_fits_file
 
 
@@ -91,6 +95,63 @@ def test_correlation_to_covariance():
     npt.assert_allclose(cov, cov.T, rtol=1e-8)  # Check that the matrix is symmetric
 
 
+def test_covariance_from_factor():
+    factor = np.random.random((10, 7))
+    npt.assert_allclose(covariance_from_factor(factor), factor.T @ factor, rtol=1e-12)
+    npt.assert_allclose(covariance_from_factor(factor, rows=[1, 2], columns=slice(3, 5)),
+                        (factor.T @ factor)[[1, 2], 3:5], rtol=1e-12)
+
+
+def test_correlation_from_factor():
+    factor = np.random.random((10, 7))
+    npt.assert_allclose(correlation_from_factor(factor), correlation_from_covariance(factor.T @ factor), rtol=1e-12)
+
+
+def test_validate_correlation_format():
+    validate_correlation_format('matrix')
+    validate_correlation_format('factor')
+    with pytest.raises(ValueError):
+        validate_correlation_format('triangle')
+
+
+@pytest.mark.parametrize('bandwidth', [0, -1, 1.5, True, 'a'])
+def test_validate_correlation_bandwidth_wrong_value(bandwidth):
+    with pytest.raises(ValueError):
+        validate_correlation_format('matrix', bandwidth)
+
+
+def test_validate_correlation_bandwidth_factor():
+    validate_correlation_format('matrix', 3)
+    with pytest.raises(ValueError):
+        validate_correlation_format('factor', 3)
+
+
+@pytest.mark.parametrize('bandwidth', [1, 3, 7, 10])
+def test_correlation_band(bandwidth):
+    factor = np.random.random((10, 7))
+    covariance = factor.T @ factor
+    covariance_band = np.full((bandwidth + 1, 7), np.nan)
+    for offset in range(min(bandwidth, 6) + 1):
+        covariance_band[offset, :7 - offset] = np.diagonal(covariance, -offset)
+    correlation = correlation_from_covariance(covariance)
+    correlation_band = correlation_band_from_covariance_band(covariance_band)
+    assert correlation_band.shape == (bandwidth, 7)
+    banded_correlation = np.where(np.abs(np.subtract.outer(np.arange(7), np.arange(7))) <= bandwidth, correlation, 0.)
+    npt.assert_allclose(correlation_from_band(correlation_band), banded_correlation, rtol=1e-12)
+
+
+@pytest.mark.parametrize('dtype', ['float32', np.float32, np.dtype('float32')])
+def test_parse_dtype(dtype):
+    assert parse_dtype(dtype) == np.float32
+    assert parse_dtype('float64') == np.float64
+
+
+@pytest.mark.parametrize('dtype', ['float16', int, 'wrong'])
+def test_parse_dtype_wrong_value(dtype):
+    with pytest.raises(ValueError):
+        parse_dtype(dtype)
+
+
 def test_get_matrix_size():
     assert get_matrix_size_from_lower_triangle(np.ones(6)) == 4
     assert get_matrix_size_from_lower_triangle(np.ones(10)) == 5
@@ -116,3 +177,30 @@ def test_array_to_symmetric_matrix_mismatching(array):
 def test_array_to_symmetric_matrix_negative_size(array):
     with pytest.raises(ValueError):
         array_to_symmetric_matrix(array, -1)
+
+
+def test_parse_samplings():
+    grid = np.linspace(0, 60, 10)
+    assert parse_samplings(grid) == ([grid], None)
+    assert parse_samplings(None) == ([None], None)
+    # A list of numbers is a single grid
+    assert parse_samplings([400., 500.]) == ([[400., 500.]], None)
+    assert parse_samplings([grid, grid]) == ([grid, grid], [0, 1])
+    assert parse_samplings({'coarse': grid}) == ([grid], ['coarse'])
+    # Grids given as lists are also recognised
+    grids, keys = parse_samplings([[400., 500.], (600., 700., 800.)])
+    assert keys == [0, 1]
+    npt.assert_array_equal(grids[0], [400., 500.])
+    npt.assert_array_equal(grids[1], [600., 700., 800.])
+    grids, keys = parse_samplings({'coarse': [400., 500.]})
+    assert isinstance(grids[0], np.ndarray) and keys == ['coarse']
+    with pytest.raises(ValueError):
+        parse_samplings([400., [500., 600.]])
+    with pytest.raises(ValueError):
+        parse_samplings(dict())
+
+
+def test_collect_sampling_results():
+    assert collect_sampling_results(['a'], np.linspace(0, 60, 10), None) == 'a'
+    assert collect_sampling_results(['a', 'b'], [np.zeros(1), np.ones(1)], [0, 1]) == ['a', 'b']
+    assert collect_sampling_results(['a', 'b'], {'x': None, 'y': None}, ['x', 'y']) == {'x': 'a', 'y': 'b'}
@@ -0,0 +1,94 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from gaiaxpy import calibrate, convert, generate, PhotometricSystem
+from gaiaxpy.core.parallel import concat_chunks, map_chunks, validate_parallel_arguments
+from tests.files.paths import with_missing_bp_csv_file
+from tests.utils.utils import assert_frames_close
+
+_rtol, _atol = 1e-12, 1e-30
+
+systems = [PhotometricSystem.JKC_Std, PhotometricSystem.SDSS]
+
+
+@pytest.fixture(scope='module')
+def input_csv_file(tmp_path_factory):
+    # Input file with several chunks of sources
+    input_csv_file = tmp_path_factory.mktemp('input') / 'sources.csv'
+    pd.concat([pd.read_csv(with_missing_bp_csv_file)] * 5, ignore_index=True).to_csv(input_csv_file, index=False)
+    yield str(input_csv_file)
+
+
+@pytest.fixture(scope='module')
+def executor():
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+def _sum_column(df, column):
+    return df[[column]].sum().to_frame().T
+
+
+def test_map_chunks_keeps_order():
+    data = pd.DataFrame({'value': range(23)}, index=range(100, 123))
+    results = map_chunks(_sum_column, data, n_workers=2, column='value')
+    assert len(results) == 8
+    assert sum(result['value'].iloc[0] for result in results) == sum(range(23))
+    pdt.assert_frame_equal(concat_chunks(map_chunks(pd.DataFrame.copy, data, n_workers=3)),
+                           data.reset_index(drop=True))
+
+
+@pytest.mark.parametrize('n_workers, executor', [(0, None), (-1, None), (1.5, None), (True, None), (2, 'executor')])
+def test_invalid_parallel_arguments(n_workers, executor):
+    with pytest.raises(ValueError):
+        validate_parallel_arguments(n_workers, executor)
+
+
+@pytest.mark.parametrize('with_correlation', [False, True])
+def test_convert_workers(input_csv_file, with_correlation, executor):
+    spectra, sampling = convert(input_csv_file, with_correlation=with_correlation, save_file=False)
+    for kwargs in [{'n_workers': 2}, {'executor': executor}]:
+        parallel_spectra, parallel_sampling = convert(input_csv_file, with_correlation=with_correlation,
+                                                      save_file=False, **kwargs)
+        assert_frames_close(parallel_spectra, spectra, rtol=_rtol, atol=_atol)
+        assert parallel_spectra.attrs == spectra.attrs
+        pdt.assert_series_equal(pd.Series(parallel_sampling), pd.Series(sampling))
+
+
+@pytest.mark.parametrize('with_correlation', [False, True])
+def test_calibrate_workers(input_csv_file, with_correlation, executor):
+    spectra, sampling = calibrate(input_csv_file, with_correlation=with_correlation, save_file=False)
+    for kwargs in [{'n_workers': 2}, {'executor': executor}]:
+        parallel_spectra, parallel_sampling = calibrate(input_csv_file, with_correlation=with_correlation,
+                                                        save_file=False, **kwargs)
+        assert_frames_close(parallel_spectra, spectra, rtol=_rtol, atol=_atol)
+        assert parallel_spectra.attrs == spectra.attrs
+        pdt.assert_series_equal(pd.Series(parallel_sampling), pd.Series(sampling))
+
+
+@pytest.mark.parametrize('error_correction', [False, True])
+def test_generate_workers(input_csv_file, error_correction, executor):
+    photometry = generate(input_csv_file, systems, error_correction=error_correction, save_file=False)
+    for kwargs in [{'n_workers': 2}, {'executor': executor}]:
+        parallel_photometry = generate(input_csv_file, systems, error_correction=error_correction, save_file=False,
+                                       **kwargs)
+        pdt.assert_frame_equal(parallel_photometry, photometry, rtol=_rtol, atol=_atol)
+
+
+def test_generate_single_system_workers(input_csv_file):
+    photometry = generate(input_csv_file, PhotometricSystem.Gaia_DR3_Vega, error_correction=True, save_file=False)
+    parallel_photometry = generate(input_csv_file, PhotometricSystem.Gaia_DR3_Vega, error_correction=True,
+                                   save_file=False, n_workers=2)
+    pdt.assert_frame_equal(parallel_photometry, photometry, rtol=_rtol, atol=_atol)
+
+
+def test_generate_bands_workers(input_csv_file, executor):
+    bands = {PhotometricSystem.JKC_Std: ['U', 'I'], PhotometricSystem.SDSS: ['g']}
+    photometry = generate(input_csv_file, systems, error_correction=True, save_file=False, bands=bands)
+    for kwargs in [{'n_workers': 2}, {'executor': executor}]:
+        parallel_photometry = generate(input_csv_file, systems, error_correction=True, save_file=False, bands=bands,
+                                       **kwargs)
+        pdt.assert_frame_equal(parallel_photometry, photometry, rtol=_rtol, atol=_atol)
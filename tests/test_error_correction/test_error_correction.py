@@ -1,8 +1,12 @@
+import numpy as np
+import numpy.testing as npt
 import pandas as pd
 import pandas.testing as pdt
 import pytest
+from scipy.interpolate import interp1d
 
 from gaiaxpy import generate, apply_error_correction, PhotometricSystem
+from gaiaxpy.error_correction.error_correction import _get_correction_factors, _read_system_table
 from gaiaxpy.file_parser.cast import _cast
 from tests.files.paths import phot_with_nan_path, mean_spectrum_csv_file
 from tests.test_error_correction.error_correction_paths import corrected_error_solution_path, \
@@ -67,3 +71,30 @@ def test_error_correction_system_with_no_table():
     corrected_multiphotometry_solution_no_hst = corrected_solution.drop(columns=hst_columns)
     complete_solution = pd.concat([corrected_multiphotometry_solution_no_hst, halpha_photometry], axis=1)
     compare_all_columns(corrected_multiphotometry, complete_solution)
+
+
+def _get_correction_factor(mag, correction_table, factor_columns):
+    # Reference interpolating the factors of a single source
+    min_value, max_value = correction_table['min_Gmag_bin'].iloc[0], correction_table['max_Gmag_bin'].iloc[-1]
+    if np.isnan(mag) or mag >= max_value:
+        return correction_table[factor_columns].iloc[-1].values
+    elif mag < min_value:
+        return correction_table[factor_columns].iloc[0].values
+    row = correction_table[correction_table['min_Gmag_bin'] == np.floor(mag)].iloc[0]
+    factors = row[factor_columns].values.astype(float)
+    next_rows = correction_table[correction_table['min_Gmag_bin'] == row['max_Gmag_bin']]
+    if mag <= row['bin_centre'] or next_rows.empty:
+        return factors
+    next_factors = next_rows[factor_columns].iloc[0].values.astype(float)
+    return interp1d(np.array([row['bin_centre'], row['max_Gmag_bin']]), np.vstack([factors, next_factors]), axis=0)(mag)
+
+
+@pytest.mark.parametrize('system', ['GaiaDr3Vega', 'Jpas', 'SdssStd'])
+def test_correction_factors(system):
+    correction_table = _read_system_table(system)
+    factor_columns = [column for column in correction_table.columns if 'factor_' in column]
+    edges = correction_table['min_Gmag_bin'].to_numpy()
+    mag_G = np.concatenate([np.linspace(0, 25, 1001), edges, correction_table['bin_centre'].to_numpy(),
+                            [correction_table['max_Gmag_bin'].iloc[-1], np.nan, -np.inf, np.inf]])
+    expected = np.array([_get_correction_factor(mag, correction_table, factor_columns) for mag in mag_G])
+    npt.assert_allclose(_get_correction_factors(mag_G, system), expected, rtol=1e-14, atol=0)
@@ -0,0 +1,58 @@
+from os.path import exists, join
+from shutil import copy, copytree
+
+import numpy.testing as npt
+import pandas.testing as pdt
+import pytest
+
+from gaiaxpy import generate
+from gaiaxpy.core.generic_functions import _get_built_in_systems
+from gaiaxpy.generator.filter_bundle import (FILTER_BUNDLE_FILE, compile_filter_bundle, load_bundled_filter,
+                                             read_filter_file)
+from gaiaxpy.generator.photometric_system import (_get_systems_from_names, compile_additional_systems, create_system,
+                                                  load_additional_systems, remove_additional_systems)
+from tests.files.paths import mean_spectrum_csv_file
+from tests.test_generator.generator_paths import additional_filters_dir
+
+
+def assert_arrays_equal(arrays, expected):
+    assert arrays.keys() == expected.keys()
+    for key, values in expected.items():
+        npt.assert_array_equal(arrays[key], values)
+
+
+@pytest.mark.parametrize('system_name', _get_built_in_systems())
+def test_built_in_bundle_is_up_to_date(system_name):
+    system = create_system(system_name)
+    arrays = system._get_bundled_arrays()
+    assert_arrays_equal(arrays, read_filter_file(system.filter_file))
+    assert not any(values.flags.writeable for values in arrays.values())
+    assert system.get_bands() == list(arrays['bands'])
+
+
+def test_stale_bundle(tmp_path):
+    filter_file = copy(create_system('JKC').filter_file, tmp_path)
+    compile_filter_bundle([filter_file], tmp_path)
+    assert_arrays_equal(load_bundled_filter(filter_file, tmp_path), read_filter_file(filter_file))
+    with open(filter_file, 'a') as f:
+        f.write('\n')
+    assert load_bundled_filter(filter_file, tmp_path) is None
+    assert load_bundled_filter(filter_file, join(tmp_path, 'missing')) is None
+
+
+def test_compile_additional_systems(tmp_path):
+    filters_dir = copytree(additional_filters_dir, join(tmp_path, 'filters'))
+    try:
+        systems = load_additional_systems(filters_dir)
+        photometry = generate(mean_spectrum_csv_file, photometric_system=systems['USER_Sdss'], save_file=False)
+        assert compile_additional_systems() == join(filters_dir, FILTER_BUNDLE_FILE)
+        assert exists(join(filters_dir, FILTER_BUNDLE_FILE))
+        # Systems created after compiling read the bundle
+        user_system = _get_systems_from_names(['USER_Sdss'])[0]
+        assert user_system.value._get_bundled_arrays()
+        pdt.assert_frame_equal(generate(mean_spectrum_csv_file, photometric_system=user_system, save_file=False),
+                               photometry)
+    finally:
+        remove_additional_systems()
+    with pytest.raises(ValueError):
+        compile_additional_systems()
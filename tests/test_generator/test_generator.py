@@ -3,11 +3,13 @@ import sys
 from collections import Counter
 from io import StringIO
 
+import numpy as np
+import numpy.testing as npt
 import pandas as pd
 import pandas.testing as pdt
 import pytest
 
-from gaiaxpy import generate, remove_additional_systems, load_additional_systems
+from gaiaxpy import generate, generate_iter, remove_additional_systems, load_additional_systems
 from gaiaxpy.file_parser.cast import _cast
 from tests.files.paths import missing_bp_csv_file, mean_spectrum_fits_file, gen_missing_band_sol_path
 from tests.test_generator.generator_paths import additional_filters_dir
@@ -37,6 +39,24 @@ def test_missing_band_csv(systems_list):
     pdt.assert_frame_equal(generated_photometry, solution_df, rtol=_rtol, atol=_atol)
 
 
+def test_single_precision(systems_list):
+    generated_photometry = generate(mean_spectrum_fits_file, photometric_system=systems_list, save_file=False)
+    single_precision_photometry = generate(mean_spectrum_fits_file, photometric_system=systems_list, save_file=False,
+                                           dtype='float32')
+    photometry_columns = [column for column in generated_photometry.columns if column != 'source_id']
+    assert (single_precision_photometry[photometry_columns].dtypes == 'float32').all()
+    for column in photometry_columns:
+        expected = generated_photometry[column].to_numpy(dtype=float, na_value=np.nan)
+        actual = single_precision_photometry[column].to_numpy(dtype=float, na_value=np.nan)
+        # Fluxes out of the float32 range (only found in unphysical bands) cannot be represented
+        representable = ~(np.abs(generated_photometry[column.replace('_mag_', '_flux_')].to_numpy(
+            dtype=float, na_value=np.nan)) > np.finfo(np.float32).max)
+        if '_mag_' in column:
+            npt.assert_allclose(actual[representable], expected[representable], atol=1e-5)
+        else:
+            npt.assert_allclose(actual[representable], expected[representable], rtol=1e-5)
+
+
 def test_duplicate_columns(systems_list):
     generated_photometry = generate(missing_bp_csv_file, photometric_system=systems_list, save_file=False)
     assert 0 == len([item for item, count in Counter(generated_photometry.columns).items() if count > 1])
@@ -53,6 +73,59 @@ def test_single_phot_object_with_correction(__ps):
     assert isinstance(photometry, pd.DataFrame)
 
 
+@pytest.mark.parametrize('error_correction', [False, True])
+def test_bands(__ps, error_correction):
+    systems = [__ps.JPAS, __ps.JKC_Std, __ps.SDSS]
+    photometry = generate(missing_bp_csv_file, photometric_system=systems, error_correction=error_correction,
+                          save_file=False)
+    # The U band of JKC_Std is corrected with a colour equation which depends on other bands
+    bands_photometry = generate(missing_bp_csv_file, photometric_system=systems, error_correction=error_correction,
+                                save_file=False, bands={__ps.JPAS: ['J0400', 'J0378'], 'JKC_Std': 'U'})
+    expected_columns = ['source_id'] + [f'Jpas_{variable}_{band}' for variable in ['mag', 'flux', 'flux_error'] for
+                                        band in ['J0378', 'J0400']] + ['JkcStd_mag_U', 'JkcStd_flux_U',
+                                                                       'JkcStd_flux_error_U']
+    expected_columns += [column for column in photometry.columns if column.startswith('Sdss_')]
+    assert list(bands_photometry.columns) == expected_columns
+    pdt.assert_frame_equal(bands_photometry, photometry[expected_columns], rtol=1e-12, atol=0)
+
+
+def test_bands_iter(__ps):
+    photometry = generate(missing_bp_csv_file, photometric_system=__ps.Gaia_DR3_Vega, error_correction=True,
+                          save_file=False)
+    bands_photometry = pd.concat(generate_iter(missing_bp_csv_file, photometric_system=__ps.Gaia_DR3_Vega,
+                                               error_correction=True, save_file=False, bands=['BP'], chunk_size=1),
+                                 ignore_index=True)
+    expected_columns = ['source_id', 'GaiaDr3Vega_mag_BP', 'GaiaDr3Vega_flux_BP', 'GaiaDr3Vega_flux_error_BP']
+    pdt.assert_frame_equal(bands_photometry, photometry[expected_columns], rtol=1e-12, atol=0)
+
+
+@pytest.mark.parametrize('bands', [['B'], {'SDSS': ['B']}, {'JKC': ['X']}, {'JKC': []}])
+def test_invalid_bands(__ps, bands):
+    with pytest.raises(ValueError):
+        generate(missing_bp_csv_file, photometric_system=[__ps.JKC, __ps.JPAS], save_file=False, bands=bands)
+
+
+@pytest.mark.parametrize('outputs', ['mag', ['flux'], {'mag', 'flux_error'}])
+@pytest.mark.parametrize('error_correction', [False, True])
+def test_outputs(__ps, outputs, error_correction):
+    systems = [__ps.JKC_Std, __ps.SDSS]
+    photometry = generate(missing_bp_csv_file, photometric_system=systems, error_correction=error_correction,
+                          save_file=False)
+    outputs_photometry = generate(missing_bp_csv_file, photometric_system=systems, error_correction=error_correction,
+                                  save_file=False, outputs=outputs)
+    variables = [outputs] if isinstance(outputs, str) else outputs
+    expected_columns = ['source_id'] + [column for column in photometry.columns[1:] if
+                                        re.match(r'.+_(mag|flux|flux_error)_[^_]+$', column).group(1) in variables]
+    assert list(outputs_photometry.columns) == expected_columns
+    pdt.assert_frame_equal(outputs_photometry, photometry[expected_columns], rtol=1e-12, atol=0)
+
+
+@pytest.mark.parametrize('outputs', [[], 'error', {'mag', 'flux_err'}])
+def test_invalid_outputs(__ps, outputs):
+    with pytest.raises(ValueError):
+        generate(missing_bp_csv_file, photometric_system=__ps.JKC, save_file=False, outputs=outputs)
+
+
 def test_error_correction_additional_systems(__ps):
     __ps = load_additional_systems(additional_filters_dir)
     additional_systems = [system for system in __ps if system.get_system_name().startswith('USER_')]
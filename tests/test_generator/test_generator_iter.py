@@ -0,0 +1,50 @@
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+from fastavro import reader
+
+from gaiaxpy import generate, generate_iter, PhotometricSystem
+from tests.files.paths import with_missing_bp_csv_file
+
+_rtol, _atol = 1e-10, 1e-10
+
+systems = [PhotometricSystem.JKC, PhotometricSystem.SDSS_Std, PhotometricSystem.Gaia_DR3_Vega]
+
+
+@pytest.fixture(scope='module')
+def input_csv_file(tmp_path_factory):
+    # Input file with several chunks of sources
+    input_csv_file = tmp_path_factory.mktemp('input') / 'sources.csv'
+    pd.concat([pd.read_csv(with_missing_bp_csv_file)] * 5, ignore_index=True).to_csv(input_csv_file, index=False)
+    yield str(input_csv_file)
+
+
+@pytest.mark.parametrize('error_correction', [False, True])
+def test_generate_iter(input_csv_file, error_correction):
+    photometry = generate(input_csv_file, systems, error_correction=error_correction, save_file=False)
+    chunks = list(generate_iter(input_csv_file, systems, error_correction=error_correction, save_file=False,
+                                chunk_size=7))
+    assert [len(chunk) for chunk in chunks] == [min(7, len(photometry) - start) for start in
+                                                range(0, len(photometry), 7)]
+    pdt.assert_frame_equal(pd.concat(chunks, ignore_index=True), photometry, rtol=_rtol, atol=_atol)
+
+
+def _read_output(path, output_format):
+    if output_format == 'avro':
+        with open(path, 'rb') as f:
+            return pd.DataFrame(list(reader(f)))
+    return pd.read_csv(path, comment='#')
+
+
+@pytest.mark.parametrize('output_format', ['avro', 'csv', 'ecsv'])
+def test_generate_iter_append(input_csv_file, output_format, tmp_path):
+    generate(input_csv_file, systems, output_path=tmp_path, output_file='photometry', output_format=output_format)
+    for _ in generate_iter(input_csv_file, systems, output_path=tmp_path, output_file='chunked_photometry',
+                           output_format=output_format, chunk_size=7):
+        pass
+    photometry = _read_output(tmp_path / f'photometry.{output_format}', output_format)
+    chunked_photometry = _read_output(tmp_path / f'chunked_photometry.{output_format}', output_format)
+    pdt.assert_frame_equal(chunked_photometry, photometry, rtol=_rtol, atol=_atol)
+    if output_format == 'ecsv':
+        with open(tmp_path / f'chunked_photometry.{output_format}') as f:
+            assert f.read().count('%ECSV') == 1
@@ -1,6 +1,10 @@
 import numpy.testing as npt
+import pytest
 
+from gaiaxpy.core.satellite import BANDS
+from gaiaxpy.generator import internal_photometric_system
 from gaiaxpy.generator.internal_photometric_system import InternalPhotometricSystem
+from gaiaxpy.generator.photometric_system import create_system
 from tests.test_generator.generator_paths import phot_systems_specs
 
 # An InternalPhotometricSystem is created from a label, not from a name (i.e. from GaiaDr3Ab, not from GAIA_DR3_AB)
@@ -29,3 +33,65 @@ def test_get_set_zero_points():
     all_zero_points = list(phot_systems_specs['zero_points'])
     for system, test_zero_points in zip(all_systems, all_zero_points):
         npt.assert_array_equal(system.get_zero_points(), test_zero_points)
+
+
+def test_lazy_loading(monkeypatch):
+    parsed_files = []
+    get_file_root = internal_photometric_system.get_file_root
+
+    def counting_get_file_root(xml_file):
+        parsed_files.append(xml_file)
+        return get_file_root(xml_file)
+
+    monkeypatch.setattr(internal_photometric_system, 'get_file_root', counting_get_file_root)
+    # Read the XML file instead of the filter bundle
+    monkeypatch.setattr(internal_photometric_system, 'load_bundled_filter', lambda *args: None)
+    system = create_system('JKC_Std')
+    assert system._filter_file is None and not parsed_files
+    assert system.get_bands() == ['U', 'B', 'V', 'R', 'I']
+    system.get_zero_points()
+    npt.assert_array_equal(system.get_offsets(), [2.44819e-19, 4.62320e-20, 1.81103e-20, 2.15027e-20, 1.73864e-20])
+    assert parsed_files == [system.filter_file]
+    # The tables are also read once
+    xp_sampling = system.load_xpsampling_from_xml()
+    sampling_grid, xp_merge = system.load_xpmerge_from_xml()
+    assert system.load_xpsampling_from_xml()['bp'] is xp_sampling['bp']
+    assert system.load_xpmerge_from_xml()[1]['rp'] is xp_merge['rp']
+    assert len(parsed_files) == 3
+    with pytest.raises(ValueError):
+        sampling_grid[0] = 0.
+
+
+def test_bundled_loading(monkeypatch):
+    xml_system = create_system('JKC_Std')
+    xml_system._bundled_arrays = dict()
+    expected = [xml_system.get_bands(), xml_system.get_zero_points(), xml_system.get_offsets(),
+                xml_system.load_xpsampling_from_xml(), xml_system.load_xpmerge_from_xml()]
+    # The bundled system does not parse the XML file
+    monkeypatch.setattr(internal_photometric_system, 'get_file_root', None)
+    system = create_system('JKC_Std')
+    bands, zero_points, offsets = system.get_bands(), system.get_zero_points(), system.get_offsets()
+    xp_sampling = system.load_xpsampling_from_xml()
+    sampling_grid, xp_merge = system.load_xpmerge_from_xml()
+    assert bands == expected[0]
+    npt.assert_array_equal(zero_points, expected[1])
+    npt.assert_array_equal(offsets, expected[2])
+    npt.assert_array_equal(sampling_grid, expected[4][0])
+    for band in BANDS:
+        npt.assert_array_equal(xp_sampling[band], expected[3][band])
+        npt.assert_array_equal(xp_merge[band], expected[4][1][band])
+
+
+def test_select_bands():
+    system = create_system('JKC_Std')
+    selected_system = system._select_bands(['B', 'R'])
+    assert selected_system.get_bands() == ['B', 'R']
+    assert system.get_bands() == ['U', 'B', 'V', 'R', 'I']
+    npt.assert_array_equal(selected_system.get_zero_points(), system.get_zero_points()[[1, 3]])
+    npt.assert_array_equal(selected_system.get_offsets(), system.get_offsets()[[1, 3]])
+    sampling_grid, xp_merge = selected_system.load_xpmerge_from_xml()
+    npt.assert_array_equal(sampling_grid, system.load_xpmerge_from_xml()[0][[1, 3]])
+    for band in BANDS:
+        npt.assert_array_equal(selected_system.load_xpsampling_from_xml()[band],
+                               system.load_xpsampling_from_xml()[band][:, [1, 3]])
+        npt.assert_array_equal(xp_merge[band], system.load_xpmerge_from_xml()[1][band][[1, 3]])
@@ -1,10 +1,19 @@
+import numpy as np
 import pandas as pd
 import pandas.testing as pdt
 import pytest
 
+from gaiaxpy.core.config import load_xpmerge_from_xml, load_xpsampling_from_xml
+from gaiaxpy.core.satellite import BANDS
 from gaiaxpy.generator.generator import generate
+from gaiaxpy.generator.multi_synthetic_photometry_generator import MultiSyntheticPhotometryGenerator
 from gaiaxpy.generator.photometric_system import PhotometricSystem
-from tests.files.paths import mean_spectrum_csv_file, mean_spectrum_fits_file, mean_spectrum_xml_file
+from gaiaxpy.input_reader.input_reader import InputReader
+from gaiaxpy.spectrum.multi_synthetic_photometry import MultiSyntheticPhotometry
+from gaiaxpy.spectrum.sampled_basis_functions import SampledBasisFunctions
+from tests.files.paths import (mean_spectrum_csv_file, mean_spectrum_fits_file, mean_spectrum_xml_file,
+                               with_missing_bp_csv_file)
+from tests.utils.utils import generate_synthetic_photometry
 
 _rtol, _atol = 1e-24, 1e-24
 
@@ -38,3 +47,43 @@ def test_generate_csv_mix():
 def test_no_system_given_is_none(phot_system):
     with pytest.raises(ValueError):
         generate(mean_spectrum_csv_file, photometric_system=phot_system, save_file=False)
+
+
+def test_generate_many_systems():
+    phot_list = [PhotometricSystem.JKC_Std, PhotometricSystem.SDSS, PhotometricSystem.Gaia_DR3_Vega,
+                 PhotometricSystem.Euclid_VIS, PhotometricSystem.SDSS_Std]
+    multi_synthetic_photometry = generate(mean_spectrum_csv_file, photometric_system=phot_list, save_file=False)
+    single_synthetic_photometries = [generate(mean_spectrum_csv_file, photometric_system=phot_system, save_file=False)
+                                     for phot_system in phot_list]
+    concatenated_photometry = pd.concat([single_synthetic_photometries[0]] + [photometry.drop(columns=['source_id'])
+                                                                              for photometry in
+                                                                              single_synthetic_photometries[1:]],
+                                        axis=1)
+    pdt.assert_frame_equal(multi_synthetic_photometry, concatenated_photometry, rtol=1e-12, atol=1e-30)
+
+
+def _generate_per_source(parsed_input_data, phot_list):
+    # Reference building one photometry object per source and system
+    bases_and_merges = []
+    for phot_system in phot_list:
+        xp_sampling = load_xpsampling_from_xml(system=phot_system.get_system_label())
+        xp_sampling_grid, xp_merge = load_xpmerge_from_xml(system=phot_system.get_system_label())
+        bases_and_merges.append(({band: SampledBasisFunctions.from_design_matrix(xp_sampling_grid, xp_sampling[band])
+                                  for band in BANDS}, xp_merge))
+    photometries = [[generate_synthetic_photometry(row, sampled_bases, xp_merge, False, phot_system)
+                     for phot_system, (sampled_bases, xp_merge) in zip(phot_list, bases_and_merges)]
+                    for _, row in parsed_input_data.iterrows()]
+    return MultiSyntheticPhotometry(phot_list, photometries)._generate_output_df()
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_arrays_match_per_source_photometry(dtype):
+    phot_list = [PhotometricSystem.JKC_Std, PhotometricSystem.SDSS, PhotometricSystem.Gaia_DR3_Vega]
+    parsed_input_data, _ = InputReader(with_missing_bp_csv_file, generate, False).read()
+    photometry = MultiSyntheticPhotometryGenerator(phot_list, 'v375wi', 'v142r').generate(
+        parsed_input_data, None, None, None, False, False, dtype=dtype, disable_info=True)
+    expected = _generate_per_source(parsed_input_data, phot_list)
+    pdt.assert_frame_equal(photometry, expected, check_dtype=False, rtol=1e-12 if dtype == np.float64 else 1e-4,
+                           atol=1e-30)
+    # The second source has no BP
+    assert photometry.iloc[1, 1:].isna().all()
@@ -2,13 +2,13 @@ from gaiaxpy.core.config import load_xpmerge_from_xml, load_xpsampling_from_xml
 from gaiaxpy.core.satellite import BANDS
 from gaiaxpy.file_parser.parse_internal_continuous import InternalContinuousParser
 from gaiaxpy.generator.photometric_system import PhotometricSystem
-from gaiaxpy.generator.synthetic_photometry_generator import _generate_synthetic_photometry
 from gaiaxpy.input_reader.required_columns import MANDATORY_INPUT_COLS, CORR_INPUT_COLUMNS
 from gaiaxpy.spectrum.sampled_basis_functions import SampledBasisFunctions
 from gaiaxpy.spectrum.single_synthetic_photometry import SingleSyntheticPhotometry
 
 from tests.files.paths import (mean_spectrum_avro_file, mean_spectrum_csv_file, mean_spectrum_xml_file,
                                mean_spectrum_xml_plain_file, mean_spectrum_fits_file, mean_spectrum_ecsv_file)
+from tests.utils.utils import generate_synthetic_photometry
 
 
 def test_generate_synthetic_photometry():
@@ -39,6 +39,6 @@ def test_generate_synthetic_photometry():
         # Create sampled basis functions
         sampled_basis_func = {band: SampledBasisFunctions.from_design_matrix(xp_sampling_grid, xp_sampling[band])
                               for band in BANDS}
-        synthetic_photometry = _generate_synthetic_photometry(df.iloc[0], sampled_basis_func, xp_merge,
-                                                              False, phot_system_johnson)
+        synthetic_photometry = generate_synthetic_photometry(df.iloc[0], sampled_basis_func, xp_merge,
+                                                             False, phot_system_johnson)
         assert isinstance(synthetic_photometry, SingleSyntheticPhotometry)
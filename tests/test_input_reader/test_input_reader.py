@@ -6,7 +6,9 @@ from gaiaxpy import convert
 from gaiaxpy.file_parser.parse_internal_continuous import InternalContinuousParser
 from gaiaxpy.input_reader.input_reader import InputReader
 from gaiaxpy.input_reader.required_columns import MANDATORY_INPUT_COLS, CORR_INPUT_COLUMNS
-from tests.files.paths import mean_spectrum_csv_file
+from tests.files.paths import mean_spectrum_avro_file, mean_spectrum_csv_file, mean_spectrum_fits_file, \
+    with_missing_bp_csv_file
+from tests.utils.utils import assert_frames_close
 
 columns_to_read = MANDATORY_INPUT_COLS['convert'] + CORR_INPUT_COLUMNS
 dataframe_str = pd.read_csv(mean_spectrum_csv_file, float_precision='round_trip', usecols=columns_to_read)
@@ -27,3 +29,16 @@ def test_dfs():
 def test_empty_list():
     with pytest.raises(ValueError):
         input_reader, _ = InputReader([], convert, False).read()
+
+
+@pytest.mark.parametrize('input_object', [mean_spectrum_avro_file, with_missing_bp_csv_file, mean_spectrum_fits_file,
+                                          dataframe_str])
+def test_read_chunks(input_object):
+    parsed_data, extension = InputReader(input_object, convert, False).read()
+    chunks = list(InputReader(input_object, convert, False).read_chunks(2))
+    assert [len(chunk) for chunk, _ in chunks] == [min(2, len(parsed_data) - start) for start in
+                                                   range(0, len(parsed_data), 2)]
+    assert all(chunk_extension == extension for _, chunk_extension in chunks)
+    # Each chunk is indexed from zero
+    assert all(chunk.index[0] == 0 for chunk, _ in chunks)
+    assert_frames_close(pd.concat([chunk for chunk, _ in chunks], ignore_index=True), parsed_data, rtol=0, atol=0)
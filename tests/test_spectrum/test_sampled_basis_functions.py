@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+import numpy.testing as npt
+import pytest
+from scipy.interpolate import BSpline
+from scipy.sparse import issparse
+from scipy.special import eval_hermite, gamma
+
+from gaiaxpy.config.paths import hermite_bases_file, spline_bases_file
+from gaiaxpy.converter.config import get_bands_config
+from gaiaxpy.converter.converter import get_design_matrices
+from gaiaxpy.core.generic_functions import parse_config
+from gaiaxpy.core.satellite import BANDS
+from gaiaxpy.spectrum.sampled_basis_functions import _evaluate_b_splines, _evaluate_hermite_functions
+from tests.utils.utils import evaluate_hermite_function
+
+
+def _psi(n, x):
+    # Direct evaluation of the Hermite function of order n
+    return 1.0 / np.sqrt(math.pow(2, n) * gamma(n + 1) * np.sqrt(np.pi)) * np.exp(-x ** 2 / 2.0) * eval_hermite(n, x)
+
+
+@pytest.mark.parametrize('x', [np.linspace(-10, 10, 6000), np.array([0.]), np.array([])])
+def test_hermite_functions_match_direct_evaluation(x):
+    n_functions = 55
+    expected = np.array([[_psi(n, pos) for pos in x] for n in range(n_functions)]).reshape(n_functions, len(x))
+    npt.assert_allclose(_evaluate_hermite_functions(n_functions, x), expected, rtol=1e-10, atol=1e-12)
+
+
+def test_hermite_functions_match_recursive_evaluation():
+    x = np.linspace(-6, 6, 50)
+    expected = np.array([[evaluate_hermite_function(n, pos, 1.) for pos in x] for n in range(10)])
+    npt.assert_allclose(_evaluate_hermite_functions(10, x), expected, rtol=1e-12, atol=1e-15)
+
+
+def test_hermite_design_matrix():
+    sampling = np.linspace(0, 60, 600)
+    bases_config = parse_config(hermite_bases_file)
+    design_matrices = get_design_matrices(sampling, bases_config)
+    bands_config = get_bands_config(bases_config)
+    for band, row in zip(BANDS, [bands_config.bpConfig, bands_config.rpConfig]):
+        normalised_range_lower, normalised_range_upper = row.normalizedRange
+        range_lower, range_upper = row.range
+        scale = (normalised_range_upper - normalised_range_lower) / (range_upper - range_lower)
+        rescaled_pwl = sampling * scale + normalised_range_lower - range_lower * scale
+        transformation = row.transformationMatrix.reshape(int(row.dimension), int(row.transformedSetDimension))
+        expected = transformation @ np.array([[_psi(n, pos) for pos in rescaled_pwl] for n in
+                                              range(int(row.dimension))])
+        npt.assert_allclose(design_matrices[band].get_design_matrix(), expected, rtol=1e-10, atol=1e-12)
+
+
+def test_spline_design_matrix():
+    # Includes positions outside the base interval, where the splines are extrapolated
+    sampling = np.linspace(-5, 65, 700)
+    bases_config = parse_config(spline_bases_file)
+    design_matrices = get_design_matrices(sampling, bases_config)
+    bands_config = get_bands_config(bases_config)
+    for band, row in zip(BANDS, [bands_config.bpConfig, bands_config.rpConfig]):
+        design_matrix = design_matrices[band].get_design_matrix()
+        n_bases = len(row.knots) - row.order
+        expected = np.array([BSpline(row.knots, np.eye(len(row.knots))[basis_id], row.order - 1)(sampling)
+                             for basis_id in range(n_bases)])
+        assert issparse(design_matrix)
+        assert design_matrix.nnz <= row.order * len(sampling)
+        npt.assert_allclose(design_matrix.toarray(), expected, rtol=1e-10, atol=1e-12)
+
+
+def test_b_splines_single_interval():
+    knots = [0., 0., 0., 1., 2., 3., 3., 3.]
+    design_matrix = _evaluate_b_splines(knots, 3, np.array([0., 1.5, 3.]))
+    expected = np.array([BSpline(knots, np.eye(len(knots))[basis_id], 2)([0., 1.5, 3.]) for basis_id in range(5)])
+    npt.assert_allclose(design_matrix.toarray(), expected, atol=1e-15)
+    npt.assert_allclose(design_matrix.toarray().sum(axis=0), 1.)
@@ -0,0 +1,77 @@
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+import pytest
+
+from gaiaxpy import calibrate, convert
+from gaiaxpy.spectrum.sampled_spectra_arrays import SampledSpectraArrays
+from tests.files.paths import mean_spectrum_avro_file, with_missing_bp_csv_file
+from tests.utils.utils import assert_frames_close
+
+_rtol, _atol = 1e-12, 1e-30
+
+correlation_options = [{}, {'with_correlation': True}, {'with_correlation': True, 'correlation_format': 'factor'},
+                       {'with_correlation': True, 'correlation_bandwidth': 3}]
+
+
+@pytest.mark.parametrize('input_file', [mean_spectrum_avro_file, with_missing_bp_csv_file])
+@pytest.mark.parametrize('options', correlation_options)
+def test_convert_arrays(input_file, options):
+    spectra, sampling = convert(input_file, truncation=True, save_file=False, **options)
+    spectra_arrays = convert(input_file, truncation=True, save_file=False, return_type='arrays', **options)
+    assert isinstance(spectra_arrays, SampledSpectraArrays)
+    assert len(spectra_arrays) == len(spectra)
+    assert spectra_arrays.flux.shape == spectra_arrays.flux_error.shape == (len(spectra), len(sampling))
+    assert spectra_arrays.flux.flags['C_CONTIGUOUS']
+    npt.assert_array_equal(spectra_arrays.pos, sampling)
+    npt.assert_array_equal(spectra_arrays.xp, spectra['xp'])
+    assert_frames_close(spectra_arrays.to_data_frame(), spectra, rtol=_rtol, atol=_atol)
+
+
+@pytest.mark.parametrize('input_file', [mean_spectrum_avro_file, with_missing_bp_csv_file])
+@pytest.mark.parametrize('options', correlation_options)
+def test_calibrate_arrays(input_file, options):
+    spectra, sampling = calibrate(input_file, save_file=False, **options)
+    spectra_arrays = calibrate(input_file, save_file=False, return_type='arrays', **options)
+    assert spectra_arrays.xp is None and spectra_arrays.standard_deviation is None
+    assert spectra_arrays.flux.shape == (len(spectra), len(sampling))
+    npt.assert_array_equal(spectra_arrays.source_id, spectra['source_id'])
+    assert_frames_close(spectra_arrays.to_data_frame(), spectra, rtol=_rtol, atol=_atol)
+
+
+def test_convert_arrays_missing_band():
+    spectra_arrays = convert(with_missing_bp_csv_file, with_correlation=True, save_file=False, return_type='arrays')
+    missing = spectra_arrays.to_data_frame()['flux'].isna().to_numpy()
+    assert missing.any()
+    assert np.isnan(spectra_arrays.flux[missing]).all() and np.isnan(spectra_arrays.correlation[missing]).all()
+
+
+@pytest.mark.parametrize('function', [calibrate, convert])
+def test_arrays_without_errors(function):
+    spectra_arrays = function(with_missing_bp_csv_file, save_file=False, return_type='arrays', outputs='flux')
+    assert spectra_arrays.flux_error is None
+    spectra, _ = function(with_missing_bp_csv_file, save_file=False, outputs='flux')
+    assert_frames_close(spectra_arrays.to_data_frame(), spectra, rtol=_rtol, atol=_atol)
+
+
+def test_arrays_save(tmp_path):
+    convert(with_missing_bp_csv_file, output_path=tmp_path, output_file='arrays', output_format='csv',
+            return_type='arrays')
+    convert(with_missing_bp_csv_file, output_path=tmp_path, output_file='dataframe', output_format='csv')
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'arrays.csv'), pd.read_csv(tmp_path / 'dataframe.csv'))
+
+
+def test_concatenate():
+    spectra_arrays = convert(mean_spectrum_avro_file, with_correlation=True, save_file=False, return_type='arrays')
+    parts = [SampledSpectraArrays(spectra_arrays.source_id[rows], spectra_arrays.flux[rows],
+                                  spectra_arrays.flux_error[rows], spectra_arrays.pos, spectra_arrays.data_type,
+                                  xp=spectra_arrays.xp[rows], correlation=spectra_arrays.correlation[rows],
+                                  correlation_type=spectra_arrays.correlation_type,
+                                  standard_deviation=spectra_arrays.standard_deviation[rows])
+             for rows in [slice(0, 1), slice(1, None)]]
+    assert_frames_close(SampledSpectraArrays.concatenate(parts).to_data_frame(), spectra_arrays.to_data_frame())
+
+
+def test_wrong_return_type():
+    with pytest.raises(ValueError):
+        convert(mean_spectrum_avro_file, save_file=False, return_type='list')
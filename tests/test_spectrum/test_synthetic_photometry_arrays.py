@@ -0,0 +1,64 @@
+import numpy as np
+import numpy.testing as npt
+import pandas.testing as pdt
+import pytest
+
+from gaiaxpy import PhotometricSystem, apply_error_correction, generate
+from gaiaxpy.colour_equation.xp_filter_system_colour_equation import apply_colour_equation
+from gaiaxpy.generator.multi_synthetic_photometry_generator import MultiSyntheticPhotometryGenerator
+from gaiaxpy.input_reader.input_reader import InputReader
+from gaiaxpy.spectrum.synthetic_photometry_arrays import SyntheticPhotometryArrays
+from tests.files.paths import mean_spectrum_csv_file, with_missing_bp_csv_file
+
+_rtol, _atol = 1e-12, 1e-30
+
+
+@pytest.fixture(scope='module')
+def photometry():
+    phot_list = [PhotometricSystem.JKC_Std, PhotometricSystem.SDSS, PhotometricSystem.Gaia_DR3_Vega]
+    parsed_input_data, _ = InputReader(with_missing_bp_csv_file, generate, False).read()
+    yield MultiSyntheticPhotometryGenerator(phot_list, 'v375wi', 'v142r')._generate_arrays(parsed_input_data, False,
+                                                                                           disable_info=True)
+
+
+def test_photometry_arrays(photometry):
+    assert isinstance(photometry, SyntheticPhotometryArrays)
+    assert len(photometry) == 3
+    photometry_df = photometry.to_data_frame()
+    for phot_system, mag in zip(photometry.photometric_system, photometry.mag):
+        label = phot_system.get_system_label()
+        assert mag.shape == (len(photometry), len(phot_system.get_bands()))
+        for band in phot_system.get_bands():
+            npt.assert_array_equal(photometry.get_column(label, 'mag', band), photometry_df[f'{label}_mag_{band}'])
+
+
+def test_set_and_remove(photometry):
+    photometry = SyntheticPhotometryArrays(photometry.source_id, photometry.photometric_system,
+                                           [mag.astype(np.float32) for mag in photometry.mag], photometry.flux,
+                                           photometry.flux_error)
+    values = np.arange(len(photometry), dtype=np.float64)
+    photometry.set_column('Sdss', 'mag', 'g', values)
+    npt.assert_array_equal(photometry.get_column('Sdss', 'mag', 'g'), values)
+    assert photometry.mag[1].dtype == np.float64
+    photometry.remove_system('Sdss')
+    assert [system.get_system_label() for system in photometry.photometric_system] == ['JkcStd', 'GaiaDr3Vega']
+    assert not any(column.startswith('Sdss') for column in photometry.to_data_frame().columns)
+    assert all(dtype == np.float32 for dtype in photometry.to_data_frame(dtype=np.float32).dtypes.iloc[1:])
+
+
+@pytest.mark.parametrize('phot_list', [
+    [PhotometricSystem.JKC_Std, PhotometricSystem.Gaia_DR3_Vega],
+    [PhotometricSystem.SDSS_Std, PhotometricSystem.JPAS, PhotometricSystem.Pristine]])
+def test_generate_matches_separate_stages(phot_list):
+    # Post-processing applied on the arrays compared to the public functions applied on the raw photometry
+    all_systems = list(dict.fromkeys(phot_list + [PhotometricSystem.Gaia_DR3_Vega]))
+    parsed_input_data, _ = InputReader(mean_spectrum_csv_file, generate, False).read()
+    generator = MultiSyntheticPhotometryGenerator(all_systems, 'v375wi', 'v142r')
+    photometry_df = generator._generate_arrays(parsed_input_data, False, disable_info=True).to_data_frame()
+    expected = apply_error_correction(apply_colour_equation(photometry_df, photometric_system=all_systems,
+                                                            save_file=False), photometric_system=all_systems,
+                                      save_file=False)
+    corrected = generate(mean_spectrum_csv_file, photometric_system=phot_list, error_correction=True,
+                         save_file=False)
+    # Gaia_DR3_Vega is only part of the output if it was requested
+    pdt.assert_frame_equal(corrected, expected[corrected.columns], rtol=_rtol, atol=_atol)
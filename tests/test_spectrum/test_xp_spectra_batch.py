@@ -0,0 +1,200 @@
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+import pytest
+from scipy.sparse import csr_array
+
+from gaiaxpy import convert
+from gaiaxpy.config.paths import hermite_bases_file
+from gaiaxpy.converter.converter import get_design_matrices
+from gaiaxpy.core.generic_functions import parse_config, correlation_from_covariance, correlation_from_factor, \
+    covariance_from_factor, correlation_from_band
+from gaiaxpy.core.satellite import BANDS
+from gaiaxpy.input_reader.input_reader import InputReader
+from gaiaxpy.spectrum.xp_continuous_spectrum import XpContinuousSpectrum
+from gaiaxpy.spectrum.xp_sampled_spectrum import XpSampledSpectrum
+from gaiaxpy.spectrum.xp_spectra_batch import XpSpectraBatch
+from tests.files.paths import mean_spectrum_avro_file, mean_spectrum_csv_file, with_missing_bp_csv_file
+from tests.utils.utils import assert_frames_close, create_sampled_spectrum
+
+_rtol, _atol = 1e-10, 1e-10
+
+
+@pytest.fixture(scope='module')
+def design_matrices():
+    yield get_design_matrices(np.linspace(0, 60, 120), parse_config(hermite_bases_file))
+
+
+def _get_single_spectra(parsed_input_data, band, design_matrix, truncation=False):
+    rows = parsed_input_data.to_dict('records')
+    continuous_spectra = [XpContinuousSpectrum(row['source_id'], band, row[f'{band}_coefficients'],
+                                               row[f'{band}_covariance_matrix'], row[f'{band}_standard_deviation'])
+                          for row in rows]
+    return [XpSampledSpectrum.from_continuous(spectrum, design_matrix, with_correlation=True,
+                                              truncation=row[f'{band}_n_relevant_bases'] if truncation else -1)
+            for spectrum, row in zip(continuous_spectra, rows)]
+
+
+@pytest.mark.parametrize('truncation', [False, True])
+@pytest.mark.parametrize('file', [mean_spectrum_avro_file, mean_spectrum_csv_file, with_missing_bp_csv_file])
+def test_batch_matches_single_spectra(file, truncation, design_matrices):
+    parsed_input_data, _ = InputReader(file, convert, truncation).read()
+    for band in BANDS:
+        batch = XpSpectraBatch.from_data_frame(parsed_input_data, band, truncation=truncation)
+        design_matrix = design_matrices[band].get_design_matrix()
+        flux = batch.sample_flux(design_matrix)
+        error = batch.sample_error(design_matrix)
+        correlation = batch.sample_correlation(design_matrix)
+        single_spectra = _get_single_spectra(parsed_input_data, band, design_matrices[band], truncation=truncation)
+        assert flux.shape == (len(parsed_input_data), design_matrix.shape[1])
+        for i, spectrum in enumerate(single_spectra):
+            if spectrum.flux is None:
+                assert not batch.available[i]
+                assert np.isnan(flux[i]).all() and np.isnan(error[i]).all()
+                continue
+            expected_correlation = correlation_from_covariance(spectrum.covariance)
+            lower_triangle = np.tril_indices(expected_correlation.shape[0], k=-1)
+            np.testing.assert_allclose(flux[i], spectrum.flux, rtol=_rtol, atol=_atol)
+            np.testing.assert_allclose(error[i], spectrum.error, rtol=_rtol, atol=_atol)
+            np.testing.assert_allclose(correlation[i], expected_correlation[lower_triangle], rtol=_rtol, atol=_atol)
+
+
+@pytest.mark.parametrize('truncation', [False, True])
+def test_convert_matches_create_spectrum(truncation, design_matrices):
+    spectra, _ = convert(with_missing_bp_csv_file, sampling=np.linspace(0, 60, 120), truncation=truncation,
+                         with_correlation=True, save_file=False)
+    parsed_input_data, _ = InputReader(with_missing_bp_csv_file, convert, truncation).read()
+    expected = pd.DataFrame([create_sampled_spectrum(row, truncation, design_matrices, band,
+                                                     with_correlation=True).spectrum_to_dict(True)
+                             for _, row in parsed_input_data.iterrows() for band in BANDS])
+    assert_frames_close(spectra, expected, rtol=_rtol, atol=_atol)
+
+
+def test_blocks_cover_batch(design_matrices):
+    parsed_input_data, _ = InputReader(mean_spectrum_avro_file, convert, False).read()
+    batch = XpSpectraBatch.from_data_frame(parsed_input_data, BANDS.bp)
+    design_matrix = design_matrices[BANDS.bp].get_design_matrix()
+    blocks = batch.get_blocks(2 ** 30)
+    assert [(block.start, block.stop) for block in blocks] == [(i, i + 1) for i in range(batch.n_sources)]
+    blockwise_error = np.vstack([batch.sample_error(design_matrix, block) for block in blocks])
+    np.testing.assert_allclose(blockwise_error, batch.sample_error(design_matrix), rtol=_rtol, atol=_atol)
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_error_propagation_reused_across_blocks(dtype, design_matrices):
+    parsed_input_data, _ = InputReader(mean_spectrum_avro_file, convert, True).read()
+    batch = XpSpectraBatch.from_data_frame(parsed_input_data, BANDS.rp, truncation=True, dtype=dtype)
+    design_matrix = design_matrices[BANDS.rp].get_design_matrix()
+    error_propagation = batch._get_error_propagation(design_matrix)
+    blockwise_error = np.vstack([batch.sample_error(design_matrix, block) for block in batch.get_blocks(2 ** 30)])
+    assert batch._get_error_propagation(design_matrix) is error_propagation
+    npt.assert_allclose(blockwise_error, batch.sample_error(design_matrix), rtol=_rtol, atol=_atol)
+
+
+def test_wrong_number_of_bases(design_matrices):
+    parsed_input_data, _ = InputReader(mean_spectrum_avro_file, convert, False).read()
+    batch = XpSpectraBatch.from_data_frame(parsed_input_data, BANDS.bp)
+    with pytest.raises(ValueError):
+        batch.sample_flux(design_matrices[BANDS.bp].get_design_matrix()[:10])
+
+
+def test_truncation_groups(design_matrices):
+    parsed_input_data, _ = InputReader(mean_spectrum_avro_file, convert, True).read()
+    batch = XpSpectraBatch.from_data_frame(parsed_input_data, BANDS.rp, truncation=True)
+    design_matrix = design_matrices[BANDS.rp].get_design_matrix()
+    groups = batch._get_truncation_groups(np.arange(batch.n_sources), design_matrix)
+    assert sorted(np.concatenate([group for _, group in groups])) == list(range(batch.n_sources))
+    for n_bases, group in groups:
+        assert (parsed_input_data[f'{BANDS.rp}_n_relevant_bases'].iloc[group] == n_bases).all()
+
+
+@pytest.mark.parametrize('truncation', [False, True])
+def test_sparse_design_matrix(truncation, design_matrices):
+    parsed_input_data, _ = InputReader(mean_spectrum_avro_file, convert, truncation).read()
+    batch = XpSpectraBatch.from_data_frame(parsed_input_data, BANDS.rp, truncation=truncation)
+    design_matrix = design_matrices[BANDS.rp].get_design_matrix()
+    # Remove small values so that the sparse matrix does not contain all the elements of the dense one
+    design_matrix = np.where(np.abs(design_matrix) > 1e-3, design_matrix, 0.)
+    sparse_design_matrix = csr_array(design_matrix)
+    npt.assert_allclose(batch.sample_flux(sparse_design_matrix), batch.sample_flux(design_matrix), rtol=_rtol,
+                        atol=_atol)
+    npt.assert_allclose(batch.sample_error(sparse_design_matrix), batch.sample_error(design_matrix), rtol=_rtol,
+                        atol=_atol)
+    npt.assert_allclose(batch.sample_correlation(sparse_design_matrix), batch.sample_correlation(design_matrix),
+                        rtol=_rtol, atol=_atol)
+
+
+@pytest.mark.parametrize('truncation', [False, True])
+def test_covariance_factor(truncation, design_matrices):
+    parsed_input_data, _ = InputReader(mean_spectrum_avro_file, convert, truncation).read()
+    batch = XpSpectraBatch.from_data_frame(parsed_input_data, BANDS.rp, truncation=truncation)
+    design_matrix = design_matrices[BANDS.rp].get_design_matrix()
+    factor = batch.sample_covariance_factor(design_matrix)
+    assert factor.shape == (batch.n_sources, design_matrix.shape[0], design_matrix.shape[1])
+    # The factor includes the standard deviation of the solution, the covariance does not
+    expected = batch.sample_covariance(design_matrix) * batch.standard_deviations[:, np.newaxis, np.newaxis] ** 2
+    npt.assert_allclose(np.transpose(factor, (0, 2, 1)) @ factor, expected, rtol=_rtol, atol=_atol)
+
+
+@pytest.mark.parametrize('truncation', [False, True])
+def test_covariance_band(truncation, design_matrices):
+    parsed_input_data, _ = InputReader(with_missing_bp_csv_file, convert, truncation).read()
+    batch = XpSpectraBatch.from_data_frame(parsed_input_data, BANDS.bp, truncation=truncation)
+    design_matrix = design_matrices[BANDS.bp].get_design_matrix()
+    n_samples = design_matrix.shape[1]
+    covariance_band = batch.sample_covariance_band(design_matrix, 5)
+    covariance = batch.sample_covariance(design_matrix)
+    assert covariance_band.shape == (batch.n_sources, 6, n_samples)
+    for offset in range(6):
+        npt.assert_allclose(covariance_band[:, offset, :n_samples - offset], np.diagonal(covariance, -offset, 1, 2),
+                            rtol=_rtol, atol=_atol)
+        assert np.isnan(covariance_band[:, offset, n_samples - offset:]).all()
+
+
+def test_convert_banded_correlation():
+    spectra, _ = convert(mean_spectrum_avro_file, with_correlation=True, save_file=False)
+    banded_spectra, _ = convert(mean_spectrum_avro_file, with_correlation=True, correlation_bandwidth=4,
+                                save_file=False)
+    assert 'correlation' not in banded_spectra.columns
+    for correlation, correlation_band in zip(spectra['correlation'], banded_spectra['banded_correlation']):
+        n_samples = correlation_band.shape[1]
+        full_correlation = np.zeros((n_samples, n_samples))
+        full_correlation[np.tril_indices(n_samples, k=-1)] = correlation
+        full_correlation = full_correlation + full_correlation.T + np.eye(n_samples)
+        banded_correlation = np.where(np.abs(np.subtract.outer(np.arange(n_samples), np.arange(n_samples))) <= 4,
+                                      full_correlation, 0.)
+        npt.assert_allclose(correlation_from_band(correlation_band), banded_correlation, rtol=_rtol, atol=_atol)
+
+
+@pytest.mark.parametrize('design_matrix_scale', [1., 1e-17])
+def test_single_precision(design_matrix_scale, design_matrices):
+    # Design matrices with very small values (as the ones used to compute absolute fluxes) are also supported
+    parsed_input_data, _ = InputReader(with_missing_bp_csv_file, convert, True).read()
+    design_matrix = design_matrices[BANDS.rp].get_design_matrix() * design_matrix_scale
+    batch = XpSpectraBatch.from_data_frame(parsed_input_data, BANDS.rp, truncation=True)
+    single_precision_batch = XpSpectraBatch.from_data_frame(parsed_input_data, BANDS.rp, truncation=True,
+                                                            dtype=np.float32)
+    flux = batch.sample_flux(design_matrix)
+    error = batch.sample_error(design_matrix)
+    single_precision_flux = single_precision_batch.sample_flux(design_matrix)
+    single_precision_error = single_precision_batch.sample_error(design_matrix)
+    single_precision_correlation = single_precision_batch.sample_correlation(design_matrix)
+    for array in [single_precision_flux, single_precision_error, single_precision_correlation]:
+        assert array.dtype == np.float32
+    npt.assert_allclose(single_precision_flux, flux, rtol=0,
+                        atol=1e-5 * np.nanmax(np.abs(flux)))
+    npt.assert_allclose(single_precision_error, error, rtol=1e-5)
+    npt.assert_allclose(single_precision_correlation, batch.sample_correlation(design_matrix), atol=1e-5)
+
+
+def test_convert_covariance_factor():
+    spectra, _ = convert(mean_spectrum_avro_file, with_correlation=True, save_file=False)
+    factor_spectra, _ = convert(mean_spectrum_avro_file, with_correlation=True, correlation_format='factor',
+                                save_file=False)
+    assert 'correlation' not in factor_spectra.columns
+    for correlation, error, factor in zip(spectra['correlation'], spectra['flux_error'],
+                                          factor_spectra['covariance_factor']):
+        full_correlation = correlation_from_factor(factor)
+        npt.assert_allclose(full_correlation[np.tril_indices(full_correlation.shape[0], k=-1)], correlation,
+                            rtol=_rtol, atol=_atol)
+        npt.assert_allclose(np.sqrt(np.diag(covariance_from_factor(factor))), error, rtol=_rtol, atol=_atol)
@@ -6,6 +6,13 @@ import numpy as np
 import pandas as pd
 
 from gaiaxpy.core.generic_functions import str_to_array, array_to_symmetric_matrix
+from gaiaxpy.core.satellite import BANDS
+from gaiaxpy.spectrum.calibration_absolute_sampled_spectrum import CalibrationAbsoluteSampledSpectrum
+from gaiaxpy.spectrum.sampled_basis_functions import sqrt_4_pi
+from gaiaxpy.spectrum.single_synthetic_photometry import SingleSyntheticPhotometry
+from gaiaxpy.spectrum.utils import get_covariance_matrix
+from gaiaxpy.spectrum.xp_continuous_spectrum import XpContinuousSpectrum
+from gaiaxpy.spectrum.xp_sampled_spectrum import XpSampledSpectrum
 
 missing_bp_source_id = 5405570973190252288
 
@@ -149,3 +156,113 @@ def parse_dfs_for_test(from_file_df, read_input, additional_columns, expected_co
     expected_df = df[expected_columns + [c for c in additional_columns if c not in expected_columns]]
     filtered_read_input = read_input.drop(columns=['bp_covariance_matrix', 'rp_covariance_matrix'])
     return expected_df, filtered_read_input
+
+
+def assert_frames_close(df, expected_df, rtol=1e-10, atol=1e-10):
+    """
+    Compare two DataFrames that can contain arrays and missing values in their cells.
+
+    Args:
+        df (pd.DataFrame): DataFrame to check.
+        expected_df (pd.DataFrame): Expected DataFrame.
+        rtol (float): Relative tolerance for the array values.
+        atol (float): Absolute tolerance for the array values.
+    """
+    assert list(df.columns) == list(expected_df.columns)
+    assert len(df) == len(expected_df)
+    for column in expected_df.columns:
+        for value, expected_value in zip(df[column], expected_df[column]):
+            if isinstance(expected_value, np.ndarray):
+                np.testing.assert_allclose(value, expected_value, rtol=rtol, atol=atol)
+            else:
+                assert value is expected_value or (pd.isna(expected_value) and pd.isna(value)) or \
+                       value == expected_value
+
+
+def create_sampled_spectrum(row, truncation, design_matrices, band, with_correlation=False):
+    """
+    Create a single sampled spectrum from the input continuously-represented mean spectrum and design matrix. Reference
+        for the batched conversion, which must give the same output.
+
+    Args:
+        row (dict/pd.Series): Entry for one source in the mean spectra file, with the columns of both bands.
+        truncation (bool): Toggle truncation of the set of bases.
+        design_matrices (dict): The sampled basis functions of each band.
+        band (str): bp/rp band.
+        with_correlation (bool): Whether correlation information should be generated.
+
+    Returns:
+        XpSampledSpectrum: The sampled spectrum.
+    """
+    recommended_truncation = row[f'{band}_n_relevant_bases'] if truncation else -1
+    continuous_spectrum = XpContinuousSpectrum(row['source_id'], band, row[f'{band}_coefficients'],
+                                               row[f'{band}_covariance_matrix'], row[f'{band}_standard_deviation'])
+    return XpSampledSpectrum.from_continuous(continuous_spectrum, design_matrices.get(band),
+                                             truncation=recommended_truncation, with_correlation=with_correlation)
+
+
+def create_absolute_sampled_spectrum(row, truncation, design_matrix, merge, with_correlation=False):
+    """
+    Create a single sampled absolute spectrum from the input continuously-represented mean spectrum and design matrix.
+        Reference for the batched calibration, which must give the same output.
+
+    Args:
+        row (pd.Series): Entry for one source in the mean spectra file, with the columns of both bands.
+        truncation (bool): Toggle truncation of the set of bases.
+        design_matrix (dict): The sampled basis functions of each band.
+        merge (dict): The weights of BP and RP at each sample.
+        with_correlation (bool): Whether correlation information should be generated.
+
+    Returns:
+        CalibrationAbsoluteSampledSpectrum: The absolute sampled spectrum with calibration behaviour.
+    """
+    source_id = row['source_id']
+    continuous_dict = {band: XpContinuousSpectrum(source_id, band, row[f'{band}_coefficients'],
+                                                  get_covariance_matrix(row, band), row[f'{band}_standard_deviation'])
+                       for band in BANDS}
+    recommended_truncation = {band: row[f'{band}_n_relevant_bases'] for band in BANDS} if truncation else dict()
+    return CalibrationAbsoluteSampledSpectrum(source_id, continuous_dict, design_matrix, merge,
+                                              truncation=recommended_truncation, with_correlation=with_correlation)
+
+
+def evaluate_hermite_function(n, x, w):
+    """
+    Evaluate the Hermite function of order n on a single position, applying the recurrence relation one order at a
+        time. Reference for the evaluation of the design matrices on whole grids.
+
+    Args:
+        n (int): Order of the Hermite function.
+        x (float): Position where the function needs to be evaluated.
+        w (float): Weight of the position. The function is zero where it is not positive.
+
+    Returns:
+        float: The value of the function.
+    """
+    if w <= 0:
+        return 0
+    previous, current = 0., sqrt_4_pi * np.exp(-x ** 2. / 2.)
+    for order in range(1, n + 1):
+        previous, current = current, np.sqrt(2. / order) * x * current - np.sqrt((order - 1) / order) * previous
+    return current
+
+
+def generate_synthetic_photometry(row, design_matrix, merge, truncation, photometric_system):
+    """
+    Create the synthetic photometry of a single source from the input continuously-represented mean spectrum and
+        design matrix. Reference for the batched generation, which must give the same output.
+
+    Args:
+        row (pd.Series): Entry for one source in the mean spectra file, with the columns of both bands.
+        design_matrix (dict): The basis functions of each band sampled for the specific photometric system.
+        merge (dict): The weights of BP and RP at each sample.
+        truncation (bool): Toggle truncation of the set of bases.
+        photometric_system (obj): Photometric system object containing the zero-points.
+
+    Returns:
+        SingleSyntheticPhotometry: The output synthetic photometry.
+    """
+    cont_dict = {band: XpContinuousSpectrum(row['source_id'], band.upper(), row[f'{band}_coefficients'],
+                                            get_covariance_matrix(row, band), row[f'{band}_standard_deviation'])
+                 for band in BANDS}
+    truncation = {band: row[f'{band}_n_relevant_bases'] for band in BANDS} if truncation else None
+    return SingleSyntheticPhotometry(row['source_id'], cont_dict, design_matrix, merge, truncation, photometric_system)